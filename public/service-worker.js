@@ -1,5 +1,12 @@
 const STATIC_CACHE = 'static-v2';
 const DATA_CACHE = 'data-v2';
+// Study content is invalidated per entry from the digests in the precache
+// manifest written by scripts/precache_manifest.py, so this name never needs bumping.
+const ASSET_CACHE = 'assets-v1';
+const PRECACHE_MANIFEST_URL = '/precache-manifest.json';
+const PREFETCH_BUDGETS_URL = '/precache-budgets';
+const DEFAULT_SUBJECT_BYTE_BUDGET = 50 * 1024 * 1024;
+const PREFETCH_CONCURRENCY = 4;
 
 self.addEventListener('install', (event) => {
   event.waitUntil(
@@ -25,15 +32,15 @@ self.addEventListener('activate', (event) => {
     caches.keys().then((keys) =>
       Promise.all(
         keys
-          .filter((key) => ![STATIC_CACHE, DATA_CACHE].includes(key))
+          .filter((key) => ![STATIC_CACHE, DATA_CACHE, ASSET_CACHE].includes(key))
           .map((key) => caches.delete(key))
       )
-    )
+    ).then(() => syncPrecache())
   );
   self.clients.claim();
 });
 
-const cacheFirst = async (request) => {
+const cacheFirst = async (request, cacheName = STATIC_CACHE) => {
   const cached = await caches.match(request);
   if (cached) {
     return cached;
@@ -41,7 +48,7 @@ const cacheFirst = async (request) => {
   try {
     const response = await fetch(request);
     if (response && response.status === 200 && request.url.startsWith(self.location.origin)) {
-      const cache = await caches.open(STATIC_CACHE);
+      const cache = await caches.open(cacheName);
       cache.put(request, response.clone());
     }
     return response;
@@ -50,6 +57,104 @@ const cacheFirst = async (request) => {
   }
 };
 
+const readCachedJson = async (cache, url, fallback) => {
+  const response = await cache.match(url);
+  if (!response) return fallback;
+  try {
+    return await response.json();
+  } catch (error) {
+    return fallback;
+  }
+};
+
+const fetchIntoCache = async (cache, urls) => {
+  const queue = [...urls];
+  const worker = async () => {
+    while (queue.length > 0) {
+      const url = queue.shift();
+      try {
+        const response = await fetch(url, { cache: 'no-store' });
+        if (response.ok) {
+          await cache.put(url, response);
+        }
+      } catch (error) {
+        console.warn('Skipping precache entry', url, error);
+      }
+    }
+  };
+  await Promise.all(Array.from({ length: PREFETCH_CONCURRENCY }, worker));
+};
+
+// Brings the asset cache in line with the current precache manifest: entries
+// whose digest changed (or that disappeared) are evicted, shared entries and
+// the pinned subjects (up to each subject's byte budget) are fetched if missing.
+const runPrecacheSync = async () => {
+  let response;
+  try {
+    response = await fetch(PRECACHE_MANIFEST_URL, { cache: 'no-store' });
+  } catch (error) {
+    return;
+  }
+  if (!response.ok) return;
+
+  const cache = await caches.open(ASSET_CACHE);
+  const manifest = await response.clone().json();
+  const previous = await readCachedJson(cache, PRECACHE_MANIFEST_URL, { entries: [] });
+  const previousDigests = new Map(previous.entries.map((entry) => [entry.url, entry.digest]));
+  const entries = new Map(manifest.entries.map((entry) => [entry.url, entry]));
+
+  const cached = new Set();
+  for (const request of await cache.keys()) {
+    const { pathname } = new URL(request.url);
+    if (pathname === PRECACHE_MANIFEST_URL || pathname === PREFETCH_BUDGETS_URL) continue;
+    const entry = entries.get(pathname);
+    if (entry && entry.digest === previousDigests.get(pathname)) {
+      cached.add(pathname);
+    } else {
+      await cache.delete(request);
+    }
+  }
+
+  const budgets = await readCachedJson(cache, PREFETCH_BUDGETS_URL, {});
+  const used = {};
+  const missing = [];
+  for (const entry of manifest.entries) {
+    if (entry.subject !== null) {
+      const subject = entry.subject.toLowerCase();
+      if (!(subject in budgets)) continue;
+      const total = (used[subject] ?? 0) + entry.size;
+      if (total > budgets[subject]) continue;
+      used[subject] = total;
+    }
+    if (!cached.has(entry.url)) {
+      missing.push(entry.url);
+    }
+  }
+
+  await fetchIntoCache(cache, missing);
+  await cache.put(PRECACHE_MANIFEST_URL, response);
+};
+
+let precacheSync = Promise.resolve();
+
+const syncPrecache = () => {
+  precacheSync = precacheSync
+    .then(runPrecacheSync)
+    .catch((error) => console.warn('Precache sync failed', error));
+  return precacheSync;
+};
+
+const pinSubject = async (subject, byteBudget = DEFAULT_SUBJECT_BYTE_BUDGET) => {
+  const cache = await caches.open(ASSET_CACHE);
+  const budgets = await readCachedJson(cache, PREFETCH_BUDGETS_URL, {});
+  budgets[subject.toLowerCase()] = byteBudget;
+  await cache.put(
+    PREFETCH_BUDGETS_URL,
+    new Response(JSON.stringify(budgets), { headers: { 'Content-Type': 'application/json' } })
+  );
+  await syncPrecache();
+};
+
 const serveNavigation = async (request) => {
   const cache = await caches.open(STATIC_CACHE);
   try {
@@ -100,6 +205,14 @@ self.addEventListener('fetch', (event) => {
       event.respondWith(cacheFirst(request));
       return;
     }
+    if (
+      url.pathname.startsWith('/subject-assets/') ||
+      url.pathname === '/related-content.json' ||
+      url.pathname.startsWith('/seed-bundle.')
+    ) {
+      event.respondWith(cacheFirst(request, ASSET_CACHE));
+      return;
+    }
   }
 
   event.respondWith(fetch(request));
@@ -163,10 +276,16 @@ const markGradesSynced = async () => {
 };
 
 self.addEventListener('message', (event) => {
-  const { type, lessons, exercises, flashcards } = event.data || {};
+  const { type, lessons, exercises, flashcards, subject, byteBudget } = event.data || {};
   if (type === 'CACHE_DATA') {
     event.waitUntil(cacheDataBundle({ lessons, exercises, flashcards }));
   }
+  if (type === 'SYNC_PRECACHE') {
+    event.waitUntil(syncPrecache());
+  }
+  if (type === 'PREFETCH_SUBJECT' && typeof subject === 'string') {
+    event.waitUntil(pinSubject(subject, byteBudget));
+  }
   if (type === 'SYNC_GRADES') {
     event.waitUntil(markGradesSynced());
   }
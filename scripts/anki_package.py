@@ -0,0 +1,271 @@
+"""Write merged flashcards straight into an Anki ``.apkg`` package.
+
+An ``.apkg`` is a zip holding ``collection.anki2`` (an SQLite database in the
+legacy schema every Anki client still imports) and a ``media`` map.  Building
+that database here lets a learner import the whole export in one step, with the
+decks already laid out, instead of going through the CSV field mapping once
+per deck.
+
+* Notes use the stable GUIDs from :func:`flashcard_exports.note_guid`, and note,
+  card, deck and note type ids are derived from stable names, so re-importing a
+  newer package updates the existing notes and keeps their review history.
+* Tags such as ``d1>cliticos-se`` become subdecks
+  (``Study Compass::d1::cliticos-se``); untagged cards go to their seed deck.
+* All rows are inserted with ``executemany`` inside a single transaction, and
+  the finished database is copied into the zip in chunks rather than read into
+  memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from flashcard_exports import DECK_ROOT, DEFAULT_DECK, anki_tags, content_note_id, note_guid
+
+MODEL_NAME = "Study Compass Basic"
+_SCHEMA_VERSION = 11
+_FIELD_SEPARATOR = "\x1f"
+_COPY_CHUNK_SIZE = 1024 * 1024
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+_COLLECTION_CONF = {
+    "activeDecks": [1],
+    "curDeck": 1,
+    "newSpread": 0,
+    "collapseTime": 1200,
+    "timeLim": 0,
+    "estTimes": True,
+    "dueCounts": True,
+    "curModel": None,
+    "nextPos": 1,
+    "sortType": "noteFld",
+    "sortBackwards": False,
+    "addToCur": True,
+}
+_DECK_CONF = {
+    "1": {
+        "id": 1,
+        "name": "Default",
+        "autoplay": True,
+        "maxTaken": 60,
+        "mod": 0,
+        "replayq": True,
+        "timer": 0,
+        "usn": 0,
+        "new": {"bury": True, "delays": [1, 10], "initialFactor": 2500, "ints": [1, 4, 7], "order": 1, "perDay": 20, "separate": True},
+        "lapse": {"delays": [10], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0},
+        "rev": {"bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "minSpace": 1, "perDay": 100},
+    }
+}
+_MODEL_CSS = ".card { font-family: arial; font-size: 20px; text-align: center; color: black; background-color: white; }"
+
+
+def _stable_id(*parts: str) -> int:
+    # 47 bits keeps ids positive and clear of the small ids Anki reserves (1 is the Default deck).
+    value = int.from_bytes(hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=6).digest(), "big")
+    return (value >> 1) | (1 << 40)
+
+
+def subdeck_name(tag: str, deck: str) -> str:
+    """``d1>cliticos-se`` → ``Study Compass::d1::cliticos-se``; untagged cards use ``deck``."""
+
+    parts = [part.strip().replace("::", ":") for part in tag.split(">") if part.strip()]
+    if not parts:
+        parts = [deck or DEFAULT_DECK]
+    return "::".join([DECK_ROOT, *parts])
+
+
+def _deck_entry(deck_id: int, name: str, mod: int) -> dict:
+    return {
+        "id": deck_id,
+        "name": name,
+        "desc": "",
+        "conf": 1,
+        "dyn": 0,
+        "collapsed": False,
+        "extendNew": 10,
+        "extendRev": 50,
+        "mod": mod,
+        "usn": -1,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+    }
+
+
+def _model_entry(model_id: int, deck_id: int, mod: int) -> dict:
+    return {
+        "id": model_id,
+        "name": MODEL_NAME,
+        "type": 0,
+        "mod": mod,
+        "usn": -1,
+        "sortf": 0,
+        "did": deck_id,
+        "css": _MODEL_CSS,
+        "flds": [
+            {"name": name, "ord": ordinal, "font": "Arial", "size": 20, "media": [], "rtl": False, "sticky": False}
+            for ordinal, name in enumerate(("Front", "Back"))
+        ],
+        "tmpls": [
+            {
+                "name": "Card 1",
+                "ord": 0,
+                "qfmt": "{{Front}}",
+                "afmt": "{{FrontSide}}<hr id=answer>{{Back}}",
+                "bqfmt": "",
+                "bafmt": "",
+                "did": None,
+            }
+        ],
+        "req": [[0, "all", [0]]],
+        "tags": [],
+        "vers": [],
+        "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage[utf8]{inputenc}\n"
+        "\\usepackage{amssymb,amsmath}\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+    }
+
+
+class AnkiPackageBuilder:
+    """Collect merged rows and write them as an ``.apkg``.
+
+    Only the insert tuples are kept per row; the SQLite database is built in
+    one go by :meth:`write`.
+    """
+
+    def __init__(self) -> None:
+        self.mod = int(time.time())
+        self.model_id = _stable_id("model", MODEL_NAME)
+        self._notes: list[tuple] = []
+        self._cards: list[tuple] = []
+        self._decks: dict[str, int] = {}
+        self._note_ids: set[int] = set()
+        self._seen: set[str] = set()
+
+    def _deck_id(self, name: str) -> int:
+        deck_id = self._decks.get(name)
+        if deck_id is None:
+            # Register the parents too so the hierarchy exists even without direct cards.
+            parent, _, _ = name.rpartition("::")
+            if parent:
+                self._deck_id(parent)
+            deck_id = self._decks[name] = _stable_id("deck", name)
+        return deck_id
+
+    def add(self, front: str, back: str, tag: str, note_id: str, deck: str) -> None:
+        if note_id in self._seen:
+            # Same fallback as the CSV exports, so both give the card the same GUID.
+            note_id = content_note_id(front, back, tag)
+        self._seen.add(note_id)
+        nid = _stable_id("note", note_id)
+        while nid in self._note_ids:
+            nid += 1
+        self._note_ids.add(nid)
+        sort_field = _HTML_TAG.sub("", front)
+        checksum = int(hashlib.sha1(sort_field.encode("utf-8")).hexdigest()[:8], 16)
+        tags = f" {anki_tags(tag)} " if tag else ""
+        self._notes.append(
+            (nid, note_guid(note_id), self.model_id, self.mod, -1, tags, front + _FIELD_SEPARATOR + back, sort_field, checksum, 0, "")
+        )
+        did = self._deck_id(subdeck_name(tag, deck))
+        # New cards are shown in export order.
+        self._cards.append((_stable_id("card", str(nid)), nid, did, 0, self.mod, -1, 0, 0, len(self._cards) + 1, 0, 0, 0, 0, 0, 0, 0, 0, ""))
+
+    def track(self, rows: Iterable[tuple[str, str, str, str, str]]) -> Iterator[tuple[str, str, str, str, str]]:
+        """Pass ``rows`` through unchanged while collecting them."""
+
+        for row in rows:
+            self.add(*row)
+            yield row
+
+    def _build_collection(self, path: Path) -> None:
+        root_id = self._deck_id(DECK_ROOT)
+        decks = {"1": _deck_entry(1, "Default", self.mod)}
+        decks.update({str(deck_id): _deck_entry(deck_id, name, self.mod) for name, deck_id in sorted(self._decks.items())})
+        models = {str(self.model_id): _model_entry(self.model_id, root_id, self.mod)}
+        collection = (
+            1,
+            self.mod,
+            self.mod * 1000,
+            self.mod * 1000,
+            _SCHEMA_VERSION,
+            0,
+            0,
+            0,
+            json.dumps(_COLLECTION_CONF),
+            json.dumps(models),
+            json.dumps(decks),
+            json.dumps(_DECK_CONF),
+            "{}",
+        )
+
+        connection = sqlite3.connect(path, isolation_level=None)
+        try:
+            connection.executescript(_SCHEMA)
+            connection.execute("BEGIN")
+            connection.execute("INSERT INTO col VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", collection)
+            connection.executemany("INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", self._notes)
+            connection.executemany("INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", self._cards)
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def write(self, output: Path) -> str:
+        """Write the package to ``output`` and return a summary line."""
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix="anki-package-") as workdir:
+            database = Path(workdir) / "collection.anki2"
+            self._build_collection(database)
+            partial = output.with_name(f".{output.name}.tmp")
+            with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                with database.open("rb") as source, archive.open("collection.anki2", "w") as target:
+                    shutil.copyfileobj(source, target, _COPY_CHUNK_SIZE)
+                archive.writestr("media", "{}")
+            partial.replace(output)
+        subdecks = len(self._decks) - 1
+        return f"Anki package: {len(self._notes)} notes in {subdecks} subdeck(s) → {output.name}"
@@ -0,0 +1,253 @@
+"""Compact, streaming text listings for ArchiMate models.
+
+Archi stores models either as plain XML (``.archimate``) or, when the model
+embeds images, as a ZIP archive whose ``model.xml`` member holds the same XML.
+Pasting that XML into an extract buries the handful of meaningful names under
+identifiers, diagram bounds and connection bookkeeping.  This module feeds the
+model through the standard library's ``XMLPullParser`` in fixed-size chunks,
+detaching every element once it has been inspected, and keeps only the short
+records that end up in the listing (element, relationship and view names,
+their types, documentation and counts, each section capped at
+``_MAX_LISTED`` entries) plus an identifier-to-name index used to label
+relationship endpoints.
+
+Both the native Archi format and the Open Group exchange format are
+understood; elements are recognised by local tag name so either namespace
+works.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+from xml.etree import ElementTree
+
+_READ_CHUNK_SIZE = 64 * 1024
+_XSI_TYPE = "{http://www.w3.org/2001/XMLSchema-instance}type"
+_VIEW_TYPE_SUFFIXES = ("DiagramModel", "SketchModel", "CanvasModel")
+_DOCUMENTATION_LIMIT = 300
+_MAX_LISTED = 500
+
+
+class ArchiMateModelError(ValueError):
+    """Raised when a file cannot be read as an ArchiMate model."""
+
+
+@dataclass
+class _Entry:
+    kind: str
+    type: str
+    identifier: str
+    name: str = ""
+    documentation: str = ""
+    source: str = ""
+    target: str = ""
+    nodes: int = 0
+    connections: int = 0
+    notes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ArchiMateListing:
+    name: str = ""
+    purpose: str = ""
+    elements: list[_Entry] = field(default_factory=list)
+    relationships: list[_Entry] = field(default_factory=list)
+    views: list[_Entry] = field(default_factory=list)
+    element_types: Counter = field(default_factory=Counter)
+    relationship_types: Counter = field(default_factory=Counter)
+    view_count: int = 0
+    names: dict[str, str] = field(default_factory=dict)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _clean_type(value: str) -> str:
+    return value.split(":", 1)[-1]
+
+
+def _shorten(text: str, limit: int = _DOCUMENTATION_LIMIT) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _classify(local: str, xsi_type: str) -> str | None:
+    if local == "relationship":
+        return "relationship"
+    if local == "view":
+        return "view"
+    if local != "element" or not xsi_type:
+        return None
+    if xsi_type.endswith("Relationship"):
+        return "relationship"
+    if xsi_type.endswith(_VIEW_TYPE_SUFFIXES):
+        return "view"
+    return "element"
+
+
+def _record(listing: ArchiMateListing, entry: _Entry) -> None:
+    if entry.kind == "element":
+        listing.element_types[entry.type] += 1
+        if entry.name:
+            listing.names[entry.identifier] = entry.name
+        if len(listing.elements) < _MAX_LISTED:
+            listing.elements.append(entry)
+    elif entry.kind == "relationship":
+        entry.type = entry.type.removesuffix("Relationship")
+        listing.relationship_types[entry.type] += 1
+        if len(listing.relationships) < _MAX_LISTED:
+            listing.relationships.append(entry)
+    else:
+        listing.view_count += 1
+        if len(listing.views) < _MAX_LISTED:
+            listing.views.append(entry)
+
+
+def parse_model(handle: IO[bytes]) -> ArchiMateListing:
+    """Stream ``handle`` and collect the compact records for the listing."""
+
+    listing = ArchiMateListing()
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    stack: list[ElementTree.Element] = []
+    entries: list[_Entry | None] = []
+
+    def innermost() -> _Entry | None:
+        for entry in reversed(entries):
+            if entry is not None:
+                return entry
+        return None
+
+    try:
+        for chunk in iter(lambda: handle.read(_READ_CHUNK_SIZE), b""):
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                local = _local(element.tag)
+                if event == "start":
+                    if not stack and local == "model":
+                        listing.name = element.get("name", "")
+                    stack.append(element)
+                    xsi_type = _clean_type(element.get(_XSI_TYPE, ""))
+                    kind = _classify(local, xsi_type)
+                    if kind is not None:
+                        entries.append(
+                            _Entry(
+                                kind=kind,
+                                type=xsi_type or local,
+                                identifier=element.get("id") or element.get("identifier", ""),
+                                name=element.get("name", ""),
+                                source=element.get("source", ""),
+                                target=element.get("target", ""),
+                            )
+                        )
+                    else:
+                        entries.append(None)
+                        view = innermost()
+                        if view is not None and view.kind == "view":
+                            if element.get("archimateElement") or element.get("elementRef"):
+                                view.nodes += 1
+                            elif local in ("sourceConnection", "connection"):
+                                view.connections += 1
+                    continue
+
+                stack.pop()
+                entry = entries.pop()
+                if entry is not None:
+                    _record(listing, entry)
+                else:
+                    owner = innermost()
+                    text = (element.text or "").strip()
+                    if local == "documentation" and text:
+                        if owner is not None:
+                            owner.documentation = owner.documentation or _shorten(text)
+                        elif len(stack) == 1:
+                            listing.purpose = listing.purpose or _shorten(text)
+                    elif local == "purpose" and text and owner is None:
+                        listing.purpose = _shorten(text)
+                    elif local == "name" and text:
+                        if owner is not None:
+                            owner.name = owner.name or text
+                        elif len(stack) == 1:
+                            listing.name = listing.name or text
+                    elif local == "content" and text and owner is not None and owner.kind == "view":
+                        owner.notes.append(_shorten(text, 160))
+                if stack:
+                    stack[-1].remove(element)
+                else:
+                    element.clear()
+        parser.close()
+    except ElementTree.ParseError as error:
+        raise ArchiMateModelError(f"malformed XML: {error}") from error
+    return listing
+
+
+def _open_model(path: Path, archive: zipfile.ZipFile | None) -> IO[bytes]:
+    if archive is None:
+        return path.open("rb")
+    members = [name for name in archive.namelist() if name.lower().endswith(".xml")]
+    if not members:
+        raise ArchiMateModelError("archive does not contain a model XML member")
+    member = "model.xml" if "model.xml" in members else sorted(members)[0]
+    return archive.open(member)
+
+
+def read_model(path: Path) -> ArchiMateListing:
+    """Parse a plain or zipped ArchiMate model at ``path``."""
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive, _open_model(path, archive) as handle:
+            return parse_model(handle)
+    with _open_model(path, None) as handle:
+        return parse_model(handle)
+
+
+def _type_counts(counter: Counter) -> str:
+    return ", ".join(f"{name} {count}" for name, count in sorted(counter.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _with_documentation(line: str, entry: _Entry) -> str:
+    return f"{line} — {entry.documentation}" if entry.documentation else line
+
+
+def format_listing(listing: ArchiMateListing) -> str:
+    element_total = sum(listing.element_types.values())
+    relationship_total = sum(listing.relationship_types.values())
+    lines = [f"ArchiMate model: {listing.name or '(unnamed)'}"]
+    if listing.purpose:
+        lines.append(f"Purpose: {listing.purpose}")
+    lines.append(
+        f"Counts: {element_total} elements, {relationship_total} relationships, {listing.view_count} views"
+    )
+
+    lines.extend(["", f"## Elements ({element_total})"])
+    if listing.element_types:
+        lines.append(f"By type: {_type_counts(listing.element_types)}")
+    for entry in listing.elements:
+        lines.append(_with_documentation(f"- [{entry.type}] {entry.name or '(unnamed)'}", entry))
+    if element_total > len(listing.elements):
+        lines.append(f"[… {element_total - len(listing.elements)} more elements …]")
+
+    lines.extend(["", f"## Relationships ({relationship_total})"])
+    if listing.relationship_types:
+        lines.append(f"By type: {_type_counts(listing.relationship_types)}")
+    for entry in listing.relationships:
+        source = listing.names.get(entry.source, entry.source or "?")
+        target = listing.names.get(entry.target, entry.target or "?")
+        label = f" “{entry.name}”" if entry.name else ""
+        lines.append(_with_documentation(f"- {entry.type}{label}: {source} → {target}", entry))
+    if relationship_total > len(listing.relationships):
+        lines.append(f"[… {relationship_total - len(listing.relationships)} more relationships …]")
+
+    lines.extend(["", f"## Views ({listing.view_count})"])
+    for entry in listing.views:
+        line = f"- {entry.name or '(unnamed)'} ({entry.nodes} elements, {entry.connections} connections)"
+        lines.append(_with_documentation(line, entry))
+        lines.extend(f"  Note: {note}" for note in entry.notes)
+    if listing.view_count > len(listing.views):
+        lines.append(f"[… {listing.view_count - len(listing.views)} more views …]")
+
+    return "\n".join(lines)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Precompile the seed lessons, exercises and flashcards into one bundle.
+
+On a fresh install ``ensureSeedData`` used to parse every JSON file under
+``src/seed`` and validate each record with zod before writing it to Dexie,
+which is slow on low-end phones and repeats identical work on every device.
+This stage does that once at build time:
+
+* JSON files are read with the same lenient rules as ``normalizeSeedJson``
+  (raw newlines inside strings are accepted) and every record is checked
+  against the rules of ``src/seed/seedTypes.ts``.  Unknown keys are dropped
+  the way zod strips them; a bundle file with an invalid record is skipped as
+  a whole, exactly like ``normalizeSeedInput`` does.
+* The ``*-flashcards.csv`` decks are merged in as flashcards (JSON records win
+  when ids collide, since they used to be the only runtime source).
+* Each record gets a short content hash and the bundle gets a version derived
+  from all of them.
+
+``public/seed-bundle.<version>.json`` holds ``{version, lessons, exercises,
+flashcards}`` with every table as a list of ``[hash, record]`` pairs, and the
+small ``public/seed-manifest.json`` points at it.  The client only downloads the
+bundle when the manifest version differs from the one it seeded last, skips
+validation, and ``bulkPut``s just the records whose hash changed.  The bundle
+name changes with its content, so it can be cached forever; compression is left
+to :mod:`precompress`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parents[1]
+SEED_DIR = ROOT / "src" / "seed"
+PUBLIC_DIR = ROOT / "public"
+MANIFEST_NAME = "seed-manifest.json"
+BUNDLE_PREFIX = "seed-bundle."
+BUNDLE_FORMAT = 1
+TABLES = ("lessons", "exercises", "flashcards")
+# Not a seed bundle (and not valid JSON); ensureSeedData skips it too.
+_SKIPPED_FILES = ("sections.json",)
+_HASH_BYTES = 8
+_VERSION_LENGTH = 12
+
+LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+EXERCISE_TYPES = ("mcq", "multi", "cloze", "short", "translate", "conjugate", "order", "match")
+SKILLS = ("read", "write", "listen", "speak")
+DECKS = ("grammar", "verbs", "vocab", "presentations", "culture")
+GRADES = ("again", "hard", "good", "easy")
+
+Validator = Callable[[Any], Any]
+
+
+class SeedValidationError(ValueError):
+    """A record does not match the seed data contract."""
+
+
+# --- Validators mirroring the zod schemas in src/seed/seedTypes.ts ---------
+
+
+def _string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise SeedValidationError(f"expected a string, got {type(value).__name__}")
+    return value
+
+
+def _number(value: Any) -> int | float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SeedValidationError(f"expected a number, got {type(value).__name__}")
+    return value
+
+
+def _url(value: Any) -> str:
+    parsed = urlparse(_string(value))
+    if not parsed.scheme or not (parsed.netloc or parsed.path):
+        raise SeedValidationError(f"expected a URL, got {value!r}")
+    return value
+
+
+def _enum(*choices: str) -> Validator:
+    def validate(value: Any) -> str:
+        if value not in choices:
+            raise SeedValidationError(f"expected one of {', '.join(choices)}, got {value!r}")
+        return value
+
+    return validate
+
+
+def _array(item: Validator) -> Validator:
+    def validate(value: Any) -> list:
+        if not isinstance(value, list):
+            raise SeedValidationError(f"expected an array, got {type(value).__name__}")
+        return [item(element) for element in value]
+
+    return validate
+
+
+def _union(*options: Validator) -> Validator:
+    def validate(value: Any) -> Any:
+        for option in options:
+            try:
+                return option(value)
+            except SeedValidationError:
+                continue
+        raise SeedValidationError(f"no variant matches {value!r}")
+
+    return validate
+
+
+def _object(required: dict[str, Validator], optional: dict[str, Validator] | None = None) -> Validator:
+    optional = optional or {}
+
+    def validate(value: Any) -> dict:
+        if not isinstance(value, dict):
+            raise SeedValidationError(f"expected an object, got {type(value).__name__}")
+        result = {}
+        for key, check in required.items():
+            if key not in value:
+                raise SeedValidationError(f"missing {key!r}")
+            result[key] = check(value[key])
+        for key, check in optional.items():
+            if key in value:
+                result[key] = check(value[key])
+        return result
+
+    return validate
+
+
+validate_lesson = _object(
+    {
+        "id": _string,
+        "level": _enum(*LEVELS),
+        "title": _string,
+        "slug": _string,
+        "tags": _array(_string),
+        "markdown": _string,
+    },
+    {"references": _array(_string)},
+)
+validate_exercise = _object(
+    {
+        "id": _string,
+        "lessonId": _string,
+        "type": _enum(*EXERCISE_TYPES),
+        "promptMd": _string,
+        "answer": _union(_string, _array(_string)),
+    },
+    {
+        "options": _array(_string),
+        "accepted": _array(_string),
+        "rubric": _string,
+        "feedback": _object({"correct": _string, "wrong": _string}, {"hints": _array(_string)}),
+        "meta": _object(
+            {"difficulty": _enum(*LEVELS), "skills": _array(_enum(*SKILLS))},
+            {"topic": _string},
+        ),
+    },
+)
+validate_flashcard = _object(
+    {"id": _string, "front": _string, "back": _string, "tag": _string, "deck": _enum(*DECKS)},
+    {
+        "exampleFront": _string,
+        "exampleBack": _string,
+        "imageUrl": _url,
+        "audioFrontUrl": _url,
+        "audioBackUrl": _url,
+        "srs": _object(
+            {"bucket": _number},
+            {"lastReview": _string, "nextDue": _string, "streak": _number, "lastGrade": _enum(*GRADES)},
+        ),
+    },
+)
+VALIDATORS: dict[str, Validator] = {
+    "lessons": validate_lesson,
+    "exercises": validate_exercise,
+    "flashcards": validate_flashcard,
+}
+
+
+# --- Loading ---------------------------------------------------------------
+
+
+def load_seed_json(path: Path) -> Any:
+    # Same leniency as normalizeSeedJson: drop carriage returns, allow raw newlines in strings.
+    return json.loads(path.read_text(encoding="utf-8").replace("\r", ""), strict=False)
+
+
+def normalise_seed_input(raw: Any, warn: Callable[[str], None]) -> dict[str, list[dict]]:
+    """Python counterpart of ``normalizeSeedInput``."""
+
+    bundle: dict[str, list[dict]] = {table: [] for table in TABLES}
+    if raw is None:
+        return bundle
+
+    if isinstance(raw, list):
+        for item in raw:
+            for table in TABLES:
+                try:
+                    bundle[table].append(VALIDATORS[table](item))
+                    break
+                except SeedValidationError:
+                    continue
+            else:
+                warn(f"skipped unrecognised item {str(item)[:80]}")
+        return bundle
+
+    if isinstance(raw, dict):
+        try:
+            return {table: _array(VALIDATORS[table])(raw.get(table, [])) for table in TABLES}
+        except SeedValidationError as error:
+            bundle_error = error
+
+        # Fall back to a single record of any kind.
+        matched = False
+        for table in TABLES:
+            try:
+                bundle[table].append(VALIDATORS[table](raw))
+                matched = True
+            except SeedValidationError:
+                continue
+        if not matched:
+            warn(f"skipped: {bundle_error}")
+        return bundle
+
+    warn(f"skipped unrecognised {type(raw).__name__}")
+    return bundle
+
+
+def iter_csv_flashcards(path: Path, warn: Callable[[str], None]) -> Iterator[dict]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        for line, record in enumerate(csv.DictReader(handle), start=2):
+            card = {key: (record.get(key) or "").strip() for key in ("id", "front", "back", "tag", "deck")}
+            if not (card["id"] and card["front"] and card["back"]):
+                continue
+            try:
+                yield validate_flashcard(card)
+            except SeedValidationError as error:
+                warn(f"line {line}: {error}")
+
+
+def collect_seed_records(seed_dir: Path, warn: Callable[[str], None]) -> dict[str, dict[str, dict]]:
+    """Validated records per table, keyed by id (later sources win)."""
+
+    records: dict[str, dict[str, dict]] = {table: {} for table in TABLES}
+    for path in sorted(seed_dir.rglob("*-flashcards.csv")):
+        relative = path.relative_to(seed_dir).as_posix()
+        for card in iter_csv_flashcards(path, lambda message: warn(f"{relative}: {message}")):
+            records["flashcards"][card["id"]] = card
+
+    for path in sorted(seed_dir.rglob("*.json")):
+        if path.name in _SKIPPED_FILES:
+            continue
+        relative = path.relative_to(seed_dir).as_posix()
+        try:
+            raw = load_seed_json(path)
+        except (OSError, json.JSONDecodeError) as error:
+            warn(f"{relative}: parse error ({error})")
+            continue
+        bundle = normalise_seed_input(raw, lambda message: warn(f"{relative}: {message}"))
+        for table in TABLES:
+            for record in bundle[table]:
+                records[table][record["id"]] = record
+    return records
+
+
+# --- Output ----------------------------------------------------------------
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def record_hash(record: dict) -> str:
+    return hashlib.blake2b(_canonical(record).encode("utf-8"), digest_size=_HASH_BYTES).hexdigest()
+
+
+def build_seed_bundle(
+    seed_dir: Path = SEED_DIR,
+    public_dir: Path = PUBLIC_DIR,
+    warn: Callable[[str], None] | None = None,
+) -> str:
+    """Write the bundle and manifest when the content changed; returns a summary line."""
+
+    warn = warn or (lambda message: print(f"[seed-bundle] {message}", file=sys.stderr))
+    records = collect_seed_records(seed_dir, warn)
+    tables = {
+        table: [[record_hash(record), record] for _, record in sorted(records[table].items())] for table in TABLES
+    }
+    version_digest = hashlib.blake2b(digest_size=_HASH_BYTES)
+    for table in TABLES:
+        for digest, record in tables[table]:
+            version_digest.update(f"{table}\0{record['id']}\0{digest}\n".encode("utf-8"))
+    version = f"{BUNDLE_FORMAT}-{version_digest.hexdigest()[:_VERSION_LENGTH]}"
+
+    bundle_name = f"{BUNDLE_PREFIX}{version}.json"
+    bundle_path = public_dir / bundle_name
+    counts = {table: len(tables[table]) for table in TABLES}
+    public_dir.mkdir(parents=True, exist_ok=True)
+    written = not bundle_path.is_file()
+    if written:
+        content = json.dumps({"version": version, **tables}, ensure_ascii=False, separators=(",", ":"))
+        partial = bundle_path.with_name(f".{bundle_name}.tmp")
+        partial.write_text(content, encoding="utf-8")
+        partial.replace(bundle_path)
+    for stale in public_dir.glob(f"{BUNDLE_PREFIX}*.json"):
+        if stale != bundle_path:
+            stale.unlink()
+
+    manifest = {"version": version, "bundle": bundle_name, "bytes": bundle_path.stat().st_size, "counts": counts}
+    manifest_path = public_dir / MANIFEST_NAME
+    content = json.dumps(manifest, separators=(",", ":"))
+    if not manifest_path.is_file() or manifest_path.read_text(encoding="utf-8") != content:
+        manifest_path.write_text(content, encoding="utf-8")
+
+    totals = ", ".join(f"{count} {table}" for table, count in counts.items())
+    state = "written" if written else "unchanged"
+    return f"Seed bundle {version} ({totals}) {state}."
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate the seed data and write the precompiled seed bundle.")
+    parser.add_argument("--seed-dir", type=Path, default=SEED_DIR, help="Folder with the seed JSON and CSV files")
+    parser.add_argument("--output-dir", type=Path, default=PUBLIC_DIR, help="Folder receiving the bundle and manifest")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 when any seed record is skipped")
+    args = parser.parse_args(argv)
+
+    problems: list[str] = []
+
+    def warn(message: str) -> None:
+        problems.append(message)
+        print(f"[seed-bundle] {message}", file=sys.stderr)
+
+    print(build_seed_bundle(args.seed_dir, args.output_dir, warn))
+    return 1 if args.strict and problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
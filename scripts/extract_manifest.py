@@ -0,0 +1,296 @@
+"""Freshness manifest for the subject extraction pipeline.
+
+The manifest records, for every source under ``subjects/``, the ``stat``
+fingerprint (size, modification time and inode) observed when its extract was
+written, a content digest used as a fallback when only the timestamps changed
+(for example after a fresh checkout), and a description of the outputs that
+were produced.  :func:`find_stale_sources` compares the live tree against the
+manifest using only ``os.scandir``/``os.stat`` calls, so a warm no-op check
+never reads source or extract contents.
+
+This module deliberately imports nothing beyond the standard library (and the
+stdlib-only :mod:`source_buffer`) so that ``extract_subject_texts.py --check``
+can answer before the heavy document parsers are loaded.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from source_buffer import SourceBuffer
+
+MANIFEST_VERSION = 3
+SUPPORT_MODULES = ("globModules.ts", "index.ts")
+
+
+@dataclass
+class SourceStat:
+    relative: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+@dataclass
+class StaleSource:
+    relative: str
+    reason: str
+
+
+def iter_source_stats(subjects_dir: Path, prefix: str = "") -> Iterator[SourceStat]:
+    """Yield a :class:`SourceStat` for every regular file below ``subjects_dir``.
+
+    ``prefix`` is prepended to the relative paths, for walking a sub-folder.
+    """
+
+    stack = [(subjects_dir, prefix)]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((Path(entry.path), f"{relative}/"))
+                continue
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            yield SourceStat(relative, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def hash_file(path: Path) -> str:
+    with SourceBuffer(path) as source:
+        return source.digest()
+
+
+def source_digest(stat: SourceStat, subjects_dir: Path, previous: dict | None = None) -> str:
+    """Content digest of a source, reusing the recorded one while its stat fingerprint matches."""
+
+    if previous is not None and _stat_matches(previous, stat) and previous.get("digest"):
+        return previous["digest"]
+    return hash_file(subjects_dir / stat.relative)
+
+
+def possible_duplicates(stats: Iterable[SourceStat]) -> list[SourceStat]:
+    """Return the sources sharing their file name and size with another source.
+
+    Only these can be grouped by :func:`find_duplicate_sources`, so only they
+    need a digest before extraction starts.
+    """
+
+    groups: dict[tuple[str, int], list[SourceStat]] = {}
+    for stat in stats:
+        groups.setdefault((Path(stat.relative).name, stat.size), []).append(stat)
+    return [stat for members in groups.values() if len(members) > 1 for stat in members]
+
+
+def find_duplicate_sources(digests: dict[str, str]) -> dict[str, list[str]]:
+    """Group sources that share both their content digest and their file name.
+
+    Returns ``{primary: [duplicates]}`` for every group with more than one
+    member; the primary is the first path in sort order.  Requiring the same
+    file name keeps the outputs interchangeable: figure files and extractor
+    notes are named after the source file.
+    """
+
+    groups: dict[tuple[str, str], list[str]] = {}
+    for relative in sorted(digests):
+        groups.setdefault((digests[relative], Path(relative).name), []).append(relative)
+    return {members[0]: members[1:] for members in groups.values() if len(members) > 1}
+
+
+def load_manifest(manifest_path: Path) -> dict[str, dict]:
+    """Return the recorded source entries, or an empty mapping when unusable."""
+
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    sources = data.get("sources")
+    return sources if isinstance(sources, dict) else {}
+
+
+def save_manifest(manifest_path: Path, sources: dict[str, dict]) -> None:
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": MANIFEST_VERSION, "sources": dict(sorted(sources.items()))}
+    temp_path = manifest_path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    os.replace(temp_path, manifest_path)
+
+
+def build_entry(
+    stat: SourceStat,
+    subjects_dir: Path,
+    *,
+    has_assets: bool,
+    previous: dict | None = None,
+    duration: float | None = None,
+    output_bytes: int | None = None,
+    assets_pending: bool = False,
+    digest: str | None = None,
+    peak_mb: float | None = None,
+    aborted: bool = False,
+) -> dict:
+    """Return the manifest entry describing a freshly written extract.
+
+    ``duration``, ``output_bytes`` and ``peak_mb`` (the memory the job added to
+    its worker) feed the cost and footprint models of the next bulk run (see
+    ``extraction_costs``).  ``assets_pending`` marks a text-first
+    extract whose figures have not been backfilled yet and ``aborted`` one
+    holding the placeholder of a killed job; both stay stale for ``--check``.
+    ``digest`` skips hashing when the caller already knows it.
+    """
+
+    if digest is None:
+        digest = source_digest(stat, subjects_dir, previous)
+    entry = {
+        "size": stat.size,
+        "mtime_ns": stat.mtime_ns,
+        "inode": stat.inode,
+        "digest": digest,
+        "assets": has_assets,
+    }
+    if duration is not None:
+        entry["duration"] = round(duration, 3)
+    if output_bytes is not None:
+        entry["output_bytes"] = output_bytes
+    if peak_mb is not None:
+        entry["peak_mb"] = round(peak_mb, 1)
+    if assets_pending:
+        entry["assets_pending"] = True
+    if aborted:
+        entry["aborted"] = True
+    return entry
+
+
+def extract_relative_path(relative_source: str) -> str:
+    """Return the extract of a source, relative to the extracts directory.
+
+    PDFs keep the historical ``<stem>.txt``.  Other sources use
+    ``<stem>.<ext>.txt`` so a deck and its PDF export never write one extract.
+    """
+
+    path = Path(relative_source)
+    if path.suffix.lower() == ".pdf":
+        return path.with_suffix(".txt").as_posix()
+    return f"{path.as_posix()}.txt"
+
+
+def asset_relative_path(relative_source: str) -> str:
+    """Return the figure directory of a source, relative to the asset store.
+
+    PDFs keep the historical ``<stem>/`` directory.  Other sources use
+    ``<stem>.<ext>/`` so a deck and its PDF export never share, and wipe, one
+    directory.
+    """
+
+    path = Path(relative_source)
+    if path.suffix.lower() == ".pdf":
+        return path.with_suffix("").as_posix()
+    return path.as_posix()
+
+
+def _stat_matches(entry: dict, stat: SourceStat) -> bool:
+    return (
+        entry.get("size") == stat.size
+        and entry.get("mtime_ns") == stat.mtime_ns
+        and entry.get("inode") == stat.inode
+    )
+
+
+def _directory_has_files(directory: Path) -> bool:
+    stack = [directory]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            if entry.is_file():
+                return True
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+    return False
+
+
+def find_stale_sources(
+    subjects_dir: Path,
+    output_dir: Path,
+    assets_dir: Path,
+    manifest_path: Path,
+) -> list[StaleSource]:
+    """Return every source whose extract is missing or out of date.
+
+    Sources whose ``stat`` fingerprint changed but whose size did not are
+    re-hashed; when the digest still matches, the manifest entry is refreshed in
+    place so the next check takes the fast path again.
+    """
+
+    recorded = load_manifest(manifest_path)
+    stale: list[StaleSource] = []
+    refreshed = False
+
+    for module in SUPPORT_MODULES:
+        if not (output_dir / module).is_file():
+            stale.append(StaleSource(module, "support module is missing"))
+
+    seen: set[str] = set()
+    for stat in iter_source_stats(subjects_dir):
+        seen.add(stat.relative)
+        entry = recorded.get(stat.relative)
+        if entry is None:
+            stale.append(StaleSource(stat.relative, "new source"))
+            continue
+        if not _stat_matches(entry, stat):
+            if entry.get("size") != stat.size:
+                stale.append(StaleSource(stat.relative, "source changed"))
+                continue
+            if hash_file(subjects_dir / stat.relative) != entry.get("digest"):
+                stale.append(StaleSource(stat.relative, "source changed"))
+                continue
+            entry.update(size=stat.size, mtime_ns=stat.mtime_ns, inode=stat.inode)
+            refreshed = True
+        if not (output_dir / extract_relative_path(stat.relative)).is_file():
+            stale.append(StaleSource(stat.relative, "extract is missing"))
+            continue
+        if entry.get("aborted"):
+            stale.append(StaleSource(stat.relative, "previous extraction aborted"))
+            continue
+        if entry.get("assets_pending"):
+            stale.append(StaleSource(stat.relative, "figure backfill did not finish"))
+            continue
+        if entry.get("assets") and not _directory_has_files(assets_dir / asset_relative_path(stat.relative)):
+            stale.append(StaleSource(stat.relative, "subject assets are missing"))
+
+    for relative in sorted(recorded.keys() - seen):
+        stale.append(StaleSource(relative, "source removed"))
+
+    if refreshed:
+        save_manifest(manifest_path, recorded)
+
+    return stale
+
+
+def check_main(subjects_dir: Path, output_dir: Path, assets_dir: Path, manifest_path: Path) -> int:
+    """Print the stale set and return ``1`` when extraction work is needed."""
+
+    if not subjects_dir.exists():
+        print("subjects/ directory not found; nothing to extract.")
+        return 0
+    stale = find_stale_sources(subjects_dir, output_dir, assets_dir, manifest_path)
+    if not stale:
+        print("Subject extracts are up to date.")
+        return 0
+    for entry in stale:
+        print(f"{entry.relative}: {entry.reason}")
+    print(f"{len(stale)} subject extract(s) need regeneration.")
+    return 1
@@ -0,0 +1,317 @@
+"""SQLite/FTS5 store for subject extracts.
+
+The ``.txt`` extracts stay the source of truth for the app bundle, but
+answering "which Dbd pages mention normalización" from them means opening and
+scanning every file.  This optional backend mirrors each extract into a single
+SQLite database: one row per source (with a content hash), one row per page,
+slide, cell or sheet section, the extraction notes and the figure references,
+plus an FTS5 index over the section text.  Accents are folded by the
+tokenizer, so ``normalizacion`` matches ``normalización``.
+
+Writes happen in one transaction per run and are keyed by content hash, so a
+source whose extract did not change is skipped without touching its rows.
+
+Usage::
+
+    python scripts/extract_store.py import [--db PATH]   # index existing .txt extracts
+    python scripts/extract_store.py search "normalización" --subject Dbd --json
+
+``search`` exits with status 3 for an invalid FTS5 query and 4 when the store
+has not been built yet, so callers can tell both apart from other failures.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STORE_PATH = ROOT / ".cache" / "subject-extracts.sqlite"
+DEFAULT_EXTRACTS_DIR = ROOT / "src" / "data" / "subjectExtracts"
+SCHEMA_VERSION = 1
+EXIT_INVALID_QUERY = 3
+EXIT_STORE_NOT_BUILT = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_source ON pages(source_id, number);
+CREATE TABLE IF NOT EXISTS notes (
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_source ON notes(source_id);
+CREATE TABLE IF NOT EXISTS images (
+    page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    alt TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_page ON images(page_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text,
+    content='pages',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_SECTION_HEADING = re.compile(r"^### (.+)$", re.MULTILINE)
+_SECTION_NUMBER = re.compile(r"(\d+)")
+_IMAGE_LINE = re.compile(r"^!\[(.*?)\]\((.*?)\)$", re.MULTILINE)
+_HEADER_SOURCE = re.compile(r"^Source: subjects/(.+)$", re.MULTILINE)
+
+
+class ExtractStoreError(RuntimeError):
+    """Raised when the SQLite build lacks FTS5 or the store cannot be opened."""
+
+
+@dataclass
+class Section:
+    number: int
+    label: str
+    text: str
+    images: list[tuple[str, str]] = field(default_factory=list)
+
+
+def split_sections(text: str) -> list[Section]:
+    """Split an extract body on its ``### ...`` headings (pages, slides, cells, sheets)."""
+
+    headings = list(_SECTION_HEADING.finditer(text))
+    if not headings:
+        chunks = [("", text)]
+    else:
+        chunks = []
+        if text[: headings[0].start()].strip():
+            chunks.append(("", text[: headings[0].start()]))
+        for index, match in enumerate(headings):
+            end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+            chunks.append((match.group(1).strip(), text[match.end() : end]))
+
+    sections = []
+    for position, (label, body) in enumerate(chunks, start=1):
+        number_match = _SECTION_NUMBER.search(label)
+        images = [(match.group(1), match.group(2)) for match in _IMAGE_LINE.finditer(body)]
+        sections.append(
+            Section(
+                number=int(number_match.group(1)) if number_match else position,
+                label=label,
+                text=_IMAGE_LINE.sub("", body).strip(),
+                images=images,
+            )
+        )
+    return sections
+
+
+def content_hash(text: str, notes: Sequence[str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(text.encode("utf-8"))
+    for note in notes:
+        digest.update(b"\0" + note.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_extract(content: str) -> tuple[str, list[str], str] | None:
+    """Split a written ``.txt`` extract into ``(source, notes, body)``."""
+
+    header, _, body = content.partition("\n\n")
+    source_match = _HEADER_SOURCE.search(header)
+    if not header.startswith("# Extracted content") or source_match is None:
+        return None
+    notes = [line[2:] for line in header.splitlines() if line.startswith("- ")]
+    return source_match.group(1), notes, body.rstrip("\n")
+
+
+class ExtractStore:
+    """Read/write access to the extract database; use as a context manager."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        try:
+            self._ensure_schema()
+        except sqlite3.OperationalError as error:
+            self.connection.close()
+            raise ExtractStoreError(f"Unable to initialise {path}: {error}") from error
+        self._hashes = dict(self.connection.execute("SELECT path, content_hash FROM sources"))
+
+    def _ensure_schema(self) -> None:
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version not in (0, SCHEMA_VERSION):
+            self.connection.executescript(
+                "DROP TABLE IF EXISTS pages_fts; DROP TABLE IF EXISTS images; DROP TABLE IF EXISTS notes;"
+                " DROP TABLE IF EXISTS pages; DROP TABLE IF EXISTS sources;"
+            )
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> "ExtractStore":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+        self.connection.close()
+
+    def upsert(self, relative: str, text: str, notes: Sequence[str]) -> bool:
+        """Store one extract; returns ``False`` when its content hash is unchanged."""
+
+        digest = content_hash(text, notes)
+        if self._hashes.get(relative) == digest:
+            return False
+
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM sources WHERE path = ?", (relative,))
+        cursor.execute(
+            "INSERT INTO sources(path, subject, kind, content_hash) VALUES (?, ?, ?, ?)",
+            (relative, relative.split("/", 1)[0], Path(relative).suffix.lower().lstrip("."), digest),
+        )
+        source_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO notes(source_id, position, note) VALUES (?, ?, ?)",
+            [(source_id, position, note) for position, note in enumerate(notes, start=1)],
+        )
+        for section in split_sections(text):
+            cursor.execute(
+                "INSERT INTO pages(source_id, number, label, text) VALUES (?, ?, ?, ?)",
+                (source_id, section.number, section.label, section.text),
+            )
+            page_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO images(page_id, position, alt, path) VALUES (?, ?, ?, ?)",
+                [(page_id, position, alt, path) for position, (alt, path) in enumerate(section.images, start=1)],
+            )
+        self._hashes[relative] = digest
+        return True
+
+    def remove(self, relatives: Iterable[str]) -> int:
+        removed = [relative for relative in relatives if relative in self._hashes]
+        self.connection.executemany("DELETE FROM sources WHERE path = ?", [(relative,) for relative in removed])
+        for relative in removed:
+            del self._hashes[relative]
+        return len(removed)
+
+    def prune(self, keep: set[str]) -> int:
+        """Drop every source that is not in ``keep`` (used after full runs)."""
+
+        return self.remove([relative for relative in list(self._hashes) if relative not in keep])
+
+    def search(self, query: str, *, subject: str | None = None, limit: int = 20) -> list[dict]:
+        """Return the best matching sections for an FTS5 ``query``."""
+
+        sql = (
+            "SELECT sources.path, sources.subject, pages.number, pages.label,"
+            " snippet(pages_fts, 0, '[', ']', '…', 12), bm25(pages_fts)"
+            " FROM pages_fts"
+            " JOIN pages ON pages.id = pages_fts.rowid"
+            " JOIN sources ON sources.id = pages.source_id"
+            " WHERE pages_fts MATCH ?"
+        )
+        parameters: list[object] = [query]
+        if subject:
+            sql += " AND sources.subject = ?"
+            parameters.append(subject)
+        sql += " ORDER BY bm25(pages_fts) LIMIT ?"
+        parameters.append(limit)
+        return [
+            {"source": path, "subject": subject_name, "page": number, "label": label, "snippet": snippet, "rank": rank}
+            for path, subject_name, number, label, snippet, rank in self.connection.execute(sql, parameters)
+        ]
+
+
+def import_extracts(store: ExtractStore, extracts_dir: Path) -> tuple[int, int]:
+    """Index every ``.txt`` extract below ``extracts_dir``; returns ``(seen, updated)``."""
+
+    seen: set[str] = set()
+    updated = 0
+    for path in sorted(extracts_dir.rglob("*.txt")):
+        parsed = parse_extract(path.read_text(encoding="utf-8"))
+        if parsed is None:
+            continue
+        source, notes, body = parsed
+        seen.add(source)
+        updated += store.upsert(source, body, notes)
+    store.prune(seen)
+    return len(seen), updated
+
+
+def _cli(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Query or rebuild the SQLite subject extract store.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_STORE_PATH, help="Path of the SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Index the existing .txt extracts")
+    importer.add_argument("--extracts-dir", type=Path, default=DEFAULT_EXTRACTS_DIR)
+    search = commands.add_parser("search", help="Full-text search (FTS5 query syntax)")
+    search.add_argument("query")
+    search.add_argument("--subject")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    not_built = f"Extract store not built: {args.db}; run 'python scripts/extract_store.py import' first."
+    if args.command == "search" and not args.db.is_file():
+        print(not_built, file=sys.stderr)
+        return EXIT_STORE_NOT_BUILT
+
+    try:
+        store = ExtractStore(args.db)
+    except ExtractStoreError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    with store:
+        if args.command == "import":
+            seen, updated = import_extracts(store, args.extracts_dir)
+            print(f"Indexed {seen} extract(s) into {args.db} ({updated} updated).")
+            return 0
+        if not store._hashes:
+            print(not_built, file=sys.stderr)
+            return EXIT_STORE_NOT_BUILT
+        try:
+            results = store.search(args.query, subject=args.subject, limit=max(1, args.limit))
+        except sqlite3.OperationalError as error:
+            print(f"Invalid search query: {error}", file=sys.stderr)
+            return EXIT_INVALID_QUERY
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False))
+    else:
+        for result in results:
+            print(f"{result['source']} · {result['label'] or result['page']}: {result['snippet']}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    raise SystemExit(_cli())
@@ -4,8 +4,9 @@
 The script walks the source ``subjects`` directory, extracts textual content
 where possible, and saves the normalised output into
 ``src/data/subjectExtracts``. Each generated ``.txt`` file mirrors the
-relative path of the original asset so downstream tooling can provide in-app
-previews or search across the raw course materials.
+relative path of the original asset (``<stem>.txt`` for PDFs, ``<name>.txt``
+otherwise, so sources sharing a stem never share an extract) so downstream
+tooling can provide in-app previews or search across the raw course materials.
 """
 from __future__ import annotations
 
@@ -14,41 +15,68 @@ import contextlib
 import base64
 import binascii
 import json
+import os
 import subprocess
 import textwrap
 import re
 import sys
-import tempfile
+import time
 import zipfile
 from collections import defaultdict
-from dataclasses import asdict, dataclass
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from io import BytesIO, StringIO
 from pathlib import Path
 import shutil
-from typing import Any, Callable, Iterator, Sequence
+from typing import Any, BinaryIO, Callable, Iterator, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+SUBJECTS_DIR = ROOT / "subjects"
+OUTPUT_DIR = ROOT / "src" / "data" / "subjectExtracts"
+PUBLIC_ASSETS_DIR = ROOT / "public" / "subject-assets"
+MANIFEST_PATH = ROOT / ".cache" / "subject-extracts-manifest.json"
+RUN_REPORT_PATH = ROOT / ".cache" / "extraction-run.json"
+
+if __name__ == "__main__" and sys.argv[1:] == ["--check"]:  # pragma: no cover - CLI fast path
+    # The freshness check only stats files, so answer it before importing the
+    # document parsers below (they dominate start-up time).
+    from extract_manifest import check_main
+
+    raise SystemExit(check_main(SUBJECTS_DIR, OUTPUT_DIR, PUBLIC_ASSETS_DIR, MANIFEST_PATH))
+
+from archimate_extract import ArchiMateModelError, format_listing, read_model
+from extract_manifest import (
+    SourceStat,
+    asset_relative_path,
+    build_entry,
+    check_main,
+    extract_relative_path,
+    find_duplicate_sources,
+    iter_source_stats,
+    load_manifest,
+    possible_duplicates,
+    save_manifest,
+    source_digest,
+)
+from extract_store import DEFAULT_STORE_PATH, ExtractStore, ExtractStoreError
+from extraction_costs import (
+    estimate_cost,
+    estimate_footprint,
+    has_recorded_duration,
+    learn_rates,
+    makespan_lower_bound,
+    predict_makespan,
+)
+from extraction_profiling import PROFILE_ROOT, ProfileSettings, new_run_dir, profile_task, write_summary
+from extraction_scope import SourceScope, add_scope_arguments, iter_scoped_stats, scope_from_args
+from extraction_workers import PoolStats, WorkerBudget, run_supervised
+from notebook_extract import FigureStore, NotebookLimits, write_notebook
+from ooxml_extract import MediaStore, OOXMLPackageError, read_docx_text, read_presentation_text
+from source_buffer import SourceBuffer
+import spreadsheet_extract
+from spreadsheet_extract import SheetLimits
 
-try:  # pragma: no cover - optional dependency may be missing in CI environments
-    from docx import Document  # type: ignore
-except ImportError as docx_import_error:  # pragma: no cover - fallback when dependency absent
-    Document = None  # type: ignore[assignment]
-    DOCX_IMPORT_ERROR = docx_import_error
-else:
-    DOCX_IMPORT_ERROR = None
-try:  # pragma: no cover - optional dependency may be missing in CI environments
-    from openpyxl import load_workbook  # type: ignore
-except ImportError as openpyxl_import_error:  # pragma: no cover - fallback when dependency absent
-    load_workbook = None  # type: ignore[assignment]
-    OPENPYXL_IMPORT_ERROR = openpyxl_import_error
-else:
-    OPENPYXL_IMPORT_ERROR = None
 
-try:  # pragma: no cover - optional dependency may be missing in CI environments
-    from pptx import Presentation  # type: ignore
-except ImportError as pptx_import_error:  # pragma: no cover - fallback when dependency absent
-    Presentation = None  # type: ignore[assignment]
-    PPTX_IMPORT_ERROR = pptx_import_error
-else:
-    PPTX_IMPORT_ERROR = None
 try:  # pragma: no cover - optional dependency may be missing in CI environments
     from pypdf import PdfReader
 except ImportError as pypdf_import_error:  # pragma: no cover - fallback when dependency absent
@@ -58,20 +86,25 @@ else:
     PYPDF_IMPORT_ERROR = None
 PYPDF_AUTOINSTALL_ATTEMPTED = False
 PYMUPDF_AUTOINSTALL_ATTEMPTED = False
-try:  # pragma: no cover - optional dependency may be missing in CI environments
-    import xlrd  # type: ignore
-except ImportError as xlrd_import_error:  # pragma: no cover - fallback when dependency absent
-    xlrd = None  # type: ignore[assignment]
-    XLRD_IMPORT_ERROR = xlrd_import_error
-else:
-    XLRD_IMPORT_ERROR = None
 
-ROOT = Path(__file__).resolve().parents[1]
-SUBJECTS_DIR = ROOT / "subjects"
-OUTPUT_DIR = ROOT / "src" / "data" / "subjectExtracts"
-PUBLIC_ASSETS_DIR = ROOT / "public" / "subject-assets"
+# Spreadsheet extracts keep at most this many non-empty rows/columns per sheet;
+# the rest is summarised. Override per top-level subject folder when a course
+# needs more (or less) of its workbooks inlined into the app bundle.
+DEFAULT_SHEET_LIMITS = SheetLimits(max_rows=200, max_columns=30)
+SUBJECT_SHEET_LIMITS: dict[str, SheetLimits] = {}
+
+# Notebook extracts keep at most this many bytes of text output per cell;
+# image outputs are always written to the asset store.
+DEFAULT_NOTEBOOK_LIMITS = NotebookLimits(max_output_bytes=2048)
+SUBJECT_NOTEBOOK_LIMITS: dict[str, NotebookLimits] = {}
 
 
+# Written in place of a page's figures by text-first runs until the backfill
+# phase has extracted them.
+_FIGURE_PLACEHOLDER = "[Figures for page {page} are still being extracted]"
+_FIGURE_PLACEHOLDER_PATTERN = re.compile(r"^\[Figures for page (\d+) are still being extracted\]$", re.MULTILINE)
+_EMPTY_PAGE_PATTERN = re.compile(r"### Page \d+\s*")
+
 _NOISY_PDF_IMAGE_WARNING = re.compile(
     r"^(?:warning:\s*)?Ignoring wrong pointing object \d+ \d+ \(offset \d+\)$",
     re.IGNORECASE,
@@ -127,8 +160,8 @@ def _capture_pypdf_warnings() -> Iterator[list[str]]:
             pypdf_reader.logger_warning = original_reader_warning  # type: ignore[attr-defined]
 
 
-def _repair_pdf_with_pymupdf(pdf_path: Path) -> tuple[Path, Callable[[], None]] | None:
-    """Return a cleaned temporary copy of ``pdf_path`` when possible."""
+def _repair_pdf_with_pymupdf(source: SourceBuffer) -> bytes | None:
+    """Return a cleaned in-memory copy of the mapped PDF when possible."""
 
     if not _ensure_pymupdf_available():
         return None
@@ -138,44 +171,27 @@ def _repair_pdf_with_pymupdf(pdf_path: Path) -> tuple[Path, Callable[[], None]]
     except ImportError:
         return None
 
-    temp_dir = Path(tempfile.mkdtemp(prefix="pdf-repair-"))
-
     try:
-        document = fitz.open(pdf_path)
+        document = fitz.open(stream=source.view, filetype="pdf")
     except Exception:
-        shutil.rmtree(temp_dir, ignore_errors=True)
         return None
 
-    repaired_path = temp_dir / pdf_path.name
-
     try:
-        document.save(
-            repaired_path.as_posix(),
-            clean=True,
-            garbage=4,
-            deflate=True,
-        )
+        return document.tobytes(clean=True, garbage=4, deflate=True)
     except Exception:
-        document.close()
-        shutil.rmtree(temp_dir, ignore_errors=True)
         return None
-
-    document.close()
-
-    def cleanup() -> None:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-    return repaired_path, cleanup
+    finally:
+        document.close()
 
 
-def _create_pypdf_reader(pdf_path: Path) -> tuple[Any, list[str]]:
+def _create_pypdf_reader(stream: Path | BinaryIO) -> tuple[Any, list[str]]:
     """Instantiate ``PdfReader`` while capturing diagnostic warnings."""
 
     if PdfReader is None:
         raise RuntimeError("PdfReader dependency is not available")
 
     with _capture_pypdf_warnings() as captured_warnings:
-        reader = PdfReader(pdf_path)
+        reader = PdfReader(stream)
 
     return reader, list(captured_warnings)
 
@@ -188,6 +204,8 @@ def _log(message: str) -> None:
 class ExtractionResult:
     text: str
     notes: list[str]
+    # Manifest digest of the bytes the extractor read, when it mapped the source.
+    digest: str | None = None
 
 
 @dataclass
@@ -281,7 +299,7 @@ def _ensure_pymupdf_available() -> bool:
     return True
 
 
-def _load_pdf_image_extractor() -> Callable[[Path, Path], list[tuple[int, str]]] | None:
+def _load_pdf_image_extractor() -> Callable[..., list[tuple[int, str]]] | None:
     """Return the pdf_image_extractor callable when available."""
 
     try:
@@ -315,49 +333,184 @@ def _normalise_whitespace(text: str) -> str:
     return cleaned.strip()
 
 
-def _collect_page_image_references(pdf_path: Path) -> dict[int, list[str]]:
-    """Return ordered image references for each page of ``pdf_path``."""
+_FALLBACK_IMAGE_PATTERN = re.compile(
+    r"^(?:(?P<prefix>.+)_)?page_(?P<page>\d{3,})"
+    r"(?:_?img[_-]?(?P<index>\d{1,3}))?\.(?P<ext>png|jpe?g|gif)"
+    r"(?P<encoding>\.base64|\.b64)?$",
+    re.IGNORECASE,
+)
+_FALLBACK_COPY_WORKERS = 4
+
 
-    images_dir = pdf_path.with_name(f"{pdf_path.stem}-images")
-    if not images_dir.exists():
-        return {}
+@dataclass(frozen=True)
+class _FallbackImage:
+    path: Path
+    page: int
+    index: int | None
+    extension: str
+    encoded: bool
+    prefixed: bool
 
-    pattern = re.compile(
-        rf"^{re.escape(pdf_path.stem)}_page_(?P<page>\d{{3}})"
-        rf"(?:_?img[_-]?(?P<img>\d{{1,3}}))?\.png$",
-        re.IGNORECASE,
-    )
-    grouped: dict[int, list[tuple[tuple[int, int], Path]]] = defaultdict(list)
 
-    for image_path in sorted(images_dir.iterdir()):
-        if not image_path.is_file() or image_path.suffix.lower() != ".png":
-            continue
-        match = pattern.match(image_path.name)
-        if not match:
-            continue
-        page_number = int(match.group("page"))
-        image_index = match.group("img")
-        order_key = (0, 0) if image_index is None else (1, int(image_index))
-        grouped[page_number].append((order_key, image_path))
-
-    references: dict[int, list[str]] = {}
-    for page_number, entries in grouped.items():
-        ordered_paths = [path for _, path in sorted(entries, key=lambda item: item[0])]
-        references[page_number] = []
-        for image_path in ordered_paths:
-            try:
-                relative_path = image_path.relative_to(ROOT)
-            except ValueError:
-                relative_path = image_path
-            references[page_number].append(relative_path.as_posix())
+@dataclass(frozen=True)
+class _PendingCopy:
+    source: _FallbackImage
+    destination: Path
+    reference: str
+
+
+def _relative_to_root(path: Path) -> str:
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:  # pragma: no cover - unexpected outside repo
+        return path.as_posix()
+
+
+def _write_fallback_image(source: _FallbackImage, destination: Path) -> bool:
+    try:
+        if source.encoded:
+            binary = base64.b64decode(source.path.read_text(encoding="utf-8").strip(), validate=True)
+            destination.write_bytes(binary)
+        else:
+            shutil.copy2(source.path, destination)
+    except (OSError, binascii.Error, ValueError):
+        return False
+    return True
 
-    return references
+
+class FallbackImageIndex:
+    """Page images shipped next to a PDF in ``<stem>-images/``.
+
+    The folder is scanned once, on first use, into an index keyed by page
+    number, so looking up the images of a page no longer lists the whole
+    folder.  Copies requested through :meth:`plan_page` are queued and written
+    together by :meth:`write_pending`, which decodes the ``.base64``/``.b64``
+    variants in a small thread pool.
+    """
+
+    def __init__(self, pdf_path: Path) -> None:
+        self.pdf_path = pdf_path
+        self.directory = pdf_path.parent / f"{pdf_path.stem}-images"
+        self._pages: dict[int, list[_FallbackImage]] | None = None
+        self._pending: list[_PendingCopy] = []
+
+    @property
+    def pages(self) -> dict[int, list[_FallbackImage]]:
+        if self._pages is None:
+            self._pages = self._scan()
+        return self._pages
+
+    def _scan(self) -> dict[int, list[_FallbackImage]]:
+        pages: dict[int, list[_FallbackImage]] = defaultdict(list)
+        try:
+            entries = sorted(os.scandir(self.directory), key=lambda entry: entry.name)
+        except OSError:
+            return {}
+        stem = self.pdf_path.stem.lower()
+        for entry in entries:
+            match = _FALLBACK_IMAGE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            prefix = match.group("prefix")
+            if prefix is not None and prefix.lower() != stem:
+                continue
+            digits = match.group("page")
+            page_number = int(digits)
+            if digits != f"{page_number:03d}":
+                continue
+            raw_index = match.group("index")
+            pages[page_number].append(
+                _FallbackImage(
+                    path=Path(entry.path),
+                    page=page_number,
+                    index=int(raw_index) if raw_index is not None else None,
+                    extension=match.group("ext").lower(),
+                    encoded=match.group("encoding") is not None,
+                    prefixed=prefix is not None,
+                )
+            )
+        return dict(pages)
+
+    def references(self) -> dict[int, list[str]]:
+        """Ordered ``<stem>_page_NNN[_imgK].png`` references for each page, used in place."""
+
+        references: dict[int, list[str]] = {}
+        for page_number, images in self.pages.items():
+            usable = [
+                image
+                for image in images
+                if image.prefixed and image.extension == "png" and not image.encoded and page_number < 1000
+            ]
+            if usable:
+                usable.sort(key=lambda image: (0, 0) if image.index is None else (1, image.index))
+                references[page_number] = [_relative_to_root(image.path) for image in usable]
+        return references
+
+    def plan_page(self, page_number: int, target_dir: Path) -> tuple[list[str], list[ImageMetadata]]:
+        """Queue the copies of one page's images into ``target_dir`` and return their references."""
+
+        references: list[str] = []
+        metadata: list[ImageMetadata] = []
+        for image in self.pages.get(page_number, ()):
+            image_index = image.index if image.index is not None else 1
+            destination = target_dir / f"page_{page_number:03d}_img_{image_index:03d}.{image.extension}"
+            reference = _relative_to_root(destination)
+            self._pending.append(_PendingCopy(image, destination, reference))
+            references.append(reference)
+            metadata.append(
+                ImageMetadata(
+                    path=reference,
+                    page=page_number,
+                    index=image_index,
+                    width=None,
+                    height=None,
+                    color_space=None,
+                )
+            )
+        return references, metadata
+
+    def write_pending(self) -> list[_PendingCopy]:
+        """Write every queued copy and return the ones that failed."""
+
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        # Copies sharing a destination run in order within one job, so the
+        # last readable source wins exactly as with sequential copies.
+        by_destination: dict[Path, list[_PendingCopy]] = defaultdict(list)
+        for copy in pending:
+            by_destination[copy.destination].append(copy)
+        for destination in by_destination:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+
+        def write_group(copies: list[_PendingCopy]) -> list[_PendingCopy]:
+            return [copy for copy in copies if not _write_fallback_image(copy.source, copy.destination)]
+
+        groups = list(by_destination.values())
+        if len(groups) == 1:
+            return write_group(groups[0])
+        with ThreadPoolExecutor(max_workers=min(_FALLBACK_COPY_WORKERS, len(groups))) as pool:
+            return [copy for failures in pool.map(write_group, groups) for copy in failures]
+
+    def flush(self, page_references: dict[int, list[str]], metadata: list[ImageMetadata]) -> None:
+        """:meth:`write_pending` and drop the references of copies that failed."""
+
+        for copy in self.write_pending():
+            page = copy.source.page
+            with contextlib.suppress(ValueError):
+                page_references.get(page, []).remove(copy.reference)
+            if page in page_references and not page_references[page]:
+                del page_references[page]
+            for position, entry in enumerate(metadata):
+                if entry.path == copy.reference and entry.page == page:
+                    del metadata[position]
+                    break
 
 
 def _resolve_public_asset_dir(pdf_path: Path) -> Path:
     try:
         relative = pdf_path.relative_to(SUBJECTS_DIR)
-        target = relative.with_suffix("")
+        target = Path(asset_relative_path(relative.as_posix()))
     except ValueError:  # pragma: no cover - fallback for unexpected locations
         target = Path(pdf_path.stem)
     return PUBLIC_ASSETS_DIR / target
@@ -370,7 +523,11 @@ def _cleanup_empty_dir(path: Path) -> None:
 
 
 def _extract_images_with_pypdf(
-    pdf_path: Path, target_dir: Path, pdf_reader: Any | None = None
+    pdf_path: Path,
+    target_dir: Path,
+    pdf_reader: Any | None = None,
+    fallback_images: FallbackImageIndex | None = None,
+    source: SourceBuffer | None = None,
 ) -> tuple[dict[int, list[str]], list[ImageMetadata]]:
     reader = pdf_reader
     close_reader = False
@@ -379,22 +536,25 @@ def _extract_images_with_pypdf(
         if PdfReader is None and not _ensure_pypdf_available():
             return {}, []
         try:
-            reader = PdfReader(pdf_path)
+            reader = PdfReader(source.stream() if source is not None else pdf_path)
         except Exception:  # pragma: no cover - defensive guard
             return {}, []
         close_reader = True
 
     target_dir.mkdir(parents=True, exist_ok=True)
+    if fallback_images is None:
+        fallback_images = FallbackImageIndex(pdf_path)
 
     page_references: dict[int, list[str]] = defaultdict(list)
     metadata: list[ImageMetadata] = []
 
     try:
         for page_index, page in enumerate(reader.pages, start=1):
-            images, page_metadata = _store_page_images(page, page_index, target_dir, pdf_path)
+            images, page_metadata = _store_page_images(page, page_index, target_dir, fallback_images)
             if images:
                 page_references[page_index].extend(images)
             metadata.extend(page_metadata)
+        fallback_images.flush(page_references, metadata)
     finally:
         if close_reader:
             closer = getattr(reader, "close", None)
@@ -409,7 +569,7 @@ def _extract_images_with_pypdf(
 
 
 def _extract_images_to_public_assets(
-    pdf_path: Path, pdf_reader: Any | None = None
+    pdf_path: Path, pdf_reader: Any | None = None, source: SourceBuffer | None = None
 ) -> tuple[dict[int, list[str]], list[ImageMetadata]]:
     target_dir = _resolve_public_asset_dir(pdf_path)
     if target_dir.exists():
@@ -418,10 +578,11 @@ def _extract_images_to_public_assets(
 
     extract_pdf_images = _load_pdf_image_extractor()
     if extract_pdf_images is None:
-        page_refs, metadata = _extract_images_with_pypdf(pdf_path, target_dir, pdf_reader)
+        fallback_images = FallbackImageIndex(pdf_path)
+        page_refs, metadata = _extract_images_with_pypdf(pdf_path, target_dir, pdf_reader, fallback_images, source)
         if page_refs:
             return page_refs, metadata
-        fallback_refs = _collect_page_image_references(pdf_path)
+        fallback_refs = fallback_images.references()
         if not metadata:
             _cleanup_empty_dir(target_dir)
         return fallback_refs, metadata
@@ -435,7 +596,7 @@ def _extract_images_to_public_assets(
         stderr_buffer
     ):
         try:
-            raw_metadata = extract_pdf_images(pdf_path, target_dir)
+            raw_metadata = extract_pdf_images(pdf_path, target_dir, data=source.view if source is not None else None)
         except Exception:  # pragma: no cover - extraction robustness
             _relay_extractor_output(stdout_buffer.getvalue(), stderr_buffer.getvalue())
             _cleanup_empty_dir(target_dir)
@@ -490,70 +651,8 @@ def _initialise_image_output_dir(base_dir: Path, pdf_path: Path) -> Path:
     return target_dir
 
 
-def _copy_fallback_page_images(
-    pdf_path: Path, page_number: int, target_dir: Path
-) -> tuple[list[str], list[ImageMetadata]]:
-    fallback_dir = pdf_path.parent / f"{pdf_path.stem}-images"
-    if not fallback_dir.exists():
-        return [], []
-
-    pattern = re.compile(
-        rf"^(?:{re.escape(pdf_path.stem)}_)?page_{page_number:03d}"
-        rf"(?:_?img[_-]?(?P<index>\d{{1,3}}))?\.(?P<ext>png|jpe?g|gif)"
-        rf"(?P<encoding>\.base64|\.b64)?$",
-        re.IGNORECASE,
-    )
-    references: list[str] = []
-    metadata: list[ImageMetadata] = []
-
-    for source in sorted(fallback_dir.iterdir()):
-        if not source.is_file():
-            continue
-
-        match = pattern.match(source.name)
-        if not match:
-            continue
-
-        raw_index = match.group("index")
-        image_index = int(raw_index) if raw_index is not None else 1
-        extension = match.group("ext").lower()
-        encoded_suffix = match.group("encoding") or ""
-        destination = target_dir / f"page_{page_number:03d}_img_{image_index:03d}.{extension}"
-        destination.parent.mkdir(parents=True, exist_ok=True)
-
-        try:
-            if encoded_suffix:
-                raw_data = source.read_text(encoding="utf-8").strip()
-                binary = base64.b64decode(raw_data, validate=True)
-                with destination.open("wb") as handle:
-                    handle.write(binary)
-            else:
-                shutil.copy2(source, destination)
-        except (OSError, binascii.Error, ValueError):
-            continue
-
-        try:
-            relative_path = destination.relative_to(ROOT)
-        except ValueError:  # pragma: no cover - unexpected outside repo
-            relative_path = destination
-
-        references.append(relative_path.as_posix())
-        metadata.append(
-            ImageMetadata(
-                path=relative_path.as_posix(),
-                page=page_number,
-                index=image_index,
-                width=None,
-                height=None,
-                color_space=None,
-            )
-        )
-
-    return references, metadata
-
-
 def _store_page_images(
-    page, page_number: int, target_dir: Path, pdf_path: Path
+    page, page_number: int, target_dir: Path, fallback_images: FallbackImageIndex
 ) -> tuple[list[str], list[ImageMetadata]]:
     references: list[str] = []
     metadata: list[ImageMetadata] = []
@@ -563,7 +662,7 @@ def _store_page_images(
         images_iterable = []
 
     if not images_iterable:
-        return _copy_fallback_page_images(pdf_path, page_number, target_dir)
+        return fallback_images.plan_page(page_number, target_dir)
 
     for image_index, image in enumerate(images_iterable, start=1):
         extension = getattr(image, "ext", None) or getattr(image, "extension", None) or "png"
@@ -597,8 +696,15 @@ def _store_page_images(
     return references, metadata
 
 
+def _page_figure_lines(page_number: int, images: Sequence[str]) -> list[str]:
+    return [
+        f"![Page {page_number}, Figure {figure_index}]({_format_markdown_image_path(image_path)})"
+        for figure_index, image_path in enumerate(images, start=1)
+    ]
+
+
 def _extract_pdf_with_optional_images(
-    path: Path, *, image_output_dir: Path | None = None
+    path: Path, *, image_output_dir: Path | None = None, defer_images: bool = False
 ) -> tuple[ExtractionResult, list[ImageMetadata]]:
     if PdfReader is None and not _ensure_pypdf_available():
         notes = [
@@ -624,15 +730,18 @@ def _extract_pdf_with_optional_images(
         )
 
     reader: Any | None = None
-    cleanup_reader: Callable[[], None] | None = None
+    # pypdf, the repair, the figure extractor and the manifest digest all read
+    # this one mapping.
+    source = SourceBuffer(path)
 
     try:
-        reader, captured_warnings = _create_pypdf_reader(path)
+        digest = source.digest()
+        reader, captured_warnings = _create_pypdf_reader(source.stream())
         needs_repair = any("wrong pointing object" in warning.lower() for warning in captured_warnings)
 
         if needs_repair:
-            repair_result = _repair_pdf_with_pymupdf(path)
-            if repair_result is not None:
+            repaired = _repair_pdf_with_pymupdf(source)
+            if repaired is not None:
                 _log(
                     f"Detected broken cross-reference entries in {path}; rebuilt a clean copy before extraction."
                 )
@@ -640,8 +749,7 @@ def _extract_pdf_with_optional_images(
                 if callable(closer):
                     with contextlib.suppress(Exception):
                         closer()
-                repaired_path, cleanup_reader = repair_result
-                reader, captured_warnings = _create_pypdf_reader(repaired_path)
+                reader, captured_warnings = _create_pypdf_reader(BytesIO(repaired))
                 if any("wrong pointing object" in warning.lower() for warning in captured_warnings):
                     _log(
                         f"PyPDF still reported cross-reference issues for {path} after repair; proceeding with cleaned copy."
@@ -654,31 +762,42 @@ def _extract_pdf_with_optional_images(
         pieces: list[str] = []
         metadata: list[ImageMetadata] = []
 
-        if image_output_dir is None:
-            page_images, collected_metadata = _extract_images_to_public_assets(path, pdf_reader=reader)
+        if defer_images:
+            # Text-first mode: figures are backfilled later by _backfill_pdf_figures.
+            page_images = {}
+            target_dir = None
+        elif image_output_dir is None:
+            page_images, collected_metadata = _extract_images_to_public_assets(path, pdf_reader=reader, source=source)
             metadata.extend(collected_metadata)
             target_dir: Path | None = None
         else:
             target_dir = _initialise_image_output_dir(image_output_dir, path)
             page_images = {}
 
+        fallback_images = FallbackImageIndex(path)
+        page_entries: list[tuple[int, str, list[str]]] = []
         for index, page in enumerate(reader.pages, start=1):
             text = (page.extract_text() or "").strip()
             if target_dir is not None:
-                images, page_metadata = _store_page_images(page, index, target_dir, path)
+                images, page_metadata = _store_page_images(page, index, target_dir, fallback_images)
                 metadata.extend(page_metadata)
             else:
                 images = page_images.get(index, [])
-            if not text and not images:
+            page_entries.append((index, text, images))
+        # Fallback page images are written in one batch; failed copies are
+        # removed from the page lists in place.
+        fallback_images.flush({index: images for index, _, images in page_entries}, metadata)
+
+        for index, text, images in page_entries:
+            if not text and not images and not defer_images:
                 continue
 
             page_lines = [f"### Page {index}"]
             if text:
                 page_lines.append(text)
-            for figure_index, image_path in enumerate(images, start=1):
-                page_lines.append(
-                    f"![Page {index}, Figure {figure_index}]({_format_markdown_image_path(image_path)})"
-                )
+            page_lines.extend(_page_figure_lines(index, images))
+            if defer_images:
+                page_lines.append(_FIGURE_PLACEHOLDER.format(page=index))
 
             pieces.append("\n".join(page_lines))
 
@@ -687,18 +806,18 @@ def _extract_pdf_with_optional_images(
                 ExtractionResult(
                     "[No text content extracted]",
                     ["PDF parser returned no text; file may be scanned images."],
+                    digest,
                 ),
                 metadata,
             )
 
-        return ExtractionResult("\n\n".join(pieces), []), metadata
+        return ExtractionResult("\n\n".join(pieces), [], digest), metadata
     finally:
         closer = getattr(reader, "close", None)
         if callable(closer):
             with contextlib.suppress(Exception):
                 closer()
-        if cleanup_reader is not None:
-            cleanup_reader()
+        source.close()
 
 
 def extract_pdf(path: Path, *, image_output_dir: Path | None = None) -> ExtractionResult:
@@ -706,21 +825,42 @@ def extract_pdf(path: Path, *, image_output_dir: Path | None = None) -> Extracti
     return result
 
 
+def _backfill_pdf_figures(path: Path) -> dict[int, list[str]]:
+    """Extract the figures of a text-first PDF extract into the asset store."""
+
+    with SourceBuffer(path) as source:
+        page_images, _ = _extract_images_to_public_assets(path, source=source)
+    return dict(page_images)
+
+
+def _fill_figure_placeholders(text: str, page_images: dict[int, list[str]]) -> str:
+    """Swap each page's placeholder for its figures and drop pages left empty."""
+
+    def substitute(match: re.Match[str]) -> str:
+        page_number = int(match.group(1))
+        return "\n".join(_page_figure_lines(page_number, page_images.get(page_number, [])))
+
+    patched = _FIGURE_PLACEHOLDER_PATTERN.sub(substitute, text)
+    pages = [piece.strip("\n") for piece in re.split(r"\n(?=### Page \d+\n)", patched)]
+    return "\n\n".join(page for page in pages if page and not _EMPTY_PAGE_PATTERN.fullmatch(page))
+
+
 def extract_ipynb(path: Path) -> ExtractionResult:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    parts: list[str] = []
-    for index, cell in enumerate(data.get("cells", []), start=1):
-        cell_type = cell.get("cell_type", "unknown")
-        header = f"### Cell {index} · {cell_type.title()}"
-        source = "".join(cell.get("source", []))
-        if cell_type == "code":
-            source = source.rstrip()
-            parts.append(f"{header}\n```python\n{source}\n```")
-        else:
-            parts.append(f"{header}\n{source}")
-    if not parts:
-        return ExtractionResult("[Notebook contains no cells]", [])
-    return ExtractionResult("\n\n".join(parts), [])
+    figures = FigureStore(_fresh_asset_dir(path), _public_asset_link)
+    limits = _subject_limits(path, SUBJECT_NOTEBOOK_LIMITS, DEFAULT_NOTEBOOK_LIMITS)
+    buffer = StringIO()
+    summary = write_notebook(path, buffer, limits, figures)
+    _cleanup_empty_dir(figures.directory)
+    notes: list[str] = []
+    if summary.truncated_cells:
+        notes.append(
+            f"Output of {summary.truncated_cells} cell(s) truncated to {limits.max_output_bytes} bytes per cell."
+        )
+    if summary.invalid_figures:
+        notes.append(f"Skipped {summary.invalid_figures} image output(s) with invalid base64 data.")
+    if not summary.cells:
+        return ExtractionResult("[Notebook contains no cells]", notes)
+    return ExtractionResult(buffer.getvalue(), notes)
 
 
 def extract_text_file(path: Path) -> ExtractionResult:
@@ -732,13 +872,14 @@ def extract_url(path: Path) -> ExtractionResult:
     return ExtractionResult(content.strip(), [])
 
 
-def extract_presentation(path: Path) -> ExtractionResult:
-    if Presentation is None:
+def _extract_presentation_with_python_pptx(path: Path) -> ExtractionResult:
+    try:  # pragma: no cover - optional dependency may be missing in CI environments
+        from pptx import Presentation  # type: ignore
+    except ImportError as import_error:  # pragma: no cover - fallback when dependency absent
         notes = [
             "python-pptx is not installed; PPTX/PPSX content was not extracted.",
+            f"Import error: {import_error}",
         ]
-        if PPTX_IMPORT_ERROR is not None:
-            notes.append(f"Import error: {PPTX_IMPORT_ERROR}")
         return ExtractionResult("[Presentation extraction requires python-pptx to be installed]", notes)
 
     presentation = Presentation(path)
@@ -765,25 +906,66 @@ def extract_presentation(path: Path) -> ExtractionResult:
     return ExtractionResult("\n\n".join(pieces), [])
 
 
+def _fresh_asset_dir(path: Path) -> Path:
+    target_dir = _resolve_public_asset_dir(path)
+    if target_dir.exists():
+        shutil.rmtree(target_dir)
+    return target_dir
+
+
+def _public_asset_link(asset: Path) -> str:
+    return _format_markdown_image_path(asset.relative_to(ROOT).as_posix())
+
+
+def _ooxml_media_store(path: Path) -> MediaStore:
+    return MediaStore(_fresh_asset_dir(path), _public_asset_link)
+
+
+def _ooxml_media_notes(media: MediaStore) -> list[str]:
+    _cleanup_empty_dir(media.directory)
+    if not media.skipped:
+        return []
+    formats = ", ".join(sorted({Path(part).suffix.lstrip(".").lower() for part in media.skipped}))
+    return [f"Skipped {len(media.skipped)} embedded image(s) in formats browsers cannot display ({formats})."]
+
+
+def extract_presentation(path: Path) -> ExtractionResult:
+    media = _ooxml_media_store(path)
+    try:
+        text = read_presentation_text(path, media)
+    except OOXMLPackageError as error:
+        _log(f"Streaming OOXML reader could not parse {path.name} ({error}); falling back to python-pptx.")
+        shutil.rmtree(media.directory, ignore_errors=True)
+        return _extract_presentation_with_python_pptx(path)
+    notes = _ooxml_media_notes(media)
+    if not text:
+        return ExtractionResult("[No text content extracted from presentation]", notes)
+    return ExtractionResult(text, notes)
+
+
+def _subject_limits(path: Path, overrides: dict[str, Any], default: Any) -> Any:
+    try:
+        subject = path.relative_to(SUBJECTS_DIR).parts[0]
+    except (ValueError, IndexError):
+        return default
+    return overrides.get(subject, default)
+
+
+def _sheet_limits_for(path: Path) -> SheetLimits:
+    return _subject_limits(path, SUBJECT_SHEET_LIMITS, DEFAULT_SHEET_LIMITS)
+
+
 def extract_excel_xlsx(path: Path) -> ExtractionResult:
-    if load_workbook is None:
+    if spreadsheet_extract.load_workbook is None:
         notes = [
             "openpyxl is not installed; XLSX content was not extracted.",
         ]
-        if OPENPYXL_IMPORT_ERROR is not None:
-            notes.append(f"Import error: {OPENPYXL_IMPORT_ERROR}")
+        if spreadsheet_extract.OPENPYXL_IMPORT_ERROR is not None:
+            notes.append(f"Import error: {spreadsheet_extract.OPENPYXL_IMPORT_ERROR}")
         return ExtractionResult("[XLSX extraction requires openpyxl to be installed]", notes)
 
-    workbook = load_workbook(path, data_only=True, read_only=True)
     buffer = StringIO()
-    for sheet in workbook.worksheets:
-        buffer.write(f"### Sheet: {sheet.title}\n")
-        for row in sheet.iter_rows(values_only=True):
-            values = ["" if value is None else str(value) for value in row]
-            if any(value.strip() for value in values):
-                buffer.write("\t".join(values))
-                buffer.write("\n")
-        buffer.write("\n")
+    spreadsheet_extract.write_xlsx(path, buffer, _sheet_limits_for(path))
     text = buffer.getvalue().strip()
     if not text:
         return ExtractionResult("[No cell content extracted from workbook]", [])
@@ -791,38 +973,30 @@ def extract_excel_xlsx(path: Path) -> ExtractionResult:
 
 
 def extract_excel_xls(path: Path) -> ExtractionResult:
-    if xlrd is None:
+    if spreadsheet_extract.xlrd is None:
         notes = [
             "xlrd is not installed; XLS content was not extracted.",
         ]
-        if XLRD_IMPORT_ERROR is not None:
-            notes.append(f"Import error: {XLRD_IMPORT_ERROR}")
+        if spreadsheet_extract.XLRD_IMPORT_ERROR is not None:
+            notes.append(f"Import error: {spreadsheet_extract.XLRD_IMPORT_ERROR}")
         return ExtractionResult("[XLS extraction requires xlrd to be installed]", notes)
 
-    workbook = xlrd.open_workbook(path)
     buffer = StringIO()
-    for sheet in workbook.sheets():
-        buffer.write(f"### Sheet: {sheet.name}\n")
-        for row_index in range(sheet.nrows):
-            row_values = [sheet.cell_value(row_index, col_index) for col_index in range(sheet.ncols)]
-            formatted = ["" if value in ("", None) else str(value) for value in row_values]
-            if any(value.strip() for value in formatted):
-                buffer.write("\t".join(formatted))
-                buffer.write("\n")
-        buffer.write("\n")
+    spreadsheet_extract.write_xls(path, buffer, _sheet_limits_for(path))
     text = buffer.getvalue().strip()
     if not text:
         return ExtractionResult("[No cell content extracted from workbook]", [])
     return ExtractionResult(text, [])
 
 
-def extract_docx(path: Path) -> ExtractionResult:
-    if Document is None:
+def _extract_docx_with_python_docx(path: Path) -> ExtractionResult:
+    try:  # pragma: no cover - optional dependency may be missing in CI environments
+        from docx import Document  # type: ignore
+    except ImportError as import_error:  # pragma: no cover - fallback when dependency absent
         notes = [
             "python-docx is not installed; DOCX content was not extracted.",
+            f"Import error: {import_error}",
         ]
-        if DOCX_IMPORT_ERROR is not None:
-            notes.append(f"Import error: {DOCX_IMPORT_ERROR}")
         return ExtractionResult("[DOCX extraction requires python-docx to be installed]", notes)
 
     document = Document(path)
@@ -837,21 +1011,29 @@ def extract_docx(path: Path) -> ExtractionResult:
     return ExtractionResult("\n".join(parts), [])
 
 
+def extract_docx(path: Path) -> ExtractionResult:
+    media = _ooxml_media_store(path)
+    try:
+        text = read_docx_text(path, media)
+    except OOXMLPackageError as error:
+        _log(f"Streaming OOXML reader could not parse {path.name} ({error}); falling back to python-docx.")
+        shutil.rmtree(media.directory, ignore_errors=True)
+        return _extract_docx_with_python_docx(path)
+    notes = _ooxml_media_notes(media)
+    if not text:
+        return ExtractionResult("[No text extracted from document]", notes)
+    return ExtractionResult(text, notes)
+
+
 def extract_archimate(path: Path) -> ExtractionResult:
-    notes: list[str] = []
-    pieces: list[str] = []
     try:
-        with zipfile.ZipFile(path) as archive:
-            for name in sorted(archive.namelist()):
-                if not name.lower().endswith((".xml", ".txt")):
-                    continue
-                data = archive.read(name).decode("utf-8", errors="replace")
-                pieces.append(f"### {name}\n{data.strip()}")
-    except zipfile.BadZipFile:
-        notes.append("ArchiMate file is not a ZIP archive; storing binary notice instead.")
-    if not pieces:
-        return ExtractionResult("[No textual XML resources extracted]", notes)
-    return ExtractionResult("\n\n".join(pieces), notes)
+        listing = read_model(path)
+    except (ArchiMateModelError, zipfile.BadZipFile) as error:
+        return ExtractionResult(
+            "[No ArchiMate model content extracted]",
+            [f"ArchiMate model could not be parsed: {error}"],
+        )
+    return ExtractionResult(format_listing(listing), [])
 
 
 def extract_png(path: Path) -> ExtractionResult:
@@ -878,10 +1060,19 @@ EXTRACTORS: dict[str, Callable[[Path], ExtractionResult]] = {
 }
 
 
-def extract_file(path: Path) -> ExtractionResult:
+def _extract_pdf_text_first(path: Path) -> ExtractionResult:
+    result, _ = _extract_pdf_with_optional_images(path, defer_images=True)
+    return result
+
+
+def extract_file(path: Path, *, text_first: bool = False) -> ExtractionResult:
+    """Extract ``path``; ``text_first`` leaves figure placeholders in PDF extracts."""
+
     extractor = EXTRACTORS.get(path.suffix.lower())
     if extractor is None:
         return extract_generic(path)
+    if text_first and extractor is extract_pdf:
+        extractor = _extract_pdf_text_first
     try:
         return extractor(path)
     except Exception as error:  # noqa: BLE001 - pipeline must be resilient
@@ -891,6 +1082,10 @@ def extract_file(path: Path) -> ExtractionResult:
         )
 
 
+def extract_file_text_first(path: Path) -> ExtractionResult:
+    return extract_file(path, text_first=True)
+
+
 def build_header(relative_path: Path, notes: list[str]) -> str:
     header_lines = [
         "# Extracted content",
@@ -1017,35 +1212,423 @@ def _write_support_modules() -> None:
     )
 
 
-def _run_bulk_extraction() -> int:
+def _aborted_result(source: Path, reason: str) -> ExtractionResult:
+    """Describe a job the supervisor had to stop in place of its extract."""
+
+    if source.suffix.lower() in (".pdf", ".pptx", ".ppsx", ".docx"):
+        # Drop half-written figure assets so the extract never references them.
+        shutil.rmtree(_resolve_public_asset_dir(source), ignore_errors=True)
+    return ExtractionResult(
+        text=f"[Extraction aborted: {reason}]",
+        notes=[f"Extraction of {source.name} was aborted because the extractor {reason}."],
+    )
+
+
+def _write_extract(relative: Path, result: ExtractionResult, store: ExtractStore | None = None) -> str:
+    output_path = OUTPUT_DIR / extract_relative_path(relative.as_posix())
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    header = build_header(relative, result.notes)
+    text = _normalise_whitespace(result.text)
+    content = header + text
+    output_path.write_text(content + "\n", encoding="utf-8")
+    if store is not None:
+        store.upsert(relative.as_posix(), text, result.notes)
+    return content
+
+
+def _remove_outputs(relative: str) -> None:
+    """Delete the extract and figures of a source that no longer exists."""
+
+    extract = extract_relative_path(relative)
+    # Also drop the .br/.gz siblings written by scripts/precompress.py.
+    for path in (OUTPUT_DIR / extract, *(OUTPUT_DIR / f"{extract}{suffix}" for suffix in (".br", ".gz"))):
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+    _cleanup_empty_dir((OUTPUT_DIR / extract).parent)
+    shutil.rmtree(PUBLIC_ASSETS_DIR / asset_relative_path(relative), ignore_errors=True)
+
+
+def _has_fallback_images(source: Path) -> bool:
+    # Such PDFs read figures from their own folder, so copies elsewhere may differ.
+    return source.suffix.lower() == ".pdf" and (source.parent / f"{source.stem}-images").is_dir()
+
+
+def _link_tree(source_dir: Path, target_dir: Path) -> None:
+    """Mirror ``source_dir`` into ``target_dir`` with hard links, copying where linking fails."""
+
+    for source in [path for path in source_dir.rglob("*") if path.is_file()]:
+        target = target_dir / source.relative_to(source_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+
+def _materialise_duplicate(primary: str, duplicate: str, result: ExtractionResult) -> ExtractionResult:
+    """Reuse the extraction of ``primary`` for ``duplicate``, a byte-identical source."""
+
+    primary_assets = asset_relative_path(primary)
+    duplicate_assets = asset_relative_path(duplicate)
+    target_dir = PUBLIC_ASSETS_DIR / duplicate_assets
+    shutil.rmtree(target_dir, ignore_errors=True)
+    source_dir = PUBLIC_ASSETS_DIR / primary_assets
+    if source_dir.is_dir():
+        _link_tree(source_dir, target_dir)
+    text = result.text.replace(f"/subject-assets/{primary_assets}/", f"/subject-assets/{duplicate_assets}/")
+    return ExtractionResult(text, list(result.notes))
+
+
+def _write_duplicate_extracts(
+    primary: str,
+    duplicates: Sequence[str],
+    result: ExtractionResult,
+    stats: dict[str, SourceStat],
+    manifest: dict[str, dict],
+    previous: dict[str, dict],
+    *,
+    duration: float | None,
+    assets_pending: bool = False,
+    store: ExtractStore | None = None,
+) -> None:
+    for duplicate in duplicates:
+        content = _write_extract(Path(duplicate), _materialise_duplicate(primary, duplicate, result), store)
+        # The primary's duration is kept so the cost model still sees what the file costs.
+        manifest[duplicate] = build_entry(
+            stats[duplicate],
+            SUBJECTS_DIR,
+            has_assets="/subject-assets/" in content,
+            previous=previous.get(duplicate),
+            duration=duration,
+            output_bytes=len(content.encode("utf-8")),
+            assets_pending=assets_pending,
+            digest=manifest[primary]["digest"],
+            peak_mb=manifest[primary].get("peak_mb"),
+            aborted=manifest[primary].get("aborted", False),
+        )
+
+
+_REPORTED_JOB_PEAKS = 10
+
+
+def _write_run_report(report: dict[str, Any]) -> None:
+    """Record the last bulk run's scheduling figures in ``RUN_REPORT_PATH``."""
+
+    report = {"finishedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **report}
+    RUN_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    RUN_REPORT_PATH.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def _learned_measurements(
+    profile: ProfileSettings | None,
+    key: str,
+    previous: dict | None,
+    duration: float | None,
+    peak_mb: float | None,
+) -> tuple[float | None, float | None]:
+    """Return the duration and peak the manifest should keep for ``key``.
+
+    cProfile and tracemalloc inflate both, so a profiled job keeps the figures
+    of its previous run and later schedules are not skewed by profiling.
+    """
+
+    if profile is not None and profile.wants(key):
+        previous = previous or {}
+        return previous.get("duration"), previous.get("peak_mb")
+    return duration, peak_mb
+
+
+def _run_bulk_extraction(
+    budget: WorkerBudget | None = None,
+    *,
+    text_first: bool = False,
+    scope: SourceScope | None = None,
+    store: ExtractStore | None = None,
+    profile: ProfileSettings | None = None,
+) -> int:
     if not SUBJECTS_DIR.exists():
         print("Subjects directory not found.", file=sys.stderr)
         return 1
 
-    if OUTPUT_DIR.exists():
-        shutil.rmtree(OUTPUT_DIR)
+    if budget is None:
+        budget = WorkerBudget()
+    previous_manifest = load_manifest(MANIFEST_PATH)
+
+    if scope is None or scope.is_full:
+        if OUTPUT_DIR.exists():
+            shutil.rmtree(OUTPUT_DIR)
+        stats = {stat.relative: stat for stat in iter_source_stats(SUBJECTS_DIR)}
+        manifest: dict[str, dict] = {}
+        if store is not None:
+            store.prune(set(stats))
+    else:
+        # Partial run: outputs outside the scope, and their manifest entries,
+        # are left exactly as they are.
+        stats = {stat.relative: stat for stat in iter_scoped_stats(SUBJECTS_DIR, scope)}
+        manifest = {key: entry for key, entry in previous_manifest.items() if not scope.matches(key)}
+        removed = [key for key in previous_manifest if scope.matches(key) and key not in stats]
+        for key in removed:
+            _remove_outputs(key)
+        if store is not None:
+            store.remove(removed)
+        print(f"Partial run ({scope.describe()}): {len(stats)} source(s), {len(removed)} removed.")
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     _write_support_modules()
 
+    # Byte-identical copies of a source are extracted once and their outputs
+    # materialised from the first copy.  Only sources sharing a file name and
+    # size are hashed up front; every other digest comes back with the
+    # extraction (PDFs) or is taken from the manifest when written.
+    digests = {
+        stat.relative: source_digest(stat, SUBJECTS_DIR, previous_manifest.get(stat.relative))
+        for stat in possible_duplicates(stats.values())
+    }
+    duplicates = find_duplicate_sources(
+        {relative: digest for relative, digest in digests.items() if not _has_fallback_images(SUBJECTS_DIR / relative)}
+    )
+    duplicate_keys = {duplicate for members in duplicates.values() for duplicate in members}
+
+    # Dispatch the most expensive jobs first so a large PDF that sorts last
+    # alphabetically cannot leave the other workers idle at the end.
+    rates = learn_rates(previous_manifest)
+    costs = {
+        relative: estimate_cost(stat, previous_manifest.get(relative), rates, SUBJECTS_DIR)
+        for relative, stat in stats.items()
+    }
+    ordered = sorted(
+        (relative for relative in costs if relative not in duplicate_keys),
+        key=lambda relative: (-costs[relative], relative),
+    )
+    sources = [SUBJECTS_DIR / relative for relative in ordered]
+    workers = max(1, budget.jobs)
+    predicted = predict_makespan((costs[relative] for relative in ordered), workers)
+    lower_bound = makespan_lower_bound([costs[relative] for relative in ordered], workers)
+    # Jobs without a recorded duration are priced by the default rates, which
+    # are only a rough calibration; say so rather than pass them off as measured.
+    estimated = sum(1 for relative in ordered if not has_recorded_duration(previous_manifest.get(relative)))
+    if not estimated:
+        prediction_basis, prediction_label = "recorded", "predicted"
+    elif estimated == len(ordered):
+        prediction_basis, prediction_label = "cold-start", "predicted as a cold-start estimate"
+    else:
+        prediction_basis = "mixed"
+        prediction_label = f"predicted with {estimated} of {len(ordered)} job(s) estimated"
+    footprints: dict[Path, float] = {}
+    if budget.memory_budget_mb:
+        footprints = {
+            SUBJECTS_DIR / relative: estimate_footprint(stats[relative], previous_manifest.get(relative), SUBJECTS_DIR)
+            for relative in ordered
+        }
+    pool_stats = PoolStats()
+
     written = 0
-    for source in sorted(SUBJECTS_DIR.rglob("*")):
-        if not source.is_file():
-            continue
-        relative = source.relative_to(SUBJECTS_DIR)
-        output_path = OUTPUT_DIR / relative.with_suffix(".txt")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        result = extract_file(source)
-        header = build_header(relative, result.notes)
-        content = header + _normalise_whitespace(result.text)
-        output_path.write_text(content + "\n", encoding="utf-8")
+    aborted = 0
+    deferred: dict[str, ExtractionResult] = {}
+    job_peaks: dict[str, float] = {}
+    started = time.perf_counter()
+    task = profile_task(extract_file_text_first if text_first else extract_file, "extract", profile, SUBJECTS_DIR)
+    for outcome in run_supervised(
+        sources, task, budget, footprint=lambda source: footprints.get(source, 0.0), stats=pool_stats
+    ):
+        relative = outcome.source.relative_to(SUBJECTS_DIR)
+        if outcome.aborted is not None:
+            _log(f"Aborted {relative} after {outcome.elapsed:.1f}s: the extractor {outcome.aborted}.")
+            result = _aborted_result(outcome.source, outcome.aborted)
+            aborted += 1
+        else:
+            result = outcome.value
+        content = _write_extract(relative, result, store)
+        key = relative.as_posix()
+        pending = text_first and _FIGURE_PLACEHOLDER_PATTERN.search(result.text) is not None
+        if pending:
+            deferred[key] = result
+        duration, peak_mb = _learned_measurements(
+            profile, key, previous_manifest.get(key), outcome.elapsed, outcome.footprint_mb
+        )
+        manifest[key] = build_entry(
+            stats[key],
+            SUBJECTS_DIR,
+            has_assets="/subject-assets/" in content,
+            previous=previous_manifest.get(key),
+            duration=duration,
+            output_bytes=len(content.encode("utf-8")),
+            assets_pending=pending,
+            digest=result.digest or digests.get(key),
+            peak_mb=peak_mb,
+            aborted=outcome.aborted is not None,
+        )
+        if outcome.footprint_mb is not None:
+            job_peaks[key] = outcome.footprint_mb
         written += 1
+        if key in duplicates:
+            _write_duplicate_extracts(
+                key,
+                duplicates[key],
+                result,
+                stats,
+                manifest,
+                previous_manifest,
+                duration=duration,
+                assets_pending=pending,
+                store=store,
+            )
+            written += len(duplicates[key])
+
+    if deferred:
+        save_manifest(MANIFEST_PATH, manifest)
+        print(
+            f"Text extracts ready after {time.perf_counter() - started:.1f}s; "
+            f"backfilling figures for {len(deferred)} PDF(s)."
+        )
+        aborted += _backfill_deferred_figures(
+            deferred,
+            stats,
+            manifest,
+            budget,
+            store,
+            profile,
+            duplicates,
+            footprint=lambda source: footprints.get(source, 0.0),
+            pool_stats=pool_stats,
+        )
+
+    actual = time.perf_counter() - started
 
+    save_manifest(MANIFEST_PATH, manifest)
     print(f"Extracted {written} files into {OUTPUT_DIR.relative_to(ROOT)}")
+    print(
+        f"Makespan: {actual:.1f}s actual, {predicted:.1f}s {prediction_label} "
+        f"(lower bound {lower_bound:.1f}s across {workers} worker(s))."
+    )
+    if duplicate_keys:
+        saved_bytes = sum(stats[key].size for key in duplicate_keys)
+        saved_seconds = sum(costs[key] for key in duplicate_keys)
+        print(
+            f"Deduplicated {len(duplicate_keys)} identical cop{'y' if len(duplicate_keys) == 1 else 'ies'} "
+            f"of {len(duplicates)} source(s): skipped {saved_bytes / (1024 * 1024):.1f} MiB of input "
+            f"and about {saved_seconds:.1f}s of extraction."
+        )
+    if budget.jobs > 0:
+        throttling = (
+            f"throttled {pool_stats.throttled} time(s) for {pool_stats.throttled_seconds:.1f}s"
+            if budget.memory_budget_mb
+            else "no memory budget"
+        )
+        print(
+            f"Worker pool: {pool_stats.admitted} job(s) admitted, up to {pool_stats.max_concurrency} concurrent, "
+            f"{throttling}, peak {pool_stats.peak_pool_mb:.0f} MiB."
+        )
+    if aborted:
+        print(f"{aborted} file(s) exceeded their extraction budget; see the notes in their extracts.")
+    _write_run_report(
+        {
+            "scope": "full" if scope is None or scope.is_full else scope.describe(),
+            "sources": len(stats),
+            "extracted": len(ordered),
+            "written": written,
+            "deduplicated": len(duplicate_keys),
+            "aborted": aborted,
+            "jobs": budget.jobs,
+            "memoryBudgetMiB": budget.memory_budget_mb,
+            "makespan": {
+                "actualSeconds": round(actual, 3),
+                "predictedSeconds": round(predicted, 3),
+                "predictionBasis": prediction_basis,
+                "estimatedJobs": estimated,
+                "lowerBoundSeconds": round(lower_bound, 3),
+            },
+            "pool": pool_stats.as_dict(),
+            "largestJobsMiB": {
+                key: round(peak, 1)
+                for key, peak in sorted(job_peaks.items(), key=lambda item: -item[1])[:_REPORTED_JOB_PEAKS]
+            },
+        }
+    )
+    if profile is not None:
+        summary = write_summary(profile.run_dir)
+        if summary is None:
+            print("Profiling was enabled but no source matched --profile-include.")
+        else:
+            print(f"Profiles written to {summary.parent}; see {summary.name} for the aggregated hot spots.")
     return 0
 
 
+def _backfill_deferred_figures(
+    deferred: dict[str, ExtractionResult],
+    stats: dict[str, SourceStat],
+    manifest: dict[str, dict],
+    budget: WorkerBudget,
+    store: ExtractStore | None = None,
+    profile: ProfileSettings | None = None,
+    duplicates: dict[str, list[str]] | None = None,
+    *,
+    footprint: Callable[[Path], float] | None = None,
+    pool_stats: PoolStats | None = None,
+) -> int:
+    """Extract figures for text-first PDF extracts and patch them in place.
+
+    Runs in lower-priority workers so the freshly written text stays usable
+    while the figures are produced.  Returns the number of aborted jobs.
+    """
+
+    backfill_budget = replace(budget, niceness=max(budget.niceness, 10))
+    sources = [SUBJECTS_DIR / key for key in deferred]
+    aborted = 0
+    task = profile_task(_backfill_pdf_figures, "figures", profile, SUBJECTS_DIR)
+    for outcome in run_supervised(sources, task, backfill_budget, footprint=footprint, stats=pool_stats):
+        relative = outcome.source.relative_to(SUBJECTS_DIR)
+        key = relative.as_posix()
+        result = deferred[key]
+        notes = list(result.notes)
+        page_images: dict[int, list[str]] = outcome.value or {}
+        if outcome.aborted is not None:
+            _log(
+                f"Aborted figure backfill for {relative} after {outcome.elapsed:.1f}s: "
+                f"the extractor {outcome.aborted}."
+            )
+            shutil.rmtree(_resolve_public_asset_dir(outcome.source), ignore_errors=True)
+            notes.append(
+                f"Figure extraction for {outcome.source.name} was aborted because the extractor {outcome.aborted}."
+            )
+            aborted += 1
+        text = _fill_figure_placeholders(result.text, page_images)
+        if not text:
+            text = "[No text content extracted]"
+            notes.append("PDF parser returned no text; file may be scanned images.")
+        content = _write_extract(relative, ExtractionResult(text, notes), store)
+        entry = manifest[key]
+        duration, peak_mb = _learned_measurements(
+            profile,
+            key,
+            entry,
+            entry.get("duration", 0.0) + outcome.elapsed,
+            max(filter(None, (entry.get("peak_mb"), outcome.footprint_mb)), default=None),
+        )
+        manifest[key] = build_entry(
+            stats[key],
+            SUBJECTS_DIR,
+            has_assets="/subject-assets/" in content,
+            previous=entry,
+            duration=duration,
+            output_bytes=len(content.encode("utf-8")),
+            peak_mb=peak_mb,
+            aborted=outcome.aborted is not None,
+        )
+        if duplicates and key in duplicates:
+            _write_duplicate_extracts(
+                key,
+                duplicates[key],
+                ExtractionResult(text, notes),
+                stats,
+                manifest,
+                manifest,
+                duration=manifest[key].get("duration"),
+                store=store,
+            )
+    return aborted
+
+
 def _extract_single_pdf(pdf_path: Path, images_dir: Path) -> int:
     extraction, metadata = _extract_pdf_with_optional_images(
         pdf_path, image_output_dir=images_dir
@@ -1080,6 +1663,82 @@ def main(argv: Sequence[str] | None = None) -> int:
             "--single-pdf."
         ),
     )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report stale extracts without extracting; exits with status 1 when work is needed",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of supervised worker processes (0 runs extractors in-process without budgets)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        help="Wall-clock budget in seconds for each file before its worker is killed (0 disables)",
+    )
+    parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        default=2048.0,
+        help="Resident memory ceiling in MiB for each worker before it is killed (0 disables)",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=0.0,
+        help=(
+            "Memory in MiB the whole worker pool may use; jobs are admitted by predicted footprint "
+            "and --jobs becomes the concurrency ceiling (0 keeps a fixed pool of --jobs workers)"
+        ),
+    )
+    parser.add_argument(
+        "--text-first",
+        action="store_true",
+        help=(
+            "Write PDF extracts with figure placeholders first, then backfill the figures "
+            "in lower-priority workers"
+        ),
+    )
+    parser.add_argument(
+        "--max-files-per-worker",
+        type=int,
+        default=25,
+        help="Recycle each worker process after this many files to contain native memory leaks",
+    )
+    parser.add_argument(
+        "--sqlite",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_STORE_PATH,
+        metavar="PATH",
+        help=(
+            "Also mirror the extracts into a SQLite/FTS5 database "
+            f"(default {DEFAULT_STORE_PATH.relative_to(ROOT)})"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=PROFILE_ROOT,
+        metavar="DIR",
+        help=(
+            "Profile every extraction job with cProfile and tracemalloc and write the results "
+            "and an aggregated summary.txt into DIR (default .cache/profiles/<timestamp>)"
+        ),
+    )
+    parser.add_argument(
+        "--profile-include",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Only profile sources whose path below subjects/ matches this glob (repeatable)",
+    )
+    add_scope_arguments(parser)
     args = parser.parse_args(argv)
 
     if args.single_pdf is not None and args.target is not None:
@@ -1087,6 +1746,11 @@ def main(argv: Sequence[str] | None = None) -> int:
 
     pdf_target = args.single_pdf or args.target
 
+    if args.check:
+        if pdf_target is not None:
+            parser.error("--check cannot be combined with single-PDF extraction.")
+        return check_main(SUBJECTS_DIR, OUTPUT_DIR, PUBLIC_ASSETS_DIR, MANIFEST_PATH)
+
     if pdf_target is not None:
         pdf_path: Path = pdf_target
         if not pdf_path.exists():
@@ -1095,7 +1759,34 @@ def main(argv: Sequence[str] | None = None) -> int:
         images_dir = args.images_dir or (SUBJECTS_DIR / "tmp-extracted-images")
         return _extract_single_pdf(pdf_path, images_dir)
 
-    return _run_bulk_extraction()
+    try:
+        scope = scope_from_args(args, SUBJECTS_DIR, load_manifest(MANIFEST_PATH))
+    except ValueError as error:
+        parser.error(str(error))
+
+    budget = WorkerBudget(
+        jobs=args.jobs,
+        timeout=args.timeout or None,
+        max_rss_mb=args.max_rss_mb or None,
+        max_files_per_worker=args.max_files_per_worker,
+        memory_budget_mb=args.memory_budget_mb or None,
+    )
+    profile = None
+    if args.profile is not None:
+        # Runs under the shared profile root get their own timestamped folder.
+        run_dir = new_run_dir(args.profile) if args.profile == PROFILE_ROOT else args.profile
+        profile = ProfileSettings(run_dir, tuple(args.profile_include))
+    elif args.profile_include:
+        parser.error("--profile-include requires --profile.")
+    if args.sqlite is None:
+        return _run_bulk_extraction(budget, text_first=args.text_first, scope=scope, profile=profile)
+    try:
+        store = ExtractStore(args.sqlite)
+    except ExtractStoreError as error:
+        print(error, file=sys.stderr)
+        return 2
+    with store:
+        return _run_bulk_extraction(budget, text_first=args.text_first, scope=scope, store=store, profile=profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""Cost model used to schedule extraction jobs longest-first.
+
+A full rebuild's makespan is dominated by the slowest few sources (large PDFs
+with hundreds of pages).  When those happen to be dispatched last, every other
+worker sits idle while they finish.  The bulk run therefore predicts the cost
+of every job and hands out the most expensive ones first (the classic LPT
+heuristic, which stays within 4/3 of the optimal makespan).
+
+Predictions come from the durations recorded in the extraction manifest on
+previous runs, scaled when a source's size has changed.  New sources fall back
+to a size-based estimate using per-type throughput learned from the manifest
+(or built-in defaults), and PDFs additionally use a cheap page count.  A run
+without recorded durations only has that estimate to go on, so its predicted
+makespan is reported as a cold-start estimate.
+
+:func:`estimate_footprint` does the same for memory: it predicts how many MiB
+a job adds to its worker, from the peak recorded on the previous run or from
+the file size and, for PDFs, the page and image counts.  The memory governor
+in ``extraction_workers`` admits jobs against those predictions.
+"""
+
+from __future__ import annotations
+
+import heapq
+import mmap
+import re
+from pathlib import Path
+from typing import Iterable
+
+from extract_manifest import SourceStat
+
+_MB = 1024 * 1024
+# Seconds per MiB for each source type, used until the manifest has recorded
+# durations to learn from.  Fitted on a full ``--jobs 3`` rebuild of the
+# current corpus (266s of recorded job time), so they include the slowdown of
+# workers sharing the CPU; PDFs are dominated by the page term below.
+_DEFAULT_SECONDS_PER_MB = {
+    ".pdf": 3.0,
+    ".pptx": 1.3,
+    ".ppsx": 1.3,
+    ".docx": 0.05,
+    ".xlsx": 0.4,
+    ".xls": 0.2,
+    ".ipynb": 0.15,
+    ".archimate": 1.5,
+}
+_FALLBACK_SECONDS_PER_MB = 0.02
+_SECONDS_PER_PDF_PAGE = 0.2
+_MIN_COST = 0.001
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_PDF_IMAGE_PATTERN = re.compile(rb"/Subtype\s*/Image(?![a-zA-Z])")
+# Rough MiB a worker grows by per MiB of input until a peak is recorded,
+# fitted (and rounded up) on the recorded peaks of the current corpus.
+_DEFAULT_MB_PER_MB = {
+    ".pdf": 12.0,
+    ".pptx": 4.0,
+    ".ppsx": 4.0,
+    ".docx": 4.0,
+    ".xlsx": 12.0,
+    ".xls": 6.0,
+    # Notebooks are streamed, so only the largest cell is held at a time.
+    ".ipynb": 0.5,
+}
+_FALLBACK_MB_PER_MB = 1.0
+_FOOTPRINT_BASE_MB = 4.0
+# PDFs add per-page text objects and snapshots plus one pixmap per image.
+_MB_PER_PDF_PAGE = 0.3
+_MB_PER_PDF_IMAGE = 0.3
+
+
+def learn_rates(recorded: dict[str, dict]) -> dict[str, float]:
+    """Return seconds per byte for each suffix with recorded durations."""
+
+    durations: dict[str, float] = {}
+    sizes: dict[str, int] = {}
+    for relative, entry in recorded.items():
+        duration = entry.get("duration")
+        size = entry.get("size")
+        if not isinstance(duration, (int, float)) or not isinstance(size, int) or size <= 0:
+            continue
+        suffix = Path(relative).suffix.lower()
+        durations[suffix] = durations.get(suffix, 0.0) + duration
+        sizes[suffix] = sizes.get(suffix, 0) + size
+    return {suffix: durations[suffix] / sizes[suffix] for suffix in durations}
+
+
+def _count_pdf_objects(path: Path, pattern: re.Pattern[bytes]) -> int | None:
+    try:
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            found = sum(1 for _ in pattern.finditer(data))
+    except (OSError, ValueError):
+        return None
+    return found or None
+
+
+def count_pdf_pages(path: Path) -> int | None:
+    """Count uncompressed page objects; ``None`` when they live in object streams."""
+
+    return _count_pdf_objects(path, _PDF_PAGE_PATTERN)
+
+
+def count_pdf_images(path: Path) -> int | None:
+    """Count uncompressed image XObjects; ``None`` when there are none to see."""
+
+    return _count_pdf_objects(path, _PDF_IMAGE_PATTERN)
+
+
+def has_recorded_duration(entry: dict | None) -> bool:
+    """Whether :func:`estimate_cost` can use a measured duration for ``entry``."""
+
+    return entry is not None and isinstance(entry.get("duration"), (int, float))
+
+
+def estimate_cost(
+    stat: SourceStat, entry: dict | None, rates: dict[str, float], subjects_dir: Path
+) -> float:
+    """Predict how many seconds extracting ``stat`` will take."""
+
+    if has_recorded_duration(entry):
+        duration = float(entry["duration"])
+        recorded_size = entry.get("size")
+        if isinstance(recorded_size, int) and recorded_size > 0 and recorded_size != stat.size:
+            duration *= stat.size / recorded_size
+        return max(duration, _MIN_COST)
+
+    suffix = Path(stat.relative).suffix.lower()
+    rate = rates.get(suffix)
+    if rate is None:
+        rate = _DEFAULT_SECONDS_PER_MB.get(suffix, _FALLBACK_SECONDS_PER_MB) / _MB
+    cost = stat.size * rate
+    if suffix == ".pdf":
+        pages = count_pdf_pages(subjects_dir / stat.relative)
+        if pages is not None:
+            cost = max(cost, pages * _SECONDS_PER_PDF_PAGE)
+    return max(cost, _MIN_COST)
+
+
+def estimate_footprint(stat: SourceStat, entry: dict | None, subjects_dir: Path) -> float:
+    """Predict how many MiB extracting ``stat`` adds to its worker."""
+
+    if entry is not None and isinstance(entry.get("peak_mb"), (int, float)):
+        footprint = float(entry["peak_mb"])
+        recorded_size = entry.get("size")
+        if isinstance(recorded_size, int) and recorded_size > 0 and recorded_size != stat.size:
+            footprint *= stat.size / recorded_size
+        return max(footprint, _FOOTPRINT_BASE_MB)
+
+    suffix = Path(stat.relative).suffix.lower()
+    footprint = _FOOTPRINT_BASE_MB + stat.size / _MB * _DEFAULT_MB_PER_MB.get(suffix, _FALLBACK_MB_PER_MB)
+    if suffix == ".pdf":
+        path = subjects_dir / stat.relative
+        footprint += (count_pdf_pages(path) or 0) * _MB_PER_PDF_PAGE
+        footprint += (count_pdf_images(path) or 0) * _MB_PER_PDF_IMAGE
+    return footprint
+
+
+def predict_makespan(costs: Iterable[float], workers: int) -> float:
+    """Simulate dispatching ``costs`` in order to the first idle worker."""
+
+    finish_times = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heapreplace(finish_times, finish_times[0] + cost)
+    return max(finish_times)
+
+
+def makespan_lower_bound(costs: list[float], workers: int) -> float:
+    if not costs:
+        return 0.0
+    return max(max(costs), sum(costs) / max(1, workers))
@@ -0,0 +1,196 @@
+"""Opt-in CPU and allocation profiling for extraction jobs.
+
+``extract_subject_texts.py --profile`` and ``pdf_image_extractor.py --profile``
+run each selected job under :mod:`cProfile` and :mod:`tracemalloc` and write,
+into one run directory (``.cache/profiles/<timestamp>`` by default):
+
+* ``<source>.<stage>.prof`` – the raw profile, readable with :mod:`pstats` or
+  snakeviz;
+* ``<source>.<stage>.json`` – wall time, peak traced memory and the source
+  lines that allocated the most memory still alive at the end of the job;
+* ``summary.txt`` – written by :func:`write_summary` once the run finishes:
+  the slowest jobs, internal time per package (pypdf, fitz, re, io, …) and the
+  top functions across every profile.
+
+Jobs run in supervised worker processes, so every worker writes its own files
+and the parent aggregates them at the end.  ``--profile-include`` limits
+profiling to matching sources.  Without ``--profile`` tasks are not wrapped at
+all, so profiling costs nothing when disabled.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import fnmatch
+import io
+import json
+import pstats
+import re
+import sysconfig
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+PROFILE_ROOT = ROOT / ".cache" / "profiles"
+SUMMARY_NAME = "summary.txt"
+_TOP_ALLOCATIONS = 15
+_TRACEBACK_FRAMES = 1
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+_STDLIB = Path(sysconfig.get_paths()["stdlib"]).resolve()
+
+
+@dataclass(frozen=True)
+class ProfileSettings:
+    run_dir: Path
+    include: tuple[str, ...] = ()
+    memory: bool = True
+
+    def wants(self, label: str) -> bool:
+        return not self.include or any(fnmatch.fnmatchcase(label, pattern) for pattern in self.include)
+
+
+def new_run_dir(base: Path = PROFILE_ROOT) -> Path:
+    run_dir = base / time.strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while run_dir.exists():
+        suffix += 1
+        run_dir = base / f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+    return run_dir
+
+
+def _record_stem(label: str, stage: str) -> str:
+    return f"{_UNSAFE.sub('_', label.replace('/', '__')).strip('_') or 'job'}.{stage}"
+
+
+def profile_call(settings: ProfileSettings, label: str, stage: str, function: Callable[..., Any], *args: Any) -> Any:
+    """Call ``function(*args)`` under the profilers and save what they recorded."""
+
+    settings.run_dir.mkdir(parents=True, exist_ok=True)
+    stem = _record_stem(label, stage)
+    trace_memory = settings.memory and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start(_TRACEBACK_FRAMES)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return function(*args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        record: dict[str, Any] = {"source": label, "stage": stage, "seconds": round(elapsed, 4)}
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            record["peakTracedMiB"] = round(peak / (1024 * 1024), 2)
+            record["topAllocations"] = [
+                {"where": str(statistic.traceback), "KiB": round(statistic.size / 1024, 1), "count": statistic.count}
+                for statistic in snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]
+            ]
+        profiler.dump_stats(settings.run_dir / f"{stem}.prof")
+        (settings.run_dir / f"{stem}.json").write_text(json.dumps(record, indent=2), encoding="utf-8")
+
+
+@dataclass(frozen=True)
+class ProfiledTask:
+    """Picklable wrapper that profiles the sources selected by ``settings``."""
+
+    task: Callable[[Path], Any]
+    stage: str
+    settings: ProfileSettings
+    subjects_dir: Path
+
+    def __call__(self, source: Path) -> Any:
+        try:
+            label = source.relative_to(self.subjects_dir).as_posix()
+        except ValueError:
+            label = source.name
+        if not self.settings.wants(label):
+            return self.task(source)
+        return profile_call(self.settings, label, self.stage, self.task, source)
+
+
+def profile_task(
+    task: Callable[[Path], Any], stage: str, settings: ProfileSettings | None, subjects_dir: Path
+) -> Callable[[Path], Any]:
+    """Return ``task`` itself when profiling is off, otherwise a profiling wrapper."""
+
+    if settings is None:
+        return task
+    return ProfiledTask(task, stage, settings, subjects_dir)
+
+
+def _package_of(filename: str, function: str) -> str:
+    """Bucket a profiled function by the package it belongs to."""
+
+    if filename == "~":
+        # Built-ins are reported as ``<built-in method zlib.decompress>`` or
+        # ``<method 'read' of '_io.BufferedReader' objects>``.
+        if "_io." in function or "io.open" in function or "posix." in function:
+            return "io"
+        if "_sre" in function or "re." in function:
+            return "re"
+        match = re.search(r"built-in method ([A-Za-z_]\w*)\.", function)
+        return match.group(1) if match else "builtins"
+    if filename.startswith("<frozen "):
+        # Frozen stdlib modules, e.g. ``<frozen posixpath>``.
+        return filename[len("<frozen ") : -1].partition(".")[0]
+    path = Path(filename)
+    parts = path.parts
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return Path(parts[index + 1]).stem
+    try:
+        relative = path.resolve().relative_to(_STDLIB)
+    except (OSError, ValueError):
+        return path.stem
+    return Path(relative.parts[0]).stem if relative.parts else path.stem
+
+
+def write_summary(run_dir: Path, top: int = 30) -> Path | None:
+    """Aggregate every profile in ``run_dir`` into ``summary.txt``."""
+
+    profiles = sorted(run_dir.glob("*.prof"))
+    if not profiles:
+        return None
+    records = []
+    for path in run_dir.glob("*.json"):
+        try:
+            records.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, json.JSONDecodeError):
+            continue
+    records.sort(key=lambda record: -record.get("seconds", 0))
+
+    stats = pstats.Stats(*(str(path) for path in profiles), stream=io.StringIO())
+    packages: dict[str, float] = defaultdict(float)
+    for (filename, _, function), (_, _, tottime, _, _) in stats.stats.items():  # type: ignore[attr-defined]
+        packages[_package_of(filename, function)] += tottime
+    total = sum(packages.values()) or 1.0
+
+    lines = [f"Profiled {len(records)} job(s) in {run_dir}", "", "Slowest jobs:"]
+    for record in records[:top]:
+        peak = f", peak {record['peakTracedMiB']} MiB traced" if "peakTracedMiB" in record else ""
+        lines.append(f"  {record['seconds']:9.3f}s  {record['stage']:<8} {record['source']}{peak}")
+    lines += ["", "Internal time by package:"]
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {seconds:9.3f}s  {100 * seconds / total:5.1f}%  {package}")
+
+    for title, key in (("Top functions by internal time", "tottime"), ("Top functions by cumulative time", "cumulative")):
+        buffer = io.StringIO()
+        stats.stream = buffer  # type: ignore[attr-defined]
+        stats.sort_stats(key).print_stats(top)
+        body = buffer.getvalue()
+        # Drop pstats' preamble (file list and totals) and keep the table.
+        table = body[body.find("   ncalls") :] if "   ncalls" in body else body
+        lines += ["", f"{title}:", table.rstrip()]
+
+    summary = run_dir / SUMMARY_NAME
+    summary.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return summary
@@ -0,0 +1,268 @@
+"""Select the subset of ``subjects/`` a partial extraction run operates on.
+
+A scope combines subject names (top-level folders), explicit file or folder
+paths, and ``--include``/``--exclude`` glob patterns matched against the
+source path relative to ``subjects/`` (``fnmatch`` semantics, so ``*`` also
+crosses folder boundaries).  A source is in scope when it belongs to one of
+the listed subjects or paths (or none were given), matches at least one
+include pattern (or none were given) and matches no exclude pattern.
+
+Paths and patterns are compared in Unicode NFC, so a folder stored decomposed
+on disk (``Pra\u0301cticas``) is selected by the composed spelling typed on the
+command line.  A ``--path`` or ``--include`` that selects neither a source nor
+a recorded manifest entry is rejected instead of running an empty scope.
+
+Like :mod:`extract_manifest`, this module only uses the standard library.
+Run ``python scripts/extraction_scope.py --include '...'`` to list the sources
+a scope selects.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import os
+import sys
+import unicodedata
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from extract_manifest import SourceStat, iter_source_stats, load_manifest
+
+ROOT = Path(__file__).resolve().parents[1]
+SUBJECTS_DIR = ROOT / "subjects"
+MANIFEST_PATH = ROOT / ".cache" / "subject-extracts-manifest.json"
+
+
+def _nfc(text: str) -> str:
+    return unicodedata.normalize("NFC", text)
+
+
+@dataclass(frozen=True)
+class SourceScope:
+    subjects: tuple[str, ...] = ()
+    paths: tuple[str, ...] = ()
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        for name in ("subjects", "paths", "include", "exclude"):
+            object.__setattr__(self, name, tuple(_nfc(value) for value in getattr(self, name)))
+
+    @property
+    def is_full(self) -> bool:
+        return not (self.subjects or self.paths or self.include or self.exclude)
+
+    def roots(self) -> tuple[str, ...]:
+        """Relative folders or files that contain every in-scope source."""
+
+        if not (self.subjects or self.paths):
+            return ("",)
+        return tuple(dict.fromkeys((*self.subjects, *self.paths)))
+
+    def matches(self, relative: str) -> bool:
+        relative = _nfc(relative)
+        if self.subjects or self.paths:
+            if not any(relative == root or relative.startswith(f"{root}/") for root in self.roots()):
+                return False
+        if self.include and not any(fnmatch.fnmatchcase(relative, pattern) for pattern in self.include):
+            return False
+        return not any(fnmatch.fnmatchcase(relative, pattern) for pattern in self.exclude)
+
+    def describe(self) -> str:
+        parts = []
+        if self.subjects:
+            parts.append("subjects " + ", ".join(self.subjects))
+        if self.paths:
+            parts.append(f"{len(self.paths)} path(s)")
+        if self.include:
+            parts.append("include " + ", ".join(self.include))
+        if self.exclude:
+            parts.append("exclude " + ", ".join(self.exclude))
+        return "; ".join(parts) or "all subjects"
+
+    def to_args(self) -> list[str]:
+        """Return command-line options that reproduce this scope."""
+
+        args: list[str] = []
+        for option, values in (
+            ("--subject", self.subjects),
+            ("--path", self.paths),
+            ("--include", self.include),
+            ("--exclude", self.exclude),
+        ):
+            for value in values:
+                args.extend((option, value))
+        return args
+
+
+def iter_scoped_stats(subjects_dir: Path, scope: SourceScope) -> Iterator[SourceStat]:
+    """Yield stats for in-scope sources, only walking the folders they live in."""
+
+    for root in scope.roots():
+        root = _on_disk(subjects_dir, root)
+        location = subjects_dir / root if root else subjects_dir
+        if location.is_file():
+            stat = location.stat()
+            candidates: Iterable[SourceStat] = [SourceStat(root, stat.st_size, stat.st_mtime_ns, stat.st_ino)]
+        else:
+            candidates = iter_source_stats(location, prefix=f"{root}/" if root else "")
+        for candidate in candidates:
+            if scope.matches(candidate.relative):
+                yield candidate
+
+
+def _on_disk(subjects_dir: Path, relative: str) -> str:
+    """Spell ``relative`` the way the file system stores it (NFC or NFD)."""
+
+    if not relative or (subjects_dir / relative).exists():
+        return relative
+    current = subjects_dir
+    parts = []
+    for part in relative.split("/"):
+        if not (current / part).exists():
+            wanted = _nfc(part)
+            try:
+                part = next((entry.name for entry in os.scandir(current) if _nfc(entry.name) == wanted), part)
+            except OSError:
+                pass
+        parts.append(part)
+        current = current / part
+    return "/".join(parts)
+
+
+def unmatched_filters(scope: SourceScope, subjects_dir: Path, known: Iterable[str] = ()) -> list[str]:
+    """Return the ``--path``/``--include`` options that select nothing.
+
+    A filter counts as matched when it selects a source below ``subjects_dir``
+    or one of the ``known`` relative paths (manifest entries, so the outputs of
+    a deleted source can still be cleaned up).
+    """
+
+    if not (scope.paths or scope.include):
+        return []
+    broad = replace(scope, include=())
+    candidates = {_nfc(stat.relative) for stat in iter_scoped_stats(subjects_dir, broad)}
+    candidates.update(_nfc(relative) for relative in known if broad.matches(relative))
+    unmatched = [
+        f"--path {path}"
+        for path in scope.paths
+        if not any(candidate == path or candidate.startswith(f"{path}/") for candidate in candidates)
+    ]
+    unmatched += [
+        f"--include {pattern}"
+        for pattern in scope.include
+        if not any(fnmatch.fnmatchcase(candidate, pattern) for candidate in candidates)
+    ]
+    return unmatched
+
+
+def add_scope_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("partial runs")
+    group.add_argument(
+        "--subject",
+        action="append",
+        default=[],
+        help="Only process this top-level folder of subjects/ (repeatable)",
+    )
+    group.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Only process sources whose path below subjects/ matches GLOB (repeatable)",
+    )
+    group.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip sources whose path below subjects/ matches GLOB (repeatable)",
+    )
+    group.add_argument(
+        "--path",
+        dest="paths",
+        action="append",
+        default=[],
+        type=Path,
+        help="Only process this file or folder (repeatable; relative to the working directory or subjects/)",
+    )
+    group.add_argument(
+        "--paths-from",
+        type=Path,
+        metavar="FILE",
+        help="Read additional --path entries from FILE, one per line ('-' reads standard input)",
+    )
+
+
+def _relative_to_subjects(path: Path, subjects_dir: Path) -> str:
+    candidates = [path] if path.is_absolute() else [Path.cwd() / path, subjects_dir / path]
+    resolved: list[tuple[Path, Path]] = []
+    for candidate in candidates:
+        try:
+            resolved.append((candidate, candidate.resolve().relative_to(subjects_dir.resolve())))
+        except ValueError:
+            continue
+    # Prefer a path that exists; a missing one still scopes the run so the
+    # outputs of a deleted source are cleaned up (see unmatched_filters).
+    resolved.sort(key=lambda item: not item[0].exists())
+    if not resolved:
+        raise ValueError(f"{path} is not below {subjects_dir}")
+    relative = resolved[0][1]
+    return "" if relative == Path(".") else relative.as_posix()
+
+
+def scope_from_args(args: argparse.Namespace, subjects_dir: Path, known: Iterable[str] = ()) -> SourceScope:
+    """Build a :class:`SourceScope`; raises ``ValueError`` for unknown paths.
+
+    ``known`` lists recorded sources (manifest keys) that may no longer exist;
+    a ``--path`` or ``--include`` matching neither them nor a source is an error.
+    """
+
+    raw_paths = list(args.paths)
+    if args.paths_from is not None:
+        lines = sys.stdin if str(args.paths_from) == "-" else args.paths_from.read_text(encoding="utf-8").splitlines()
+        raw_paths.extend(Path(line.strip()) for line in lines if line.strip())
+
+    paths = []
+    for raw in raw_paths:
+        relative = _relative_to_subjects(raw, subjects_dir)
+        if not relative:
+            return SourceScope(include=tuple(args.include), exclude=tuple(args.exclude))
+        paths.append(relative)
+
+    for subject in args.subject:
+        if not (subjects_dir / _on_disk(subjects_dir, _nfc(subject))).is_dir():
+            raise ValueError(f"unknown subject {subject!r}; expected a folder of {subjects_dir}")
+
+    scope = SourceScope(
+        subjects=tuple(args.subject),
+        paths=tuple(paths),
+        include=tuple(args.include),
+        exclude=tuple(args.exclude),
+    )
+    unmatched = unmatched_filters(scope, subjects_dir, known)
+    if unmatched:
+        raise ValueError(f"{', '.join(unmatched)} matches no source under {subjects_dir}")
+    return scope
+
+
+def _cli(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="List the sources below subjects/ that a scope selects.")
+    parser.add_argument("--subjects-dir", type=Path, default=SUBJECTS_DIR)
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    add_scope_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        scope = scope_from_args(args, args.subjects_dir, load_manifest(args.manifest))
+    except ValueError as error:
+        print(f"Invalid scope: {error}", file=sys.stderr)
+        return 2
+    for relative in sorted(stat.relative for stat in iter_scoped_stats(args.subjects_dir, scope)):
+        print(relative)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_cli())
@@ -0,0 +1,476 @@
+"""Supervised worker processes for the subject extraction pipeline.
+
+Extractors such as pypdf, PyMuPDF and openpyxl occasionally hang or balloon in
+memory on pathological inputs.  Running them inside the main process means a
+single bad file stalls the whole run, and an out-of-memory kill discards every
+result produced so far.  This module runs each job in a child process that the
+parent supervises:
+
+* every job gets a wall-clock budget; workers that exceed it are killed;
+* the resident set size (RSS) of each worker is polled and a worker that grows
+  past the configured ceiling is killed;
+* workers are recycled after a fixed number of jobs so slow leaks inside native
+  libraries cannot accumulate across the corpus;
+* with a pool memory budget, a governor admits each job only when its
+  predicted footprint fits next to the memory the workers already use (and
+  what the system still has available), so concurrency grows on runs of small
+  files and shrinks around the few image-heavy PDFs instead of being fixed.
+
+Results are yielded as soon as they are available so callers can persist them
+incrementally.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+try:  # pragma: no cover - optional dependency used on non-Linux platforms
+    import psutil  # type: ignore
+except ImportError:  # pragma: no cover - fallback when dependency absent
+    psutil = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - unavailable on Windows
+    import resource
+except ImportError:  # pragma: no cover - fallback when module absent
+    resource = None  # type: ignore[assignment]
+
+
+_POLL_INTERVAL = 0.2
+# Extra memory charged for forking a new worker; its pages are shared with the
+# parent until written to, so this is small.
+_WORKER_OVERHEAD_MB = 32.0
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class WorkerBudget:
+    """Resource limits applied to every supervised extraction job."""
+
+    jobs: int = 1
+    timeout: float | None = 300.0
+    max_rss_mb: float | None = 2048.0
+    max_files_per_worker: int = 25
+    niceness: int = 0
+    # Memory for the whole pool; ``jobs`` becomes the concurrency ceiling.
+    memory_budget_mb: float | None = None
+    min_free_mb: float = 512.0
+
+
+@dataclass
+class PoolStats:
+    """What the pool did during a run, for the run report."""
+
+    admitted: int = 0
+    throttled: int = 0
+    throttled_seconds: float = 0.0
+    max_concurrency: int = 0
+    peak_pool_mb: float = 0.0
+    min_available_mb: float | None = None
+
+    def as_dict(self) -> dict[str, float | int | None]:
+        return {
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "throttledSeconds": round(self.throttled_seconds, 3),
+            "maxConcurrency": self.max_concurrency,
+            "peakPoolMiB": round(self.peak_pool_mb, 1),
+            "minAvailableMiB": None if self.min_available_mb is None else round(self.min_available_mb, 1),
+        }
+
+
+@dataclass
+class JobOutcome:
+    """Result of a single supervised job."""
+
+    source: Path
+    value: Any
+    elapsed: float
+    peak_rss_mb: float | None = None
+    aborted: str | None = None
+    footprint_mb: float | None = None
+
+
+def read_rss_mb(pid: int) -> float | None:
+    """Return the current resident set size of ``pid`` in MiB when measurable."""
+
+    statm = Path(f"/proc/{pid}/statm")
+    try:
+        fields = statm.read_text().split()
+    except OSError:
+        fields = []
+    if len(fields) >= 2:
+        return int(fields[1]) * _PAGE_SIZE / (1024 * 1024)
+
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+        except Exception:  # pragma: no cover - process may have exited
+            return None
+    return None
+
+
+def read_pss_mb(pid: int) -> float | None:
+    """Proportional set size of ``pid`` in MiB, falling back to its RSS.
+
+    Forked workers share the parent's pages; PSS splits those between the
+    processes instead of charging each worker for all of them.
+    """
+
+    try:
+        text = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return read_rss_mb(pid)
+    for line in text.splitlines():
+        if line.startswith("Pss:"):
+            return int(line.split()[1]) / 1024
+    return read_rss_mb(pid)
+
+
+def read_available_mb() -> float | None:
+    """Memory the system can still hand out without swapping, in MiB."""
+
+    try:
+        with open("/proc/meminfo", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    return None
+
+
+def _own_peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ``ru_maxrss`` is reported in KiB on Linux and in bytes on macOS.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+def _worker_loop(conn: Connection, task: Callable[[Path], Any], niceness: int = 0) -> None:
+    """Process jobs received over ``conn`` until the parent sends ``None``."""
+
+    if niceness and hasattr(os, "nice"):
+        try:
+            os.nice(niceness)
+        except OSError:  # pragma: no cover - lowering priority is best-effort
+            pass
+    while True:
+        try:
+            source = conn.recv()
+        except (EOFError, OSError):
+            return
+        if source is None:
+            return
+        started = time.perf_counter()
+        try:
+            value = task(source)
+        except Exception as error:  # noqa: BLE001 - reported back to the parent
+            conn.send(
+                ("error", f"raised {type(error).__name__}: {error}", time.perf_counter() - started, None)
+            )
+            continue
+        conn.send(("ok", value, time.perf_counter() - started, _own_peak_rss_mb()))
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    # ``fork`` keeps worker start-up cheap because the heavy parser imports are
+    # inherited from the parent; other platforms use their default method.
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class _WorkerSlot:
+    def __init__(
+        self, context: multiprocessing.context.BaseContext, task: Callable[[Path], Any], niceness: int = 0
+    ) -> None:
+        parent_conn, child_conn = context.Pipe()
+        self.conn = parent_conn
+        self.process = context.Process(target=_worker_loop, args=(child_conn, task, niceness), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.current: Path | None = None
+        self.started_at = 0.0
+        self.peak_rss_mb: float | None = None
+        self.completed = 0
+        self.start_rss_mb: float | None = None
+        self.usage_mb = 0.0
+        self.predicted_mb = 0.0
+
+    def assign(self, source: Path, predicted_mb: float = 0.0) -> None:
+        self.current = source
+        self.started_at = time.perf_counter()
+        self.start_rss_mb = read_rss_mb(self.process.pid) if self.process.pid is not None else None
+        self.peak_rss_mb = self.start_rss_mb
+        self.predicted_mb = predicted_mb
+        self.conn.send(source)
+
+    def footprint_mb(self, worker_peak: float | None) -> float | None:
+        """Memory the current job added on top of the worker's resident size at assignment."""
+
+        # ``ru_maxrss`` covers the worker's whole life, so it only describes its first job.
+        peaks = (self.peak_rss_mb, worker_peak if self.completed == 0 else None)
+        peak = max(filter(None, peaks), default=None)
+        if peak is None or self.start_rss_mb is None:
+            return None
+        return max(0.0, peak - self.start_rss_mb)
+
+    def sample_usage(self) -> float:
+        usage = read_pss_mb(self.process.pid) if self.process.pid is not None else None
+        self.usage_mb = usage or 0.0
+        return self.usage_mb
+
+    @property
+    def reserved_mb(self) -> float:
+        """Current usage, or what the running job is still expected to reach."""
+
+        if self.current is None:
+            return self.usage_mb
+        return self.usage_mb + max(0.0, self.predicted_mb - self.grown_mb)
+
+    @property
+    def grown_mb(self) -> float:
+        if self.start_rss_mb is None or self.peak_rss_mb is None:
+            return 0.0
+        return max(0.0, self.peak_rss_mb - self.start_rss_mb)
+
+    def sample_rss(self) -> float | None:
+        rss = read_rss_mb(self.process.pid) if self.process.pid is not None else None
+        if rss is not None and (self.peak_rss_mb is None or rss > self.peak_rss_mb):
+            self.peak_rss_mb = rss
+        return rss
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def retire(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class _MemoryGovernor:
+    """Admission control for a pool with a memory budget.
+
+    Jobs are admitted in dispatch order while the memory the workers use, plus
+    what their running jobs are still predicted to grow by, plus the next
+    job's prediction fits both the budget and the memory the system has left
+    above ``min_free_mb``.  A job that does not fit waits (head of line, so the
+    expensive jobs dispatched first are not starved by small ones) and idle
+    workers are retired to hand their memory back.  A job is always admitted
+    when nothing else is running, so an oversized file still gets its turn.
+    """
+
+    def __init__(self, budget: WorkerBudget, footprint: Callable[[Path], float], stats: PoolStats) -> None:
+        self.budget = budget
+        self.footprint = footprint
+        self.stats = stats
+        self._waiting_since: float | None = None
+
+    def admits(self, source: Path, slots: list[_WorkerSlot], *, reuse_idle: bool) -> bool:
+        if not any(slot.current is not None for slot in slots):
+            return self._admitted()
+        need = self.footprint(source) + (0.0 if reuse_idle else _WORKER_OVERHEAD_MB)
+        allowance = float(self.budget.memory_budget_mb or 0.0) - sum(slot.reserved_mb for slot in slots)
+        available = read_available_mb()
+        if available is not None:
+            allowance = min(allowance, available - self.budget.min_free_mb)
+        if need <= allowance:
+            return self._admitted()
+        if self._waiting_since is None:
+            self._waiting_since = time.perf_counter()
+            self.stats.throttled += 1
+        return False
+
+    def _admitted(self) -> bool:
+        if self._waiting_since is not None:
+            self.stats.throttled_seconds += time.perf_counter() - self._waiting_since
+            self._waiting_since = None
+        return True
+
+
+def run_in_process(sources: Iterable[Path], task: Callable[[Path], Any]) -> Iterator[JobOutcome]:
+    """Run ``task`` serially in the current process (no isolation)."""
+
+    for source in sources:
+        started = time.perf_counter()
+        value = task(source)
+        yield JobOutcome(source=source, value=value, elapsed=time.perf_counter() - started)
+
+
+def run_supervised(
+    sources: Iterable[Path],
+    task: Callable[[Path], Any],
+    budget: WorkerBudget,
+    *,
+    footprint: Callable[[Path], float] | None = None,
+    stats: PoolStats | None = None,
+) -> Iterator[JobOutcome]:
+    """Run ``task`` for each source inside supervised worker processes.
+
+    Outcomes are yielded in completion order.  Jobs that exceed the time or
+    memory budget, raise, or take their worker down are reported with
+    ``aborted`` set to a short clause describing what happened (for example
+    ``"exceeded the 300s time budget"``) and ``value`` set to ``None``.
+
+    ``footprint`` predicts the MiB a job adds to its worker; it drives the
+    governor when ``budget.memory_budget_mb`` is set.  Admissions, throttling
+    and pool memory are accumulated into ``stats`` when given.
+    """
+
+    if budget.jobs <= 0:
+        yield from run_in_process(sources, task)
+        return
+
+    context = _mp_context()
+    pending = deque(sources)
+    slots: list[_WorkerSlot] = []
+    max_files = max(1, budget.max_files_per_worker)
+    stats = stats if stats is not None else PoolStats()
+    predict = footprint or (lambda source: 0.0)
+    governor = _MemoryGovernor(budget, predict, stats) if budget.memory_budget_mb else None
+
+    def admit_jobs() -> None:
+        if governor is None:
+            while pending and len(slots) < budget.jobs:
+                slots.append(_WorkerSlot(context, task, budget.niceness))
+            for slot in slots:
+                if slot.current is None and pending:
+                    source = pending.popleft()
+                    slot.assign(source, predict(source))
+                    stats.admitted += 1
+            return
+        while pending and sum(slot.current is not None for slot in slots) < budget.jobs:
+            idle = next((slot for slot in slots if slot.current is None), None)
+            if not governor.admits(pending[0], slots, reuse_idle=idle is not None):
+                # Scale down: idle workers keep whatever their last job left behind.
+                for slot in [slot for slot in slots if slot.current is None]:
+                    release(slot, killed=False)
+                return
+            if idle is None:
+                idle = _WorkerSlot(context, task, budget.niceness)
+                slots.append(idle)
+            source = pending.popleft()
+            idle.assign(source, predict(source))
+            idle.sample_usage()
+            stats.admitted += 1
+
+    def record_usage() -> None:
+        busy = [slot for slot in slots if slot.current is not None]
+        stats.max_concurrency = max(stats.max_concurrency, len(busy))
+        stats.peak_pool_mb = max(stats.peak_pool_mb, sum(slot.usage_mb for slot in slots))
+        available = read_available_mb()
+        if available is not None and (stats.min_available_mb is None or available < stats.min_available_mb):
+            stats.min_available_mb = available
+
+    def release(slot: _WorkerSlot, *, killed: bool) -> None:
+        if killed:
+            slot.kill()
+        else:
+            slot.retire()
+        slots.remove(slot)
+
+    try:
+        while pending or any(slot.current is not None for slot in slots):
+            for slot in slots:
+                slot.sample_usage()
+            admit_jobs()
+            record_usage()
+
+            busy = [slot for slot in slots if slot.current is not None]
+            ready = wait([slot.conn for slot in busy], timeout=_POLL_INTERVAL)
+
+            for slot in busy:
+                source = slot.current
+                assert source is not None
+                elapsed = time.perf_counter() - slot.started_at
+
+                if slot.conn in ready:
+                    try:
+                        status, value, job_elapsed, worker_peak = slot.conn.recv()
+                    except (EOFError, OSError):
+                        exit_code = slot.process.exitcode
+                        slot.current = None
+                        release(slot, killed=True)
+                        yield JobOutcome(
+                            source=source,
+                            value=None,
+                            elapsed=elapsed,
+                            peak_rss_mb=slot.peak_rss_mb,
+                            aborted=f"crashed its worker process (exit code {exit_code})",
+                        )
+                        continue
+
+                    footprint_mb = slot.footprint_mb(worker_peak)
+                    slot.current = None
+                    slot.completed += 1
+                    peak = max(filter(None, (slot.peak_rss_mb, worker_peak)), default=None)
+                    if status == "ok":
+                        yield JobOutcome(
+                            source=source,
+                            value=value,
+                            elapsed=job_elapsed,
+                            peak_rss_mb=peak,
+                            footprint_mb=footprint_mb,
+                        )
+                    else:
+                        yield JobOutcome(
+                            source=source,
+                            value=None,
+                            elapsed=job_elapsed,
+                            peak_rss_mb=peak,
+                            aborted=value,
+                            footprint_mb=footprint_mb,
+                        )
+                    if slot.completed >= max_files:
+                        release(slot, killed=False)
+                    continue
+
+                rss = slot.sample_rss()
+                reason: str | None = None
+                if budget.timeout is not None and elapsed > budget.timeout:
+                    reason = f"exceeded the {budget.timeout:g}s time budget"
+                elif budget.max_rss_mb is not None and rss is not None and rss > budget.max_rss_mb:
+                    reason = f"exceeded the {budget.max_rss_mb:g} MiB memory budget ({rss:.0f} MiB resident)"
+                elif not slot.process.is_alive():
+                    reason = f"crashed its worker process (exit code {slot.process.exitcode})"
+
+                if reason is not None:
+                    footprint_mb = slot.footprint_mb(None)
+                    slot.current = None
+                    release(slot, killed=True)
+                    yield JobOutcome(
+                        source=source,
+                        value=None,
+                        elapsed=elapsed,
+                        peak_rss_mb=slot.peak_rss_mb,
+                        aborted=reason,
+                        footprint_mb=footprint_mb,
+                    )
+    finally:
+        for slot in list(slots):
+            if slot.current is not None:
+                slot.kill()
+            else:
+                slot.retire()
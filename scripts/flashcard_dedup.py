@@ -0,0 +1,198 @@
+"""Near-duplicate flashcard detection with MinHash signatures and LSH.
+
+Cards that only differ by accents, punctuation, case or tag are the same card
+for a learner.  Comparing every pair is quadratic, so the folded ``front`` and
+``back`` of each card are reduced to character shingles and one MinHash
+signature of ``NUM_PERMUTATIONS`` values each.  Locality-sensitive hashing
+then groups the concatenated signatures by ``BANDS`` bands of
+``ROWS_PER_BAND`` values; only cards sharing a band bucket are compared, and a
+pair is kept when both its front and its back signatures agree on at least
+``threshold`` of their values (an estimate of the Jaccard similarity of the
+shingle sets).  Requiring both sides keeps short cards such as
+``contestar → answer`` and ``bastar → answer`` apart.  Matches are joined into
+clusters with a union-find, so the whole pass is roughly linear in the number
+of cards.
+
+Signatures are computed with NumPy in batches when it is installed and with
+plain Python otherwise (same values, just slower).
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    import numpy as np
+except ImportError as numpy_import_error:  # pragma: no cover - fallback when dependency absent
+    np = None  # type: ignore[assignment]
+    NUMPY_IMPORT_ERROR = numpy_import_error
+else:
+    NUMPY_IMPORT_ERROR = None
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 16
+BANDS = 4
+ROWS_PER_BAND = 2 * NUM_PERMUTATIONS // BANDS
+DEFAULT_THRESHOLD = 0.8
+_BATCH_CARDS = 4096
+_MASK64 = (1 << 64) - 1
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}I"
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _permutation_parameters() -> tuple[list[int], list[int]]:
+    # Fixed odd multipliers and offsets so signatures are reproducible across runs.
+    seed = 0x9E3779B97F4A7C15
+    multipliers, offsets = [], []
+    for _ in range(NUM_PERMUTATIONS):
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & _MASK64
+        multipliers.append(seed | 1)
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & _MASK64
+        offsets.append(seed)
+    return multipliers, offsets
+
+
+_MULTIPLIERS, _OFFSETS = _permutation_parameters()
+
+
+def normalise_card_text(text: str) -> str:
+    """Fold accents, case and punctuation: ``"¡Asistir A!"`` → ``"asistir a"``."""
+
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", stripped.casefold()).split())
+
+
+def shingles(text: str) -> list[int]:
+    """32-bit hashes of the distinct character shingles of already-folded ``text``."""
+
+    if len(text) <= SHINGLE_SIZE:
+        pieces = {text}
+    else:
+        pieces = {text[index : index + SHINGLE_SIZE] for index in range(len(text) - SHINGLE_SIZE + 1)}
+    return sorted(zlib.crc32(piece.encode("utf-8")) for piece in pieces)
+
+
+def _python_signature(values: Sequence[int]) -> bytes:
+    return struct.pack(
+        _SIGNATURE_FORMAT,
+        *(
+            min((((multiplier * value + offset) & _MASK64) >> 32) for value in values)
+            for multiplier, offset in zip(_MULTIPLIERS, _OFFSETS)
+        ),
+    )
+
+
+def minhash_signatures(shingle_sets: Sequence[Sequence[int]]) -> list[bytes]:
+    """MinHash signature (multiply-shift hashing) of every shingle set.
+
+    Signatures are packed as little-endian 32-bit values, so a card (front and
+    back) costs ``8 * NUM_PERMUTATIONS`` bytes in the index.
+    """
+
+    if np is None:
+        return [_python_signature(values) for values in shingle_sets]
+
+    multipliers = np.asarray(_MULTIPLIERS, dtype=np.uint64)[:, None]
+    offsets = np.asarray(_OFFSETS, dtype=np.uint64)[:, None]
+    signatures: list[bytes] = []
+    for start in range(0, len(shingle_sets), _BATCH_CARDS):
+        batch = shingle_sets[start : start + _BATCH_CARDS]
+        lengths = np.fromiter((len(values) for values in batch), dtype=np.int64, count=len(batch))
+        flat = np.fromiter((value for values in batch for value in values), dtype=np.uint64, count=int(lengths.sum()))
+        with np.errstate(over="ignore"):
+            hashed = (multipliers * flat[None, :] + offsets) >> np.uint64(32)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        minima = np.minimum.reduceat(hashed, starts, axis=1).T.astype("<u4")
+        signatures.extend(row.tobytes() for row in minima)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first: int, second: int) -> None:
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            # Keep the lowest index as the root so it becomes the cluster's representative.
+            if second < first:
+                first, second = second, first
+            self.parent[second] = first
+
+
+def _agreement(first: bytes, second: bytes) -> float:
+    """Lower of the front and back signature agreements of two cards."""
+
+    half = 4 * NUM_PERMUTATIONS
+    return min(
+        sum(first[index : index + 4] == second[index : index + 4] for index in range(start, start + half, 4))
+        for start in (0, half)
+    ) / NUM_PERMUTATIONS
+
+
+@dataclass
+class NearDuplicateIndex:
+    """Collects card texts and clusters the near-duplicates among them.
+
+    Shingles are only buffered until a batch of signatures is computed, so
+    memory per card is the packed signature.
+    """
+
+    threshold: float = DEFAULT_THRESHOLD
+    _signatures: list[bytes] = field(default_factory=list)
+    _pending: list[list[int]] = field(default_factory=list)
+
+    def add(self, front: str, back: str) -> int:
+        """Register a card and return its index."""
+
+        self._pending.append(shingles(normalise_card_text(front)))
+        self._pending.append(shingles(normalise_card_text(back)))
+        if len(self._pending) >= 2 * _BATCH_CARDS:
+            self._flush()
+        return len(self._signatures) + len(self._pending) // 2 - 1
+
+    def _flush(self) -> None:
+        halves = minhash_signatures(self._pending)
+        self._signatures.extend(front + back for front, back in zip(halves[::2], halves[1::2]))
+        self._pending = []
+
+    def clusters(self) -> list[list[int]]:
+        """Groups of two or more card indexes, each sorted, ordered by first index."""
+
+        self._flush()
+        signatures = self._signatures
+        union = _UnionFind(len(signatures))
+        width = 4 * ROWS_PER_BAND
+        for band in range(BANDS):
+            buckets: dict[bytes, int] = {}
+            for index, signature in enumerate(signatures):
+                anchor = buckets.setdefault(signature[band * width : (band + 1) * width], index)
+                # Comparing with the bucket's first card keeps large buckets linear.
+                if anchor != index and _agreement(signatures[anchor], signature) >= self.threshold:
+                    union.union(anchor, index)
+
+        groups: dict[int, list[int]] = {}
+        for index in range(len(signatures)):
+            groups.setdefault(union.find(index), []).append(index)
+        return sorted((members for members in groups.values() if len(members) > 1), key=lambda members: members[0])
+
+
+def find_near_duplicates(
+    cards: Iterable[tuple[str, str]], threshold: float = DEFAULT_THRESHOLD
+) -> list[list[int]]:
+    index = NearDuplicateIndex(threshold)
+    for front, back in cards:
+        index.add(front, back)
+    return index.clusters()
@@ -0,0 +1,186 @@
+"""Per-deck Anki exports with stable note ids and incremental deltas.
+
+The consolidated CSV has no identifiers, so Anki treats every import as a new
+set of notes.  This module writes, next to it, one CSV per deck in Anki's
+headered CSV format with a ``guid`` column derived from each card's stable
+note id (the ``id`` column of the seed CSV, or a content hash when it is
+missing), so re-importing updates existing notes instead of duplicating them.
+
+``exports/anki/manifest.json`` records a digest per note and per deck from the
+last export.  Each run writes ``delta.csv`` with only the added or changed
+notes and ``deleted.csv`` with the notes that disappeared, and only rewrites
+the deck files whose content changed, so a re-import costs time proportional
+to what changed.  Rows are spooled per deck while the merge streams past; the
+deck files are then finalised in parallel threads.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Sequence
+
+EXPORT_DIR_NAME = "anki"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DECK_ROOT = "Study Compass"
+DEFAULT_DECK = "misc"
+_HEADER = (
+    "#separator:comma",
+    "#html:true",
+    "#notetype:Basic",
+    "#guid column:1",
+    "#tags column:4",
+    "#deck column:5",
+)
+_BASE91 = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    "!#$%&()*+,-./:;<=>?@[]^_`{|}~"
+)
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def note_guid(note_id: str) -> str:
+    """Anki-style base91 GUID that stays the same for a given note id."""
+
+    value = int.from_bytes(hashlib.blake2b(note_id.encode("utf-8"), digest_size=8).digest(), "big")
+    digits = []
+    while value:
+        value, remainder = divmod(value, len(_BASE91))
+        digits.append(_BASE91[remainder])
+    return "".join(reversed(digits)) or _BASE91[0]
+
+
+def content_note_id(front: str, back: str, tag: str) -> str:
+    return "content-" + hashlib.blake2b("\0".join((front, back, tag)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def anki_deck_name(deck: str) -> str:
+    return f"{DECK_ROOT}::{deck or DEFAULT_DECK}"
+
+
+def anki_tags(tag: str) -> str:
+    # Anki separates tags with spaces.
+    return "_".join(tag.split())
+
+
+def deck_filename(deck: str) -> str:
+    return f"{_UNSAFE_FILENAME.sub('-', deck or DEFAULT_DECK).strip('-') or DEFAULT_DECK}.csv"
+
+
+def _anki_row(front: str, back: str, tag: str, note_id: str, deck: str) -> list[str]:
+    return [note_guid(note_id), front, back, anki_tags(tag), anki_deck_name(deck)]
+
+
+def _note_digest(fields: Sequence[str]) -> str:
+    return hashlib.blake2b("\0".join(fields).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _open_anki_csv(path: Path) -> tuple[IO[str], "csv._writer"]:
+    handle = path.open("w", newline="", encoding="utf-8")
+    handle.write("\n".join(_HEADER) + "\n")
+    return handle, csv.writer(handle)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DeltaExporter:
+    """Spool merged rows into per-deck files and the delta against the last export."""
+
+    def __init__(self, export_dir: Path) -> None:
+        self.export_dir = export_dir
+        self.manifest_path = export_dir / MANIFEST_NAME
+        self.previous = self._load_manifest()
+        self.notes: dict[str, str] = {}
+        self.added = 0
+        self.changed = 0
+        self._spool_dir = export_dir / ".spool"
+        self._decks: dict[str, tuple[IO[str], "csv._writer"]] = {}
+        self._delta: tuple[IO[str], "csv._writer"] | None = None
+
+    def _load_manifest(self) -> dict:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {"notes": {}, "decks": {}}
+        return data
+
+    def track(self, rows: Iterable[tuple[str, str, str, str, str]]) -> Iterator[tuple[str, str, str, str, str]]:
+        """Pass ``rows`` through unchanged while exporting them."""
+
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+        self._spool_dir.mkdir(parents=True)
+        self._delta = _open_anki_csv(self._spool_dir / "delta.csv")
+        previous_notes = self.previous["notes"]
+        for row in rows:
+            front, back, tag, note_id, deck = row
+            if note_id in self.notes:
+                # A reused id would make Anki overwrite one card with another.
+                note_id = content_note_id(front, back, tag)
+            fields = _anki_row(front, back, tag, note_id, deck)
+            digest = _note_digest(fields)
+            self.notes[note_id] = digest
+            if note_id not in previous_notes:
+                self.added += 1
+                self._delta[1].writerow(fields)
+            elif previous_notes[note_id] != digest:
+                self.changed += 1
+                self._delta[1].writerow(fields)
+            if deck not in self._decks:
+                self._decks[deck] = _open_anki_csv(self._spool_dir / deck_filename(deck))
+            self._decks[deck][1].writerow(fields)
+            yield row
+
+    def _finalise_deck(self, deck: str) -> tuple[str, str, bool]:
+        spooled = self._spool_dir / deck_filename(deck)
+        digest = _file_digest(spooled)
+        target = self.export_dir / deck_filename(deck)
+        if self.previous["decks"].get(deck) == digest and target.is_file():
+            spooled.unlink()
+            return deck, digest, False
+        os.replace(spooled, target)
+        return deck, digest, True
+
+    def finish(self, workers: int | None = None) -> str:
+        """Finalise the deck files, delta and manifest; returns a summary line."""
+
+        for handle, _ in (*self._decks.values(), self._delta):
+            handle.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self._finalise_deck, self._decks))
+        decks = {deck: digest for deck, digest, _ in results}
+        rewritten = sum(1 for *_, written in results if written)
+        for deck in set(self.previous["decks"]) - set(decks):
+            (self.export_dir / deck_filename(deck)).unlink(missing_ok=True)
+
+        os.replace(self._spool_dir / "delta.csv", self.export_dir / "delta.csv")
+        deleted = sorted(set(self.previous["notes"]) - set(self.notes))
+        with (self.export_dir / "deleted.csv").open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["guid", "id"])
+            writer.writerows([note_guid(note_id), note_id] for note_id in deleted)
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+
+        self.manifest_path.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "decks": decks, "notes": self.notes}, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        return (
+            f"Anki decks: {len(decks)} ({rewritten} rewritten); delta {self.added} added, "
+            f"{self.changed} changed, {len(deleted)} deleted."
+        )
@@ -1,43 +1,245 @@
 #!/usr/bin/env python3
-"""Merge all flashcard CSV files into a consolidated Anki export."""
+"""Merge all flashcard CSV files into a consolidated Anki export.
+
+The merge streams: every deck is sorted on its own into a run on disk (decks
+larger than ``RUN_ROWS`` are split into several runs), then the runs are
+combined with a k-way ``heapq.merge`` on ``(tag, front)`` and written out row
+by row.  Memory therefore depends on the run size and the number of runs, not
+on the total number of cards; past ``MAX_OPEN_RUNS`` runs, consecutive runs are
+merged in extra passes so the number of open files stays bounded too.  Exact
+duplicates always share their merge key, so they are dropped by remembering a
+short digest of each row only while its ``(tag, front)`` group is written.
+
+``--near-duplicates report`` additionally lists cards that only differ by
+accents, case, punctuation or tag (see :mod:`flashcard_dedup`), and
+``--near-duplicates collapse`` keeps the first card of each such cluster.
+
+Every row also carries its stable note id and deck, which the consolidated CSV
+leaves out but the per-deck Anki exports and deltas in ``exports/anki/`` use
+(see :mod:`flashcard_exports`).  ``--apkg`` also packs the merged cards into
+an Anki package with one subdeck per tag (see :mod:`anki_package`).
+"""
 from __future__ import annotations
 
+import argparse
 import csv
+import hashlib
+import heapq
+import tempfile
 from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from anki_package import AnkiPackageBuilder
+from flashcard_dedup import DEFAULT_THRESHOLD, NearDuplicateIndex
+from flashcard_exports import EXPORT_DIR_NAME, DeltaExporter, content_note_id
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC_PATTERN = "src/seed/**/*-flashcards.csv"
 OUTPUT = ROOT / "exports" / "d2-anki-export.csv"
+ANKI_EXPORT_DIR = ROOT / "exports" / EXPORT_DIR_NAME
+APKG_OUTPUT = ROOT / "exports" / "study-compass.apkg"
+RUN_ROWS = 50_000
+MAX_OPEN_RUNS = 128
+
+# front, back, tag, note id, deck
+Row = tuple[str, str, str, str, str]
+
+
+def _merge_key(row: Row) -> tuple[str, str]:
+    return row[2], row[0]
+
+
+def _row_digest(row: Row) -> bytes:
+    # Duplicates are judged on the exported columns only.
+    return hashlib.blake2b("\0".join(row[:3]).encode("utf-8"), digest_size=8).digest()
+
+
+def iter_deck_rows(csv_path: Path) -> Iterator[Row]:
+    with csv_path.open(newline="", encoding="utf-8") as fh:
+        for record in csv.DictReader(fh):
+            front = (record.get("front") or "").strip()
+            back = (record.get("back") or "").strip()
+            tag = (record.get("tag") or "").strip()
+            if front and back:
+                note_id = (record.get("id") or "").strip() or content_note_id(front, back, tag)
+                yield front, back, tag, note_id, (record.get("deck") or "").strip()
+
+
+def _write_run(rows: list[Row], spill_dir: Path, index: int) -> Path:
+    path = spill_dir / f"run-{index:05d}.csv"
+    rows.sort(key=_merge_key)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        csv.writer(fh).writerows(rows)
+    return path
+
+
+def _read_run(path: Path) -> Iterator[Row]:
+    with path.open(newline="", encoding="utf-8") as fh:
+        for front, back, tag, note_id, deck in csv.reader(fh):
+            yield front, back, tag, note_id, deck
+
+
+def write_sorted_runs(csv_paths: Iterable[Path], spill_dir: Path, run_rows: int = RUN_ROWS) -> list[Path]:
+    """Sort each deck (in chunks of ``run_rows``) into run files, in input order."""
+
+    runs: list[Path] = []
+    for csv_path in csv_paths:
+        chunk: list[Row] = []
+        for row in iter_deck_rows(csv_path):
+            chunk.append(row)
+            if len(chunk) >= run_rows:
+                runs.append(_write_run(chunk, spill_dir, len(runs)))
+                chunk = []
+        if chunk:
+            runs.append(_write_run(chunk, spill_dir, len(runs)))
+    return runs
+
+
+def merge_runs(runs: Sequence[Iterable[Row]]) -> Iterator[Row]:
+    """K-way merge sorted runs, dropping exact duplicates.
 
+    ``heapq.merge`` is stable across its inputs, so rows with the same key keep
+    the deck order they had in the original in-memory sort.
+    """
 
-def gather_rows() -> list[tuple[str, str, str]]:
-    rows: list[tuple[str, str, str]] = []
-    seen: set[tuple[str, str, str]] = set()
-    for csv_path in sorted(ROOT.glob(SRC_PATTERN)):
-        with csv_path.open(newline="", encoding="utf-8") as fh:
-            reader = csv.DictReader(fh)
-            for record in reader:
-                front = (record.get("front") or "").strip()
-                back = (record.get("back") or "").strip()
-                tag = (record.get("tag") or "").strip()
-                if not front or not back:
-                    continue
-                key = (front, back, tag)
-                if key in seen:
-                    continue
-                seen.add(key)
-                rows.append(key)
-    rows.sort(key=lambda item: (item[2], item[0]))
-    return rows
-
-
-def write_output(rows: list[tuple[str, str, str]]) -> None:
-    OUTPUT.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT.open("w", newline="", encoding="utf-8") as fh:
+    group: tuple[str, str] | None = None
+    seen: set[bytes] = set()
+    for row in heapq.merge(*runs, key=_merge_key):
+        key = _merge_key(row)
+        if key != group:
+            group = key
+            seen.clear()
+        digest = _row_digest(row)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield row
+
+
+def collapse_runs(runs: list[Path], spill_dir: Path) -> list[Path]:
+    """Merge consecutive batches of runs until at most ``MAX_OPEN_RUNS`` remain."""
+
+    generation = 0
+    while len(runs) > MAX_OPEN_RUNS:
+        merged: list[Path] = []
+        for start in range(0, len(runs), MAX_OPEN_RUNS):
+            path = spill_dir / f"merge-{generation:02d}-{len(merged):05d}.csv"
+            with path.open("w", newline="", encoding="utf-8") as fh:
+                csv.writer(fh).writerows(merge_runs([_read_run(run) for run in runs[start : start + MAX_OPEN_RUNS]]))
+            merged.append(path)
+        for run in runs:
+            run.unlink()
+        runs = merged
+        generation += 1
+    return runs
+
+
+def iter_merged_rows(root: Path = ROOT, run_rows: int = RUN_ROWS) -> Iterator[Row]:
+    with tempfile.TemporaryDirectory(prefix="flashcard-runs-") as spill_dir:
+        runs = write_sorted_runs(sorted(root.glob(SRC_PATTERN)), Path(spill_dir), run_rows)
+        runs = collapse_runs(runs, Path(spill_dir))
+        yield from merge_runs([_read_run(path) for path in runs])
+
+
+def near_duplicate_clusters(run_rows: int = RUN_ROWS, threshold: float = DEFAULT_THRESHOLD) -> list[list[int]]:
+    """Clusters of export row indexes whose cards are near-duplicates."""
+
+    index = NearDuplicateIndex(threshold)
+    for front, back, *_ in iter_merged_rows(run_rows=run_rows):
+        index.add(front, back)
+    return index.clusters()
+
+
+def print_near_duplicate_report(clusters: list[list[int]], run_rows: int = RUN_ROWS) -> None:
+    members = {member for cluster in clusters for member in cluster}
+    rows = {index: row for index, row in enumerate(iter_merged_rows(run_rows=run_rows)) if index in members}
+    for number, cluster in enumerate(clusters, start=1):
+        print(f"Cluster {number} ({len(cluster)} cards):")
+        for member in cluster:
+            front, back, tag = rows[member][:3]
+            print(f"  {front} → {back} [{tag}]")
+    print(f"{len(clusters)} near-duplicate cluster(s) covering {len(members)} card(s).")
+
+
+def collapse_near_duplicates(rows: Iterable[Row], clusters: list[list[int]]) -> Iterator[Row]:
+    """Keep the first card of every cluster (in export order) and drop the rest."""
+
+    dropped = {member for cluster in clusters for member in cluster[1:]}
+    return (row for index, row in enumerate(rows) if index not in dropped)
+
+
+def gather_rows() -> list[Row]:
+    return list(iter_merged_rows())
+
+
+def write_output(rows: Iterable[Row], output: Path = OUTPUT) -> int:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with output.open("w", newline="", encoding="utf-8") as fh:
         writer = csv.writer(fh)
         writer.writerow(["front", "back", "tag"])
-        writer.writerows(rows)
+        for row in rows:
+            writer.writerow(row[:3])
+            written += 1
+    return written
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge the flashcard CSV decks into one Anki export.")
+    parser.add_argument(
+        "--run-rows",
+        type=int,
+        default=RUN_ROWS,
+        help="Rows sorted in memory before a run is spilled to disk",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        choices=("report", "collapse"),
+        help="List cards that only differ by accents, case, punctuation or tag ('collapse' also keeps one per cluster)",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Estimated shingle similarity of front and back for near-duplicates (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-anki-decks",
+        action="store_true",
+        help="Skip the per-deck Anki exports and the delta against the previous export",
+    )
+    parser.add_argument(
+        "--apkg",
+        nargs="?",
+        type=Path,
+        const=APKG_OUTPUT,
+        help=f"Also write an Anki package with one subdeck per tag (default: {APKG_OUTPUT.relative_to(ROOT)})",
+    )
+    args = parser.parse_args(argv)
+    run_rows = max(1, args.run_rows)
+
+    rows: Iterable[Row] = iter_merged_rows(run_rows=run_rows)
+    if args.near_duplicates:
+        clusters = near_duplicate_clusters(run_rows, args.similarity)
+        print_near_duplicate_report(clusters, run_rows)
+        if args.near_duplicates == "collapse":
+            rows = collapse_near_duplicates(rows, clusters)
+    package = None
+    if args.apkg:
+        package = AnkiPackageBuilder()
+        rows = package.track(rows)
+    exporter = None
+    if not args.no_anki_decks:
+        exporter = DeltaExporter(ANKI_EXPORT_DIR)
+        rows = exporter.track(rows)
+    written = write_output(rows)
+    print(f"Wrote {written} cards to {OUTPUT.relative_to(ROOT)}")
+    if exporter is not None:
+        print(exporter.finish())
+    if package is not None:
+        print(package.write(args.apkg))
+    return 0
 
 
 if __name__ == "__main__":
-    write_output(gather_rows())
+    raise SystemExit(main())
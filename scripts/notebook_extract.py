@@ -0,0 +1,438 @@
+"""Streaming text extraction for Jupyter notebooks.
+
+``json.loads`` materialises a whole notebook, and most of a notebook's size is
+usually base64 plots embedded in its outputs.  The standard library has no
+incremental JSON parser, so this module walks the file with a small pull reader
+(:class:`_JsonReader`) over 64 KiB chunks: objects and arrays are visited one
+member at a time, and strings are handed out in chunks, so a multi-megabyte
+output is never held as a single value.
+
+Each cell is written as soon as its closing brace is seen:
+
+* the source, in a ``python`` fence for code cells, as before;
+* ``stream`` output text, ``text/plain`` results and ``ename: evalue`` error
+  lines, in a ``text`` fence capped at :attr:`NotebookLimits.max_output_bytes`
+  UTF-8 bytes per cell (the rest is counted and summarised, not kept).  Colour
+  codes are stripped and progress bars redrawn with ``\\r`` keep their last
+  state;
+* ``image/png`` and ``image/jpeg`` outputs, base64-decoded chunk by chunk
+  straight into a :class:`FigureStore` file and referenced like PDF figures.
+  The ``text/plain`` fallback of an image output (``<Figure size ...>``) is
+  dropped.
+
+Memory therefore stays proportional to the largest cell source plus the output
+cap, whatever the size of the notebook.
+"""
+
+from __future__ import annotations
+
+import binascii
+import json
+import re
+from dataclasses import dataclass, field
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+_READ_CHUNK_SIZE = 64 * 1024
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+# The longest run of a string made of complete escapes, and a run ending in the
+# first half of a surrogate pair (held back until its second half is read).
+_STRING_BODY = re.compile(r'(?:[^"\\]+|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*')
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}")
+_LONGEST_ESCAPE = 6
+_SCALAR = re.compile(r"[^ \t\n\r,\]}]+")
+_BASE64_WHITESPACE = b" \t\n\r"
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+_REDRAWN_LINE = re.compile(r"[^\n]*\r(?!\n)")
+_FIGURE_SUFFIXES = {"image/png": ".png", "image/jpeg": ".jpg"}
+
+
+class NotebookFormatError(ValueError):
+    """Raised when a notebook is not well-formed JSON."""
+
+
+@dataclass(frozen=True)
+class NotebookLimits:
+    """Caps applied while writing a notebook extract.
+
+    ``max_output_bytes`` bounds the output text kept per cell; ``None`` keeps
+    all of it and ``0`` leaves text outputs out.
+    """
+
+    max_output_bytes: int | None = 2048
+
+
+@dataclass
+class NotebookSummary:
+    cells: int = 0
+    figures: int = 0
+    truncated_cells: int = 0
+    invalid_figures: int = 0
+
+
+class _JsonReader:
+    """Pull parser over a text stream; callers must consume every value they reach."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._buffer = ""
+        self._position = 0
+
+    def _fill(self) -> bool:
+        chunk = self._stream.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at the end)."""
+
+        while True:
+            match = _NON_WHITESPACE.search(self._buffer, self._position)
+            if match is not None:
+                self._position = match.start()
+                return match.group()
+            self._position = len(self._buffer)
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise NotebookFormatError(f"expected {char!r} but found {found or 'end of file'!r}")
+        self._position += 1
+
+    def string_chunks(self) -> Iterator[str]:
+        """Yield the next string value in decoded pieces."""
+
+        self._expect('"')
+        while True:
+            end = self._buffer.find('"', self._position)
+            if end < 0:
+                end = len(self._buffer)
+            if self._buffer.find("\\", self._position, end) >= 0:
+                end = _STRING_BODY.match(self._buffer, self._position).end()
+            closed = end < len(self._buffer) and self._buffer[end] == '"'
+            if not closed and self._buffer[end : end + 1] == "\\" and len(self._buffer) - end >= _LONGEST_ESCAPE:
+                raise NotebookFormatError(f"invalid escape {self._buffer[end : end + 2]!r}")
+            piece = self._buffer[self._position : end]
+            if not closed and _HIGH_SURROGATE.fullmatch(piece, len(piece) - _LONGEST_ESCAPE):
+                head = piece[: -_LONGEST_ESCAPE + 1]
+                if (len(head) - len(head.rstrip("\\"))) % 2:
+                    piece = piece[:-_LONGEST_ESCAPE]
+                    end -= _LONGEST_ESCAPE
+            self._position = end + closed
+            if piece:
+                yield scanstring(piece + '"', 0, False)[0] if "\\" in piece else piece
+            if closed:
+                return
+            if not self._fill():
+                raise NotebookFormatError("unterminated string")
+
+    def read_string(self) -> str:
+        return "".join(self.string_chunks())
+
+    def members(self) -> Iterator[str]:
+        """Yield the keys of the next object; read or :meth:`skip` each value."""
+
+        self._expect("{")
+        if self.peek() == "}":
+            self._position += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise NotebookFormatError("expected an object key")
+            key = self.read_string()
+            self._expect(":")
+            yield key
+            separator = self.peek()
+            self._position += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise NotebookFormatError(f"expected ',' or '}}' but found {separator or 'end of file'!r}")
+
+    def items(self) -> Iterator[None]:
+        """Step through the next array; read or :meth:`skip` each element."""
+
+        self._expect("[")
+        if self.peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield None
+            separator = self.peek()
+            self._position += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise NotebookFormatError(f"expected ',' or ']' but found {separator or 'end of file'!r}")
+
+    def _scalar(self) -> Any:
+        self.peek()
+        while True:
+            match = _SCALAR.match(self._buffer, self._position)
+            if match is None:
+                raise NotebookFormatError(f"unexpected {self._buffer[self._position : self._position + 1]!r}")
+            if match.end() < len(self._buffer) or not self._fill():
+                break
+        self._position = match.end()
+        try:
+            return json.loads(match.group())
+        except json.JSONDecodeError:
+            raise NotebookFormatError(f"invalid value {match.group()[:20]!r}") from None
+
+    def value(self) -> Any:
+        """Read the next value in full; only for values known to be small."""
+
+        char = self.peek()
+        if char == '"':
+            return self.read_string()
+        if char == "{":
+            return {key: self.value() for key in self.members()}
+        if char == "[":
+            return [self.value() for _ in self.items()]
+        return self._scalar()
+
+    def skip(self) -> None:
+        char = self.peek()
+        if char == '"':
+            for _ in self.string_chunks():
+                pass
+        elif char == "{":
+            for _ in self.members():
+                self.skip()
+        elif char == "[":
+            for _ in self.items():
+                self.skip()
+        else:
+            self._scalar()
+
+    def text_chunks(self) -> Iterator[str]:
+        """Yield a notebook multiline string: one string or an array of strings."""
+
+        char = self.peek()
+        if char == '"':
+            yield from self.string_chunks()
+        elif char == "[":
+            for _ in self.items():
+                if self.peek() == '"':
+                    yield from self.string_chunks()
+                else:
+                    self.skip()
+        else:
+            self.skip()
+
+    def finish(self) -> None:
+        if self.peek():
+            raise NotebookFormatError("extra data after the notebook")
+
+
+def _terminal_text(text: str) -> str:
+    """Drop colour codes and keep the last redraw of ``\\r``-updated progress lines."""
+
+    return _REDRAWN_LINE.sub("", _ANSI_ESCAPE.sub("", text))
+
+
+def _take(chunks: Iterable[str], limit: int | None) -> tuple[str, int]:
+    """Keep the first ``limit`` UTF-8 bytes of ``chunks``; count the bytes dropped."""
+
+    kept: list[str] = []
+    room = limit
+    dropped = 0
+    for chunk in chunks:
+        if room is None:
+            kept.append(chunk)
+            continue
+        size = len(chunk.encode("utf-8", "surrogatepass"))
+        if size <= room:
+            kept.append(chunk)
+            room -= size
+            continue
+        if room:
+            head = chunk.encode("utf-8", "surrogatepass")[:room].decode("utf-8", "ignore")
+            kept.append(head)
+            size -= len(head.encode("utf-8", "surrogatepass"))
+            room = 0
+        dropped += size
+    return "".join(kept), dropped
+
+
+class FigureStore:
+    """Decode image outputs into ``directory``; ``link`` gives the Markdown target."""
+
+    def __init__(self, directory: Path, link: Callable[[Path], str]) -> None:
+        self.directory = directory
+        self.link = link
+
+    def write(self, chunks: Iterable[str], name: str) -> str | None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / name
+        pending = b""
+        try:
+            with target.open("wb") as handle:
+                for chunk in chunks:
+                    pending += chunk.encode("ascii", "replace").translate(None, _BASE64_WHITESPACE)
+                    usable = len(pending) - len(pending) % 4
+                    if usable:
+                        handle.write(binascii.a2b_base64(pending[:usable]))
+                        pending = pending[usable:]
+                if pending:
+                    raise binascii.Error("truncated base64 data")
+        except binascii.Error:
+            # Drain the rest of the value so the reader stays in step.
+            for _ in chunks:
+                pass
+            target.unlink(missing_ok=True)
+            return None
+        return self.link(target)
+
+
+@dataclass
+class _CellOutputs:
+    limits: NotebookLimits
+    figures: FigureStore | None
+    cell: int
+    # ("text", str) and ("figure", link) in output order.
+    pieces: list[tuple[str, str]] = field(default_factory=list)
+    used: int = 0
+    dropped: int = 0
+    figure_count: int = 0
+    invalid_figures: int = 0
+
+    @property
+    def room(self) -> int | None:
+        limit = self.limits.max_output_bytes
+        return None if limit is None else max(0, limit - self.used)
+
+    def add_text(self, text: str, dropped: int = 0) -> None:
+        kept, overflow = _take([_terminal_text(text)], self.room)
+        self.dropped += dropped + overflow
+        if kept:
+            self.used += len(kept.encode("utf-8", "surrogatepass"))
+            self.pieces.append(("text", kept))
+
+    def add_figure(self, reader: _JsonReader, mime: str) -> bool:
+        if self.figures is None or reader.peek() != '"':
+            reader.skip()
+            return False
+        name = f"cell-{self.cell:03d}-figure-{self.figure_count + 1}{_FIGURE_SUFFIXES[mime]}"
+        link = self.figures.write(reader.string_chunks(), name)
+        if link is None:
+            self.invalid_figures += 1
+            return False
+        self.figure_count += 1
+        self.pieces.append(("figure", link))
+        return True
+
+    def read_output(self, reader: _JsonReader) -> None:
+        error: dict[str, str] = {}
+        for key in reader.members():
+            if key == "text":
+                self.add_text(*_take(reader.text_chunks(), self.room))
+            elif key == "data":
+                self._read_bundle(reader)
+            elif key in ("ename", "evalue"):
+                value = reader.value()
+                error[key] = value if isinstance(value, str) else ""
+            else:
+                reader.skip()
+        if error:
+            self.add_text(": ".join(part for part in (error.get("ename"), error.get("evalue")) if part) + "\n")
+
+    def _read_bundle(self, reader: _JsonReader) -> None:
+        plain: tuple[str, int] | None = None
+        has_figure = False
+        for mime in reader.members():
+            if mime in _FIGURE_SUFFIXES:
+                has_figure = self.add_figure(reader, mime) or has_figure
+            elif mime == "text/plain" and not has_figure:
+                plain = _take(reader.text_chunks(), self.room)
+            else:
+                reader.skip()
+        if plain is not None and not has_figure:
+            text, dropped = plain
+            self.add_text(text if text.endswith("\n") or not text else text + "\n", dropped)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        text: list[str] = []
+        figure = 0
+
+        def flush_text() -> None:
+            body = "".join(text).rstrip()
+            if body:
+                lines.append(f"```text\n{body}\n```")
+            text.clear()
+
+        for kind, value in self.pieces:
+            if kind == "text":
+                text.append(value)
+                continue
+            flush_text()
+            figure += 1
+            lines.append(f"![Cell {self.cell}, Figure {figure}]({value})")
+        if self.dropped:
+            text.append(f"\n[{self.dropped} more bytes of output not shown]")
+        flush_text()
+        return "\n".join(lines)
+
+
+def _read_cell(reader: _JsonReader, index: int, limits: NotebookLimits, figures: FigureStore | None) -> tuple[str, _CellOutputs]:
+    cell_type = "unknown"
+    source = ""
+    outputs = _CellOutputs(limits, figures, index)
+    for key in reader.members():
+        if key == "cell_type":
+            value = reader.value()
+            cell_type = value if isinstance(value, str) else cell_type
+        elif key == "source":
+            source = "".join(reader.text_chunks())
+        elif key == "outputs" and reader.peek() == "[":
+            for _ in reader.items():
+                if reader.peek() == "{":
+                    outputs.read_output(reader)
+                else:
+                    reader.skip()
+        else:
+            reader.skip()
+
+    header = f"### Cell {index} · {cell_type.title()}"
+    if cell_type != "code":
+        return f"{header}\n{source}", outputs
+    rendered = f"{header}\n```python\n{source.rstrip()}\n```"
+    output_text = outputs.render()
+    return (f"{rendered}\n{output_text}" if output_text else rendered), outputs
+
+
+def write_notebook(
+    path: Path, out: TextIO, limits: NotebookLimits = NotebookLimits(), figures: FigureStore | None = None
+) -> NotebookSummary:
+    """Stream the cells of the notebook at ``path`` into ``out``."""
+
+    summary = NotebookSummary()
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        reader = _JsonReader(handle)
+        if reader.peek() != "{":
+            raise NotebookFormatError("a notebook must be a JSON object")
+        for key in reader.members():
+            if key != "cells" or reader.peek() != "[":
+                reader.skip()
+                continue
+            for _ in reader.items():
+                if reader.peek() != "{":
+                    reader.skip()
+                    continue
+                text, outputs = _read_cell(reader, summary.cells + 1, limits, figures)
+                if summary.cells:
+                    out.write("\n\n")
+                out.write(text)
+                summary.cells += 1
+                summary.figures += outputs.figure_count
+                summary.invalid_figures += outputs.invalid_figures
+                summary.truncated_cells += bool(outputs.dropped)
+        reader.finish()
+    return summary
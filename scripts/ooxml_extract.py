@@ -0,0 +1,580 @@
+"""Streaming text extraction for OOXML presentations and Word documents.
+
+python-pptx and python-docx build a complete object model for every part of a
+package just so the pipeline can read a handful of text runs.  This module reads
+the relevant parts straight out of the zip container and walks them with
+incremental XML parsing (lxml's ``iterparse`` when installed, otherwise the
+standard library's pull parser).  Each top-level shape (slides) or body
+block (documents) is processed as soon as its closing tag is seen and then
+discarded, so memory stays proportional to the largest single shape or table
+rather than to the whole deck.
+
+The produced text mirrors the libraries' semantics (paragraph joins, ``\\v`` for
+PowerPoint line breaks, gridSpan/vMerge expansion in Word tables) so the
+extracts are byte-identical to the previous python-pptx/python-docx output.
+
+When a :class:`MediaStore` is supplied, images referenced from slides and
+paragraphs (``a:blip``/``v:imagedata`` resolved through the part's
+relationships) are copied out of the container into the asset store and
+referenced in the text like PDF figures.
+
+Run ``python scripts/ooxml_extract.py --compare`` to time both engines against
+every ``.pptx``/``.ppsx``/``.docx`` under ``subjects/`` and check that their
+output matches.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import io
+import posixpath
+import shutil
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
+from xml.etree import ElementTree
+
+try:  # pragma: no cover - optional accelerator, installed alongside python-pptx/python-docx
+    from lxml import etree as lxml_etree  # type: ignore
+except ImportError:  # pragma: no cover - fallback when dependency absent
+    lxml_etree = None  # type: ignore[assignment]
+
+_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_SLIDE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+_IMAGE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+_READ_CHUNK_SIZE = 64 * 1024
+_COPY_CHUNK_SIZE = 1024 * 1024
+# Formats browsers can display; EMF/WMF/WDP parts are left in the package.
+_WEB_IMAGE_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".bmp"})
+
+
+def _qn(name: str) -> str:
+    prefix, local = name.split(":")
+    return f"{{{_NS[prefix]}}}{local}"
+
+
+_P_SP_TREE = _qn("p:spTree")
+_P_SP = _qn("p:sp")
+_P_TX_BODY = _qn("p:txBody")
+_P_GRAPHIC_FRAME = _qn("p:graphicFrame")
+_P_PIC = _qn("p:pic")
+_P_GRP_SP = _qn("p:grpSp")
+_P_SLD_ID = _qn("p:sldId")
+_A_P = _qn("a:p")
+_A_R = _qn("a:r")
+_A_BR = _qn("a:br")
+_A_FLD = _qn("a:fld")
+_A_T = _qn("a:t")
+_A_TBL = _qn("a:tbl")
+_A_TR = _qn("a:tr")
+_A_TC = _qn("a:tc")
+_A_TX_BODY = _qn("a:txBody")
+_A_BLIP = _qn("a:blip")
+_R_ID = _qn("r:id")
+_R_EMBED = _qn("r:embed")
+_V_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+_W_BODY = _qn("w:body")
+_W_P = _qn("w:p")
+_W_R = _qn("w:r")
+_W_HYPERLINK = _qn("w:hyperlink")
+_W_T = _qn("w:t")
+_W_TAB = _qn("w:tab")
+_W_PTAB = _qn("w:ptab")
+_W_BR = _qn("w:br")
+_W_CR = _qn("w:cr")
+_W_NO_BREAK_HYPHEN = _qn("w:noBreakHyphen")
+_W_TBL = _qn("w:tbl")
+_W_TR = _qn("w:tr")
+_W_TC = _qn("w:tc")
+_W_TR_PR = _qn("w:trPr")
+_W_TC_PR = _qn("w:tcPr")
+_W_GRID_BEFORE = _qn("w:gridBefore")
+_W_GRID_SPAN = _qn("w:gridSpan")
+_W_V_MERGE = _qn("w:vMerge")
+_W_VAL = _qn("w:val")
+_W_TYPE = _qn("w:type")
+
+
+class OOXMLPackageError(ValueError):
+    """Raised when a package lacks the parts the streaming reader relies on."""
+
+
+# ---------------------------------------------------------------------------
+# Package navigation
+# ---------------------------------------------------------------------------
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _resolve_target(source_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def read_relationships(archive: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str]]:
+    """Return ``{rId: (type, resolved target)}`` for the internal relationships of ``part``."""
+
+    try:
+        handle = archive.open(_rels_path(part))
+    except KeyError:
+        return {}
+    relationships: dict[str, tuple[str, str]] = {}
+    with handle:
+        for _, element in ElementTree.iterparse(handle):
+            if element.tag != _qn("rel:Relationship") or element.get("TargetMode") == "External":
+                continue
+            relationships[element.get("Id", "")] = (
+                element.get("Type", ""),
+                _resolve_target(part, element.get("Target", "")),
+            )
+    return relationships
+
+
+def main_document_part(archive: zipfile.ZipFile) -> str:
+    for rel_type, target in read_relationships(archive, "").values():
+        if rel_type == _OFFICE_DOCUMENT_REL:
+            return target
+    raise OOXMLPackageError("package has no officeDocument relationship")
+
+
+def _open_part(archive: zipfile.ZipFile, part: str) -> IO[bytes]:
+    try:
+        return archive.open(part)
+    except KeyError as error:
+        raise OOXMLPackageError(f"missing package part {part}") from error
+
+
+class MediaStore:
+    """Copy embedded media parts into ``directory`` the first time they are referenced.
+
+    Parts are streamed out of the zip container with ``shutil.copyfileobj``.
+    Office stores images uncompressed, so for those the bytes are copied as-is
+    with no decoding.  ``link`` turns a copied file's path into the Markdown
+    target written to the extract.
+    """
+
+    def __init__(self, directory: Path, link: Callable[[Path], str]) -> None:
+        self.directory = directory
+        self.link = link
+        self.copied: dict[str, str] = {}
+        self.skipped: set[str] = set()
+
+    def reference(self, archive: zipfile.ZipFile, part: str) -> str | None:
+        if part in self.copied:
+            return self.copied[part]
+        if posixpath.splitext(part)[1].lower() not in _WEB_IMAGE_SUFFIXES:
+            self.skipped.add(part)
+            return None
+        try:
+            source = archive.open(part)
+        except KeyError:
+            return None
+        name = posixpath.basename(part)
+        target = self.directory / name
+        if target.exists():
+            target = self.directory / f"{len(self.copied) + 1:03d}_{name}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with source, target.open("wb") as handle:
+            shutil.copyfileobj(source, handle, _COPY_CHUNK_SIZE)
+        link = self.link(target)
+        self.copied[part] = link
+        return link
+
+
+def _media_links(
+    archive: zipfile.ZipFile,
+    element: ElementTree.Element,
+    relationships: dict[str, tuple[str, str]],
+    media: MediaStore,
+) -> list[str]:
+    """Return asset links for the images ``element`` embeds, in document order."""
+
+    links: list[str] = []
+    for node in element.iter():
+        if node.tag == _A_BLIP:
+            rel_id = node.get(_R_EMBED, "")
+        elif node.tag == _V_IMAGEDATA:
+            rel_id = node.get(_R_ID, "")
+        else:
+            continue
+        rel_type, target = relationships.get(rel_id, ("", ""))
+        if rel_type != _IMAGE_REL:
+            continue
+        link = media.reference(archive, target)
+        if link is not None and link not in links:
+            links.append(link)
+    return links
+
+
+def iter_children_streaming(
+    handle: IO[bytes], container_tag: str, child_tags: tuple[str, ...]
+) -> Iterator[ElementTree.Element]:
+    """Yield each completed ``child_tags`` element directly below ``container_tag``.
+
+    Children are detached from their container once the caller resumes, so the
+    in-memory tree never grows beyond the element currently being inspected.
+    lxml's tag-filtered ``iterparse`` is used when available because it skips the
+    per-element Python callbacks; otherwise the part is fed to the standard
+    library's ``XMLPullParser`` in fixed-size chunks.
+    """
+
+    if lxml_etree is not None:
+        try:
+            for _, element in lxml_etree.iterparse(
+                handle, events=("end",), tag=child_tags, resolve_entities=False, huge_tree=True
+            ):
+                parent = element.getparent()
+                if parent is None or parent.tag != container_tag:
+                    continue
+                yield element
+                element.clear()
+                parent.remove(element)
+        except lxml_etree.XMLSyntaxError as error:
+            raise OOXMLPackageError(f"malformed XML: {error}") from error
+        return
+
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    stack: list[ElementTree.Element] = []
+    try:
+        for chunk in iter(lambda: handle.read(_READ_CHUNK_SIZE), b""):
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    stack.append(element)
+                    continue
+                stack.pop()
+                if stack and stack[-1].tag == container_tag:
+                    if element.tag in child_tags:
+                        yield element
+                    stack[-1].remove(element)
+        parser.close()
+    except ElementTree.ParseError as error:
+        raise OOXMLPackageError(f"malformed XML: {error}") from error
+
+
+# ---------------------------------------------------------------------------
+# Presentations
+# ---------------------------------------------------------------------------
+
+
+def slide_parts(archive: zipfile.ZipFile) -> list[str]:
+    """Return slide part names in presentation order (``p:sldIdLst``)."""
+
+    presentation_part = main_document_part(archive)
+    relationships = read_relationships(archive, presentation_part)
+    parts: list[str] = []
+    with _open_part(archive, presentation_part) as handle:
+        for _, element in ElementTree.iterparse(handle):
+            if element.tag != _P_SLD_ID:
+                continue
+            rel_type, target = relationships.get(element.get(_R_ID, ""), ("", ""))
+            if rel_type == _SLIDE_REL:
+                parts.append(target)
+    return parts
+
+
+def _drawing_paragraph_text(paragraph: ElementTree.Element) -> str:
+    pieces: list[str] = []
+    for child in paragraph:
+        if child.tag == _A_BR:
+            pieces.append("\v")
+        elif child.tag in (_A_R, _A_FLD):
+            text_element = child.find(_A_T)
+            if text_element is not None and text_element.text:
+                pieces.append(text_element.text)
+    return "".join(pieces)
+
+
+def _drawing_text_body(text_body: ElementTree.Element) -> str:
+    return "\n".join(_drawing_paragraph_text(paragraph) for paragraph in text_body.findall(_A_P))
+
+
+def _slide_shape_parts(shape: ElementTree.Element) -> Iterator[str]:
+    if shape.tag == _P_SP:
+        text_body = shape.find(_P_TX_BODY)
+        if text_body is not None:
+            text = _drawing_text_body(text_body).strip()
+            if text:
+                yield text
+    elif shape.tag == _P_GRAPHIC_FRAME:
+        table = next(shape.iter(_A_TBL), None)
+        if table is None:
+            return
+        rows: list[str] = []
+        for row in table.findall(_A_TR):
+            cells = []
+            for cell in row.findall(_A_TC):
+                cell_body = cell.find(_A_TX_BODY)
+                cells.append("" if cell_body is None else _drawing_text_body(cell_body).strip())
+            if any(cells):
+                rows.append(" | ".join(cells))
+        if rows:
+            yield "Table:\n" + "\n".join(rows)
+
+
+def iter_slide_texts(path: Path, media: MediaStore | None = None) -> Iterator[tuple[int, list[str]]]:
+    """Yield ``(slide_number, text_parts)`` for each slide of a PPTX/PPSX file.
+
+    Only direct children of the slide's shape tree are inspected for text,
+    matching python-pptx's ``slide.shapes`` (grouped shapes are not descended
+    into).  With ``media``, pictures anywhere on the slide are copied to the
+    store and appended as a final ``![Slide N, Figure k](...)`` part.
+    """
+
+    shape_tags = (_P_SP, _P_GRAPHIC_FRAME) if media is None else (_P_SP, _P_GRAPHIC_FRAME, _P_PIC, _P_GRP_SP)
+    with zipfile.ZipFile(path) as archive:
+        for slide_number, part in enumerate(slide_parts(archive), start=1):
+            slide_text: list[str] = []
+            links: list[str] = []
+            relationships = read_relationships(archive, part) if media is not None else {}
+            with _open_part(archive, part) as handle:
+                for shape in iter_children_streaming(handle, _P_SP_TREE, shape_tags):
+                    slide_text.extend(_slide_shape_parts(shape))
+                    if media is not None:
+                        for link in _media_links(archive, shape, relationships, media):
+                            if link not in links:
+                                links.append(link)
+            if links:
+                slide_text.append(
+                    "\n".join(
+                        f"![Slide {slide_number}, Figure {index}]({link})" for index, link in enumerate(links, start=1)
+                    )
+                )
+            yield slide_number, slide_text
+
+
+def read_presentation_text(path: Path, media: MediaStore | None = None) -> str:
+    """Return the ``### Slide N`` Markdown used for presentation extracts."""
+
+    pieces = [
+        f"### Slide {slide_number}\n" + "\n\n".join(parts)
+        for slide_number, parts in iter_slide_texts(path, media)
+        if parts
+    ]
+    return "\n\n".join(pieces)
+
+
+# ---------------------------------------------------------------------------
+# Word documents
+# ---------------------------------------------------------------------------
+
+
+def _run_text(run: ElementTree.Element) -> str:
+    pieces: list[str] = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_T:
+            pieces.append(child.text or "")
+        elif tag in (_W_TAB, _W_PTAB):
+            pieces.append("\t")
+        elif tag == _W_CR:
+            pieces.append("\n")
+        elif tag == _W_BR:
+            if child.get(_W_TYPE, "textWrapping") == "textWrapping":
+                pieces.append("\n")
+        elif tag == _W_NO_BREAK_HYPHEN:
+            pieces.append("-")
+    return "".join(pieces)
+
+
+def _word_paragraph_text(paragraph: ElementTree.Element) -> str:
+    pieces: list[str] = []
+    for child in paragraph:
+        if child.tag == _W_R:
+            pieces.append(_run_text(child))
+        elif child.tag == _W_HYPERLINK:
+            pieces.extend(_run_text(run) for run in child.findall(_W_R))
+    return "".join(pieces)
+
+
+def _int_property(parent: ElementTree.Element | None, tag: str, default: int) -> int:
+    element = None if parent is None else parent.find(tag)
+    if element is None:
+        return default
+    try:
+        return int(element.get(_W_VAL, default))
+    except ValueError:
+        return default
+
+
+def _word_table_rows(table: ElementTree.Element) -> Iterator[list[str]]:
+    """Yield the cell texts of each row, expanding spans like python-docx."""
+
+    previous_row: dict[int, str] = {}
+    for row in table.findall(_W_TR):
+        grid_offset = _int_property(row.find(_W_TR_PR), _W_GRID_BEFORE, 0)
+        current_row: dict[int, str] = {}
+        cells: list[str] = []
+        for cell in row.findall(_W_TC):
+            properties = cell.find(_W_TC_PR)
+            span = _int_property(properties, _W_GRID_SPAN, 1)
+            merge = None if properties is None else properties.find(_W_V_MERGE)
+            if merge is not None and merge.get(_W_VAL, "continue") == "continue":
+                text = previous_row.get(grid_offset, "")
+            else:
+                text = "\n".join(_word_paragraph_text(p) for p in cell.findall(_W_P))
+            current_row[grid_offset] = text
+            cells.extend([text] * span)
+            grid_offset += span
+        previous_row = current_row
+        yield cells
+
+
+def read_docx_text(path: Path, media: MediaStore | None = None) -> str:
+    """Return body paragraphs followed by table rows, one per line.
+
+    With ``media``, images are copied to the store and a ``![Figure k](...)``
+    line follows the paragraph (or table row block) that embeds them.
+    """
+
+    paragraphs: list[str] = []
+    table_rows: list[str] = []
+    figures = 0
+    with zipfile.ZipFile(path) as archive:
+        document_part = main_document_part(archive)
+        relationships = read_relationships(archive, document_part) if media is not None else {}
+        with _open_part(archive, document_part) as handle:
+            for block in iter_children_streaming(handle, _W_BODY, (_W_P, _W_TBL)):
+                if block.tag == _W_P:
+                    text = _word_paragraph_text(block)
+                    if text.strip():
+                        paragraphs.append(text)
+                    target = paragraphs
+                elif block.tag == _W_TBL:
+                    for cells in _word_table_rows(block):
+                        stripped = [cell.strip() for cell in cells]
+                        if any(stripped):
+                            table_rows.append(" | ".join(stripped))
+                    target = table_rows
+                if media is not None:
+                    for link in _media_links(archive, block, relationships, media):
+                        figures += 1
+                        target.append(f"![Figure {figures}]({link})")
+    return "\n".join(paragraphs + table_rows)
+
+
+# ---------------------------------------------------------------------------
+# Comparison against the object-model extractors
+# ---------------------------------------------------------------------------
+
+
+def _default_comparison_targets() -> list[Path]:
+    subjects_dir = Path(__file__).resolve().parents[1] / "subjects"
+    return sorted(
+        path
+        for path in subjects_dir.rglob("*")
+        if path.is_file() and path.suffix.lower() in (".pptx", ".ppsx", ".docx")
+    )
+
+
+def _best_of(function, source, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        argument = source() if callable(source) else source
+        started = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _as_presentation_package(path: Path) -> io.BytesIO:
+    """Return an in-memory copy of a slideshow package retyped as a presentation.
+
+    python-pptx refuses ``.ppsx`` main parts outright; retyping the package lets
+    the comparison still check fidelity for our slideshow decks.
+    """
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == "[Content_Types].xml":
+                data = data.replace(b"presentationml.slideshow.main+xml", b"presentationml.presentation.main+xml")
+            target.writestr(info, data)
+    return buffer
+
+
+def compare(paths: Iterable[Path], repeat: int = 3) -> int:
+    """Print timing and fidelity of the streaming reader versus the libraries."""
+
+    import extract_subject_texts as pipeline  # noqa: PLC0415 - only needed for the comparison
+
+    rows = []
+    for path in paths:
+        if path.suffix.lower() == ".docx":
+            native, library = read_docx_text, pipeline._extract_docx_with_python_docx
+        else:
+            native, library = read_presentation_text, pipeline._extract_presentation_with_python_pptx
+        native_time, native_text = _best_of(native, path, repeat)
+        library_input = path
+        if path.suffix.lower() == ".ppsx":
+            package = _as_presentation_package(path)
+            library_input = lambda: (package.seek(0), package)[1]  # noqa: E731
+        try:
+            library_time, library_result = _best_of(library, library_input, repeat)
+        except Exception as error:  # noqa: BLE001 - e.g. python-pptx rejects .ppsx packages
+            rows.append((path.name, None, native_time, f"library failed ({type(error).__name__})"))
+            continue
+        if library_result.notes:
+            rows.append((path.name, None, native_time, "library unavailable"))
+            continue
+        if native_text == library_result.text:
+            fidelity = "identical"
+        else:
+            ratio = difflib.SequenceMatcher(None, native_text, library_result.text, autojunk=False).ratio()
+            fidelity = f"{ratio:.1%} similar"
+        rows.append((path.name, library_time, native_time, fidelity))
+
+    if not rows:
+        print("No OOXML files to compare.")
+        return 0
+    width = max(len(name) for name, *_ in rows)
+    print(f"{'file':<{width}}  {'library':>9}  {'streaming':>9}  {'speed-up':>8}  fidelity")
+    for name, library_time, native_time, fidelity in rows:
+        if library_time is None:
+            library_column, speedup_column = f"{'-':>9}", f"{'-':>8}"
+        else:
+            library_column = f"{library_time * 1000:7.1f}ms"
+            speedup_column = f"{library_time / native_time if native_time else float('inf'):7.1f}x"
+        print(f"{name:<{width}}  {library_column}  {native_time * 1000:7.1f}ms  {speedup_column}  {fidelity}")
+    # Files the libraries cannot open are not fidelity regressions.
+    return 0 if all(row[3] == "identical" for row in rows if row[1] is not None) else 1
+
+
+def _cli(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Streaming OOXML text extraction.")
+    parser.add_argument("paths", nargs="*", type=Path, help="PPTX/PPSX/DOCX files to process.")
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare speed and output against python-pptx/python-docx (defaults to every subject file).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per file for --compare.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.paths or _default_comparison_targets(), repeat=max(1, args.repeat))
+
+    for path in args.paths:
+        reader = read_docx_text if path.suffix.lower() == ".docx" else read_presentation_text
+        sys.stdout.write(reader(path) + "\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    raise SystemExit(_cli())
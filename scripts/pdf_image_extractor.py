@@ -12,6 +12,7 @@ from __future__ import annotations
 import argparse
 import json
 import shutil
+import sys
 from pathlib import Path
 from typing import Iterable, List, Optional, Tuple
 
@@ -175,19 +176,25 @@ def _collect_images(
     return metadata, embedded_total, snapshot_total
 
 
-def _run_extraction(pdf_file: Path, output_dir: Path) -> Tuple[List[Metadata], int, int]:
-    document = fitz.open(pdf_file)
+def _run_extraction(
+    pdf_file: Path, output_dir: Path, data: Optional[memoryview] = None
+) -> Tuple[List[Metadata], int, int]:
+    # ``data`` lets callers that already mapped the file share it with MuPDF.
+    document = fitz.open(pdf_file) if data is None else fitz.open(stream=data, filetype="pdf")
     try:
         return _collect_images(document, output_dir, pdf_file.stem)
     finally:
         document.close()
 
 
-def extract_images(pdf_file: Path, output_dir: Optional[Path] = None) -> List[Metadata]:
+def extract_images(
+    pdf_file: Path, output_dir: Optional[Path] = None, *, data: Optional[memoryview] = None
+) -> List[Metadata]:
     """Extract images from ``pdf_file`` and return metadata.
 
     Metadata tuples contain the 1-based page number and the saved filename
-    relative to the output directory.
+    relative to the output directory.  ``data`` may hold the file's bytes
+    (for example a memory mapping) so the PDF is not read from disk again.
     """
 
     if not pdf_file.exists():
@@ -198,7 +205,7 @@ def extract_images(pdf_file: Path, output_dir: Optional[Path] = None) -> List[Me
 
     _prepare_output_dir(output_dir)
 
-    metadata, _, _ = _run_extraction(pdf_file, output_dir)
+    metadata, _, _ = _run_extraction(pdf_file, output_dir, data)
     return metadata
 
 
@@ -228,12 +235,29 @@ def _cli(argv: Iterable[str] | None = None) -> int:
         default=None,
         help="Optional explicit output directory. Defaults to subjects/<subject>/<pdf-name>-images/ when available.",
     )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Record a cProfile/tracemalloc profile of the extraction into DIR and print a summary to stderr.",
+    )
     args = parser.parse_args(argv)
 
     output_dir = args.output or _resolve_output_dir(args.pdf_file)
     _prepare_output_dir(output_dir)
 
-    metadata, embedded_total, snapshot_total = _run_extraction(args.pdf_file, output_dir)
+    if args.profile is None:
+        metadata, embedded_total, snapshot_total = _run_extraction(args.pdf_file, output_dir)
+    else:
+        from extraction_profiling import ProfileSettings, profile_call, write_summary
+
+        metadata, embedded_total, snapshot_total = profile_call(
+            ProfileSettings(args.profile), args.pdf_file.name, "images", _run_extraction, args.pdf_file, output_dir
+        )
+        summary = write_summary(args.profile)
+        if summary is not None:
+            print(f"Profile summary written to {summary}", file=sys.stderr)
 
     result = {
         "pdf": str(args.pdf_file),
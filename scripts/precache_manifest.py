@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Write the hashed precache manifest the service worker syncs against.
+
+``public/precache-manifest.json`` lists every runtime-fetched file under
+``public/`` that belongs to the study content (figures in
+``public/subject-assets``, the related-content table and the seed bundle) with
+its URL, a content digest, its size and the subject it belongs to.  The service worker
+compares it with the manifest it synced last time, evicts entries whose digest
+changed, and prefetches the subjects the learner pinned within a byte budget,
+so going offline costs one delta sync instead of re-downloading every cache.
+
+Digests are cached in ``.cache/`` keyed by size and modification time, so a
+refresh only hashes files that changed since the previous run.  Like
+:mod:`extract_manifest`, this module only uses the standard library.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DIR = ROOT / "public"
+OUTPUT_PATH = PUBLIC_DIR / "precache-manifest.json"
+DIGEST_CACHE_PATH = ROOT / ".cache" / "precache-digests.json"
+
+MANIFEST_VERSION = 1
+_DIGEST_LENGTH = 16
+_READ_CHUNK_SIZE = 1024 * 1024
+# Folders whose first path component below them names the subject.
+_SUBJECT_ROOTS = ("subject-assets",)
+# Shared files (glob patterns) every offline-ready client needs regardless of subject.
+_SHARED_FILES = ("related-content.json", "seed-bundle.*.json")
+# Characters encodeURIComponent leaves alone, so URLs match what the app requests.
+_URL_SAFE = "/!*'()~"
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:_DIGEST_LENGTH]
+
+
+def iter_precache_files(public_dir: Path) -> Iterator[tuple[str, str | None]]:
+    """Yield ``(path relative to public/, subject)`` for every precached file."""
+
+    for root in _SUBJECT_ROOTS:
+        base = public_dir / root
+        if not base.is_dir():
+            continue
+        for path in sorted(base.rglob("*")):
+            if path.is_file() and not path.name.startswith("."):
+                relative = path.relative_to(public_dir)
+                yield relative.as_posix(), relative.parts[1] if len(relative.parts) > 2 else None
+    for pattern in _SHARED_FILES:
+        for path in sorted(public_dir.glob(pattern)):
+            if path.is_file():
+                yield path.name, None
+
+
+def _load_digest_cache(path: Path) -> dict[str, list]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def build_precache_manifest(
+    public_dir: Path = PUBLIC_DIR,
+    output_path: Path = OUTPUT_PATH,
+    digest_cache_path: Path = DIGEST_CACHE_PATH,
+) -> str:
+    """Refresh the manifest and return a one-line summary."""
+
+    cached = _load_digest_cache(digest_cache_path)
+    digests: dict[str, list] = {}
+    entries = []
+    subjects: dict[str, dict[str, int]] = {}
+    hashed = 0
+    for relative, subject in iter_precache_files(public_dir):
+        stat = (public_dir / relative).stat()
+        previous = cached.get(relative)
+        if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+            digest = previous[2]
+        else:
+            digest = file_digest(public_dir / relative)
+            hashed += 1
+        digests[relative] = [stat.st_size, stat.st_mtime_ns, digest]
+        entries.append(
+            {"url": "/" + quote(relative, safe=_URL_SAFE), "digest": digest, "size": stat.st_size, "subject": subject}
+        )
+        if subject is not None:
+            totals = subjects.setdefault(subject, {"files": 0, "bytes": 0})
+            totals["files"] += 1
+            totals["bytes"] += stat.st_size
+
+    manifest = {"version": MANIFEST_VERSION, "subjects": subjects, "entries": entries}
+    content = json.dumps(manifest, ensure_ascii=False, separators=(",", ":"))
+    if not output_path.is_file() or output_path.read_text(encoding="utf-8") != content:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(content, encoding="utf-8")
+    digest_cache_path.parent.mkdir(parents=True, exist_ok=True)
+    digest_cache_path.write_text(json.dumps(digests, separators=(",", ":")), encoding="utf-8")
+
+    total_bytes = sum(entry["size"] for entry in entries)
+    return (
+        f"Precache manifest: {len(entries)} file(s), {total_bytes / (1024 * 1024):.1f} MiB "
+        f"across {len(subjects)} subject(s); {hashed} digest(s) recomputed."
+    )
+
+
+def main() -> int:
+    print(build_precache_manifest())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Write ``.br`` and ``.gz`` siblings for the text outputs of the pipeline.
+
+Extracts, their ``globModules.ts``/``index.ts`` indexes and the JSON manifests
+under ``public/`` are plain text that compresses 4–8×.  Compressing them once
+here, at maximum level, lets ``scripts/simple-serve.js`` answer requests with
+the precompressed bytes instead of compressing on every request (or sending
+them uncompressed).
+
+Files are compressed in parallel worker processes, and only when their size or
+modification time differs from the entry recorded in
+``.cache/precompressed-manifest.json``.  The manifest maps each path (relative
+to the repository root) to the source size and mtime plus the encoded size of
+every sibling, which is what the server uses to pick an encoding without
+touching the disk.  Siblings of sources that disappeared are removed.
+
+Brotli needs the optional ``brotli`` package; without it only ``.gz`` siblings
+are written.  gzip output is reproducible (no embedded name or timestamp).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from typing import Iterator, Sequence
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    import brotli
+except ImportError as brotli_import_error:  # pragma: no cover - fallback when dependency absent
+    brotli = None  # type: ignore[assignment]
+    BROTLI_IMPORT_ERROR = brotli_import_error
+else:
+    BROTLI_IMPORT_ERROR = None
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_PATH = ROOT / ".cache" / "precompressed-manifest.json"
+MANIFEST_VERSION = 1
+
+# (folder relative to the repository root, glob patterns) of compressed outputs.
+DEFAULT_TARGETS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("src/data/subjectExtracts", ("**/*.txt", "*.ts")),
+    ("public", ("*.json", "*.webmanifest")),
+)
+DIST_TARGETS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("dist", ("**/*.html", "**/*.js", "**/*.css", "**/*.json", "**/*.svg", "**/*.webmanifest")),
+)
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+_MIN_SIZE = 1024
+
+
+def iter_targets(root: Path, targets: Sequence[tuple[str, Sequence[str]]]) -> Iterator[Path]:
+    for folder, patterns in targets:
+        base = root / folder
+        if not base.is_dir():
+            continue
+        seen: set[Path] = set()
+        for pattern in patterns:
+            for path in sorted(base.glob(pattern)):
+                if path.is_file() and path not in seen and path.stat().st_size >= _MIN_SIZE:
+                    seen.add(path)
+                    yield path
+
+
+def _encode(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write_sibling(path: Path, data: bytes) -> None:
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def compress_file(path: Path) -> dict:
+    """Write every sibling worth keeping for ``path`` and describe them."""
+
+    data = path.read_bytes()
+    stat = path.stat()
+    entry: dict = {"size": stat.st_size, "mtime": stat.st_mtime_ns // 1_000_000}
+    for encoding, suffix in ENCODINGS.items():
+        sibling = path.with_name(path.name + suffix)
+        if encoding == "br" and brotli is None:
+            sibling.unlink(missing_ok=True)
+            continue
+        encoded = _encode(encoding, data)
+        if len(encoded) >= len(data):
+            sibling.unlink(missing_ok=True)
+            continue
+        _write_sibling(sibling, encoded)
+        entry[encoding] = len(encoded)
+    return entry
+
+
+def _compress_job(path: Path) -> tuple[Path, dict]:
+    return path, compress_file(path)
+
+
+def _load_manifest(path: Path) -> dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files") or {}
+
+
+def _is_current(path: Path, entry: dict | None) -> bool:
+    if entry is None:
+        return False
+    stat = path.stat()
+    if entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime_ns // 1_000_000:
+        return False
+    if brotli is not None and "br" not in entry and "gzip" in entry:
+        # Written before brotli was installed; refresh to add the .br sibling.
+        return False
+    return all(path.with_name(path.name + ENCODINGS[encoding]).is_file() for encoding in ENCODINGS if encoding in entry)
+
+
+def precompress(
+    targets: Sequence[tuple[str, Sequence[str]]] = DEFAULT_TARGETS,
+    *,
+    root: Path = ROOT,
+    manifest_path: Path = MANIFEST_PATH,
+    jobs: int | None = None,
+) -> str:
+    """Bring the siblings below ``targets`` up to date and return a summary."""
+
+    files = _load_manifest(manifest_path)
+    folders = tuple(f"{folder}/" for folder, _ in targets)
+    sources = {path.relative_to(root).as_posix(): path for path in iter_targets(root, targets)}
+
+    removed = 0
+    for relative in [relative for relative in files if relative.startswith(folders) and relative not in sources]:
+        for suffix in ENCODINGS.values():
+            (root / f"{relative}{suffix}").unlink(missing_ok=True)
+        del files[relative]
+        removed += 1
+
+    stale = [path for relative, path in sources.items() if not _is_current(path, files.get(relative))]
+    if stale:
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(stale)))
+        if workers == 1:
+            results = map(_compress_job, stale)
+        else:
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(_compress_job, stale, chunksize=4)
+        try:
+            for path, entry in results:
+                files[path.relative_to(root).as_posix()] = entry
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "files": dict(sorted(files.items()))}, separators=(",", ":")),
+        encoding="utf-8",
+    )
+
+    original = sum(files[relative]["size"] for relative in sources)
+    encoded = {
+        encoding: sum(files[relative].get(encoding, files[relative]["size"]) for relative in sources)
+        for encoding in ENCODINGS
+        if encoding != "br" or brotli is not None
+    }
+    sizes = ", ".join(f"{encoding} {size / 1024:.0f} KiB" for encoding, size in encoded.items())
+    return (
+        f"Precompressed {len(stale)} of {len(sources)} file(s) ({removed} removed); "
+        f"{original / 1024:.0f} KiB → {sizes}."
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write .br/.gz siblings for text outputs.")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dist", action="store_true", help="Also compress the Vite build output in dist/")
+    args = parser.parse_args(argv)
+
+    if BROTLI_IMPORT_ERROR is not None:
+        print("brotli is not installed; writing .gz siblings only ('pip install brotli').", file=sys.stderr)
+    targets = DEFAULT_TARGETS + DIST_TARGETS if args.dist else DEFAULT_TARGETS
+    print(precompress(targets, jobs=args.jobs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""Precompute a "related content" graph across extracts, lessons and flashcards.
+
+Every extract page (or slide, notebook cell, sheet), every lesson in
+``src/seed/*.json`` and every flashcard (seed JSON and ``*-flashcards.csv``) is
+turned into an accent-folded bag of words, weighted with TF-IDF and
+L2-normalised into a SciPy sparse matrix.  Cosine similarities are the rows of
+``X @ X.T``; they are computed a batch of rows at a time, with the batch size
+derived from ``--memory-budget`` so the dense similarity block never outgrows
+it, and only the top ``--top-k`` neighbours of each item are kept.
+Neighbours from the item's own source (other pages of the same PDF, other
+cards of the same deck) are skipped because the app already shows those.
+
+The result is written to ``public/related-content.json`` as an item table and
+one flat ``[index, score, index, score, …]`` list per item (scores are
+cosine similarities scaled to 0–1000), so the browser only fetches it and
+looks neighbours up by index.
+
+Runs are incremental.  Token counts are cached per source file under
+``.cache/`` keyed by content hash, and the vocabulary and IDF weights of the
+last full build are reused, so a run where only some sources changed
+recomputes the neighbours of the changed items, of the items whose lists
+referenced them, and merges the changed items into every other list.  Terms
+that only appear in new material are ignored until the next full build,
+which happens with ``--full`` or automatically once more than
+``_REBUILD_FRACTION`` of the items changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import math
+import re
+import sys
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from extract_store import parse_extract, split_sections
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    import numpy as np
+    from scipy import sparse
+except ImportError as scipy_import_error:  # pragma: no cover - fallback when dependency absent
+    np = None  # type: ignore[assignment]
+    sparse = None  # type: ignore[assignment]
+    SCIPY_IMPORT_ERROR = scipy_import_error
+else:
+    SCIPY_IMPORT_ERROR = None
+
+ROOT = Path(__file__).resolve().parents[1]
+EXTRACTS_DIR = ROOT / "src" / "data" / "subjectExtracts"
+SEED_DIR = ROOT / "src" / "seed"
+OUTPUT_PATH = ROOT / "public" / "related-content.json"
+CACHE_PATH = ROOT / ".cache" / "related-content-cache.json"
+
+CACHE_VERSION = 1
+OUTPUT_VERSION = 1
+DEFAULT_TOP_K = 8
+DEFAULT_MEMORY_BUDGET_MB = 256
+_MAX_FEATURES = 50_000
+_MIN_DF = 2
+_MAX_DF_RATIO = 0.5
+_MIN_SCORE = 0.05
+_MIN_TERMS = 3
+_REBUILD_FRACTION = 0.25
+_SCORE_SCALE = 1000
+_TITLE_LIMIT = 80
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]{2,}")
+_STOPWORDS = frozenset(
+    """
+    alla ante aqui asi aun bajo cada como con contra cual cuando del desde donde dos
+    ella ellas ellos era esa esas ese eso esos esta estas este esto estos fue hace hay
+    las les los mas mismo muy nos otra otro para pero por porque que quien sea segun
+    ser sin sobre son su sus tambien tan tanto tiene tienen todo todos una uno unos
+    unas usa usar ver vez
+    about after also and are been but can each for from has have how into its may
+    more not one only other page slide figure such than that the their them then
+    there these they this through use used was were what when where which while
+    will with would you your
+    """.split()
+)
+
+
+@dataclass
+class Item:
+    id: str
+    kind: str
+    title: str
+    terms: dict[str, int]
+
+
+def tokenize(text: str) -> Counter:
+    """Lower-case, accent-folded word counts without stopwords."""
+
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return Counter(token for token in _TOKEN.findall(folded) if token not in _STOPWORDS)
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= _TITLE_LIMIT else text[: _TITLE_LIMIT - 1] + "…"
+
+
+def _item(kind: str, identifier: str, title: str, text: str) -> Item | None:
+    terms = tokenize(text)
+    if len(terms) < _MIN_TERMS and kind == "extract":
+        return None
+    if not terms:
+        return None
+    return Item(f"{kind}:{identifier}", kind, _shorten(title), dict(terms))
+
+
+def _extract_items(content: str) -> list[Item]:
+    parsed = parse_extract(content)
+    if parsed is None:
+        return []
+    source, _, body = parsed
+    items = []
+    seen: Counter = Counter()
+    for section in split_sections(body):
+        label = section.label or f"Section {section.number}"
+        # Notebook cells can share a number (cell and its outputs); keep ids unique.
+        seen[section.number] += 1
+        anchor = f"{section.number}" if seen[section.number] == 1 else f"{section.number}.{seen[section.number]}"
+        item = _item("extract", f"{source}#{anchor}", f"{source} · {label}", f"{label}\n{section.text}")
+        if item is not None:
+            items.append(item)
+    return items
+
+
+def _card_text(record: dict) -> str:
+    tag = str(record.get("tag") or "")
+    return " ".join((str(record.get("front") or ""), str(record.get("back") or ""), re.sub(r"[>_-]", " ", tag)))
+
+
+def _seed_items(content: str, source: str) -> list[Item]:
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as error:
+        print(f"Skipping {source}: invalid JSON ({error})", file=sys.stderr)
+        return []
+    if not isinstance(data, dict):
+        return []
+
+    items = []
+    for lesson in data.get("lessons") or []:
+        if not isinstance(lesson, dict) or not lesson.get("id"):
+            continue
+        text = "\n".join(
+            (str(lesson.get("title") or ""), " ".join(map(str, lesson.get("tags") or [])), str(lesson.get("markdown") or ""))
+        )
+        item = _item("lesson", str(lesson["id"]), str(lesson.get("title") or lesson["id"]), text)
+        if item is not None:
+            items.append(item)
+    for card in data.get("flashcards") or []:
+        if not isinstance(card, dict) or not card.get("id"):
+            continue
+        item = _item("card", str(card["id"]), str(card.get("front") or card["id"]), _card_text(card))
+        if item is not None:
+            items.append(item)
+    return items
+
+
+def _csv_items(content: str, source: str) -> list[Item]:
+    items = []
+    for row, record in enumerate(csv.DictReader(content.splitlines()), start=1):
+        identifier = (record.get("id") or "").strip() or f"{Path(source).stem}:{row}"
+        item = _item("card", identifier, record.get("front") or identifier, _card_text(record))
+        if item is not None:
+            items.append(item)
+    return items
+
+
+def iter_sources(extracts_dir: Path, seed_dir: Path) -> Iterator[tuple[str, Path]]:
+    """Yield ``(key, path)`` for every file that contributes items."""
+
+    for path in sorted(extracts_dir.rglob("*.txt")):
+        yield f"extracts/{path.relative_to(extracts_dir).as_posix()}", path
+    for path in sorted(seed_dir.rglob("*.json")):
+        yield f"seed/{path.relative_to(seed_dir).as_posix()}", path
+    for path in sorted(seed_dir.rglob("*-flashcards.csv")):
+        yield f"seed/{path.relative_to(seed_dir).as_posix()}", path
+
+
+def read_items(key: str, content: str) -> list[Item]:
+    if key.startswith("extracts/"):
+        return _extract_items(content)
+    if key.endswith(".json"):
+        return _seed_items(content, key)
+    return _csv_items(content, key)
+
+
+# ---------------------------------------------------------------------------
+# Cache and incremental bookkeeping
+# ---------------------------------------------------------------------------
+
+
+def _load_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_cache(path: Path) -> dict:
+    cache = _load_json(path)
+    if cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "sources": {}, "vocabulary": [], "idf": []}
+    return cache
+
+
+def collect_items(
+    sources: Iterable[tuple[str, Path]], cached_sources: dict[str, dict]
+) -> tuple[list[Item], list[str], dict[str, dict], set[str]]:
+    """Read every source, reusing cached token counts for unchanged files.
+
+    Returns the items, the source key of each item, the refreshed cache
+    entries and the ids of items whose source file changed.
+    """
+
+    items: list[Item] = []
+    groups: list[str] = []
+    entries: dict[str, dict] = {}
+    changed: set[str] = set()
+    seen: set[str] = set()
+    for key, path in sources:
+        data = path.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        cached = cached_sources.get(key)
+        if cached is not None and cached.get("hash") == digest:
+            source_items = [Item(**entry) for entry in cached["items"]]
+        else:
+            source_items = read_items(key, data.decode("utf-8", errors="replace"))
+            changed.update(item.id for item in source_items)
+        entries[key] = {"hash": digest, "items": [item.__dict__ for item in source_items]}
+        for item in source_items:
+            # Cards exported both to a seed JSON and its CSV keep their first copy.
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            items.append(item)
+            groups.append(key)
+    return items, groups, entries, changed
+
+
+def build_vocabulary(items: Sequence[Item], max_features: int = _MAX_FEATURES) -> tuple[list[str], list[float]]:
+    """Pick informative terms and their smoothed IDF weights."""
+
+    document_frequency: Counter = Counter()
+    for item in items:
+        document_frequency.update(item.terms.keys())
+    total = len(items)
+    max_df = max(_MIN_DF, int(total * _MAX_DF_RATIO))
+    candidates = [term for term, df in document_frequency.items() if _MIN_DF <= df <= max_df]
+    candidates.sort(key=lambda term: (-document_frequency[term], term))
+    vocabulary = sorted(candidates[:max_features])
+    idf = [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in vocabulary]
+    return vocabulary, idf
+
+
+def tfidf_matrix(items: Sequence[Item], vocabulary: Sequence[str], idf: Sequence[float]):
+    """Return the L2-normalised TF-IDF rows of ``items`` as a CSR matrix."""
+
+    columns = {term: index for index, term in enumerate(vocabulary)}
+    indptr = [0]
+    indices: list[int] = []
+    values: list[float] = []
+    for item in items:
+        for term, count in item.terms.items():
+            column = columns.get(term)
+            if column is not None:
+                indices.append(column)
+                values.append((1 + math.log(count)) * idf[column])
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(items), len(vocabulary)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+def batch_rows(columns: int, budget_bytes: int) -> int:
+    """Rows per similarity block so the dense block and its masks fit the budget."""
+
+    # float32 scores + bool mask + argpartition indices per cell.
+    per_row = max(1, columns) * (4 + 1 + 8)
+    return max(1, budget_bytes // per_row)
+
+
+def top_neighbours(
+    matrix,
+    rows: Sequence[int],
+    columns: Sequence[int],
+    groups: "np.ndarray",
+    top_k: int,
+    budget_bytes: int,
+) -> dict[int, list[tuple[int, float]]]:
+    """Best ``top_k`` neighbours among ``columns`` for each of ``rows``."""
+
+    result: dict[int, list[tuple[int, float]]] = {}
+    if not rows or not columns:
+        return {row: [] for row in rows}
+    column_index = np.asarray(columns)
+    candidates = matrix[column_index].T.tocsc()
+    step = batch_rows(len(columns), budget_bytes)
+    for start in range(0, len(rows), step):
+        row_index = np.asarray(rows[start : start + step])
+        block = (matrix[row_index] @ candidates).toarray()
+        block[groups[row_index][:, None] == groups[column_index][None, :]] = 0
+        keep = min(top_k, block.shape[1])
+        best = np.argpartition(-block, keep - 1, axis=1)[:, :keep]
+        for offset, row in enumerate(row_index.tolist()):
+            scores = block[offset, best[offset]]
+            pairs = [
+                (int(column_index[column]), round(float(score) * _SCORE_SCALE) / _SCORE_SCALE)
+                for column, score in zip(best[offset].tolist(), scores.tolist())
+                if score >= _MIN_SCORE
+            ]
+            pairs.sort(key=lambda pair: (-pair[1], pair[0]))
+            result[row] = pairs
+    return result
+
+
+def _merge(existing: list[tuple[int, float]], extra: list[tuple[int, float]], top_k: int) -> list[tuple[int, float]]:
+    return heapq.nsmallest(top_k, existing + extra, key=lambda pair: (-pair[1], pair[0]))
+
+
+def compute_neighbours(
+    items: Sequence[Item],
+    groups: Sequence[str],
+    vocabulary: Sequence[str],
+    idf: Sequence[float],
+    *,
+    previous: dict[str, list[tuple[str, float]]] | None,
+    changed: set[str],
+    top_k: int,
+    budget_bytes: int,
+) -> tuple[list[list[tuple[int, float]]], int]:
+    """Return the neighbour list of every item and how many rows were recomputed.
+
+    Without ``previous`` every row is computed.  Otherwise rows are recomputed
+    only for changed items and for items whose previous list referenced an item
+    that changed or disappeared; every other list keeps its neighbours and
+    merges in the best changed items.
+    """
+
+    matrix = tfidf_matrix(items, vocabulary, idf)
+    group_numbers: dict[str, int] = {}
+    group_ids = np.asarray([group_numbers.setdefault(group, len(group_numbers)) for group in groups], dtype=np.int64)
+    position = {item.id: index for index, item in enumerate(items)}
+    everything = list(range(len(items)))
+
+    if previous is None:
+        computed = top_neighbours(matrix, everything, everything, group_ids, top_k, budget_bytes)
+        return [computed[row] for row in everything], len(everything)
+
+    dirty: list[int] = []
+    clean: list[int] = []
+    for index, item in enumerate(items):
+        old = previous.get(item.id)
+        if (
+            item.id in changed
+            or old is None
+            or any(neighbour in changed or neighbour not in position for neighbour, _ in old)
+        ):
+            dirty.append(index)
+        else:
+            clean.append(index)
+
+    neighbours: list[list[tuple[int, float]]] = [[] for _ in items]
+    for row, pairs in top_neighbours(matrix, dirty, everything, group_ids, top_k, budget_bytes).items():
+        neighbours[row] = pairs
+    changed_rows = [position[item_id] for item_id in changed if item_id in position]
+    merged = top_neighbours(matrix, clean, changed_rows, group_ids, top_k, budget_bytes)
+    for row in clean:
+        kept = [(position[neighbour], score) for neighbour, score in previous[items[row].id]]
+        neighbours[row] = _merge(kept, merged[row], top_k)
+    return neighbours, len(dirty)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+
+def encode_output(items: Sequence[Item], neighbours: Sequence[list[tuple[int, float]]], top_k: int) -> dict:
+    return {
+        "version": OUTPUT_VERSION,
+        "topK": top_k,
+        "items": [[item.id, item.title] for item in items],
+        "neighbours": [
+            [value for index, score in pairs for value in (index, round(score * _SCORE_SCALE))] for pairs in neighbours
+        ],
+    }
+
+
+def decode_output(data: dict) -> dict[str, list[tuple[str, float]]] | None:
+    """Map item ids to their previously written ``(neighbour id, score)`` lists."""
+
+    if data.get("version") != OUTPUT_VERSION:
+        return None
+    try:
+        ids = [entry[0] for entry in data["items"]]
+        return {
+            ids[row]: [(ids[flat[i]], flat[i + 1] / _SCORE_SCALE) for i in range(0, len(flat), 2)]
+            for row, flat in enumerate(data["neighbours"])
+        }
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.tmp")
+    temporary.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    temporary.replace(path)
+
+
+def build_related_content(
+    *,
+    extracts_dir: Path = EXTRACTS_DIR,
+    seed_dir: Path = SEED_DIR,
+    output_path: Path = OUTPUT_PATH,
+    cache_path: Path = CACHE_PATH,
+    top_k: int = DEFAULT_TOP_K,
+    memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+    full: bool = False,
+) -> str:
+    """Refresh the neighbour table and return a one-line summary."""
+
+    cache = load_cache(cache_path)
+    items, groups, entries, changed = collect_items(iter_sources(extracts_dir, seed_dir), cache["sources"])
+    previous_ids = {item["id"] for entry in cache["sources"].values() for item in entry["items"]}
+    current_ids = {item.id for item in items}
+    removed = previous_ids - current_ids
+
+    written = {} if full else _load_json(output_path)
+    previous = decode_output(written) if written.get("topK") == top_k else None
+    if previous is not None and previous.keys() != previous_ids:
+        previous = None
+    if previous is not None and not (changed or removed):
+        return f"Related content up to date ({len(items)} items)."
+    rebuild = (
+        previous is None
+        or not cache["vocabulary"]
+        or len(changed) + len(removed) > _REBUILD_FRACTION * max(1, len(items))
+    )
+    if rebuild:
+        cache["vocabulary"], cache["idf"] = build_vocabulary(items)
+        previous = None
+
+    neighbours, recomputed = compute_neighbours(
+        items,
+        groups,
+        cache["vocabulary"],
+        cache["idf"],
+        previous=previous,
+        changed=changed,
+        top_k=top_k,
+        budget_bytes=memory_budget_mb * 1024 * 1024,
+    )
+    _write_json(output_path, encode_output(items, neighbours, top_k))
+    cache["sources"] = entries
+    _write_json(cache_path, cache)
+
+    mode = "full build" if rebuild else f"{len(changed)} changed, {len(removed)} removed"
+    return (
+        f"Related content: {len(items)} items, {len(cache['vocabulary'])} terms, "
+        f"{recomputed} neighbour list(s) recomputed ({mode})."
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute related-content links for the app.")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Neighbours kept per item")
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        metavar="MB",
+        help="Upper bound for each similarity block, in MiB",
+    )
+    parser.add_argument("--full", action="store_true", help="Rebuild the vocabulary and every neighbour list")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="Where to write the neighbour table")
+    args = parser.parse_args(argv)
+
+    if SCIPY_IMPORT_ERROR is not None:
+        print(
+            f"Related content requires numpy and scipy ('pip install numpy scipy'): {SCIPY_IMPORT_ERROR}",
+            file=sys.stderr,
+        )
+        return 1
+
+    print(
+        build_related_content(
+            output_path=args.output,
+            top_k=max(1, args.top_k),
+            memory_budget_mb=max(1, args.memory_budget),
+            full=args.full,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,29 @@
 """Automate the study material extraction pipeline before launching the app."""
 from __future__ import annotations
 
+import argparse
 import shutil
 import sys
 import os
 from pathlib import Path
 from typing import Sequence
 
+from build_seed_bundle import build_seed_bundle
+from extract_manifest import load_manifest
+from extraction_scope import SourceScope, add_scope_arguments, iter_scoped_stats, scope_from_args
+from precache_manifest import build_precache_manifest
+from precompress import precompress
+
 ROOT = Path(__file__).resolve().parents[1]
 SUBJECTS_DIR = ROOT / "subjects"
+MANIFEST_PATH = ROOT / ".cache" / "subject-extracts-manifest.json"
 
 
 def _log(message: str) -> None:
     print(f"[pipeline] {message}")
 
 
-def _refresh_pdf_images() -> None:
+def _refresh_pdf_images(scope: SourceScope) -> None:
     if os.environ.get("SKIP_IMAGE_REFRESH") == "1":
         _log("Skipping PDF imagery refresh (SKIP_IMAGE_REFRESH=1).")
         return
@@ -30,7 +38,11 @@ def _refresh_pdf_images() -> None:
     except ImportError as exc:  # pragma: no cover - defensive guard
         raise SystemExit("Unable to import the PDF image extractor module.") from exc
 
-    pdf_files = sorted(SUBJECTS_DIR.rglob("*.pdf"))
+    pdf_files = sorted(
+        SUBJECTS_DIR / stat.relative
+        for stat in iter_scoped_stats(SUBJECTS_DIR, scope)
+        if stat.relative.lower().endswith(".pdf")
+    )
     if not pdf_files:
         _log("No PDF files found under subjects/; skipping image refresh.")
         return
@@ -52,16 +64,68 @@ def _run_text_extraction(argv: Sequence[str] | None = None) -> int:
     return extract_main(argv)
 
 
+def _refresh_related_content() -> None:
+    if os.environ.get("SKIP_RELATED_CONTENT") == "1":
+        _log("Skipping related-content graph (SKIP_RELATED_CONTENT=1).")
+        return
+
+    import related_content
+
+    if related_content.SCIPY_IMPORT_ERROR is not None:
+        _log("numpy/scipy not installed; skipping related-content graph ('pip install numpy scipy').")
+        return
+    _log(related_content.build_related_content())
+
+
+def _verify_extracts(scope: SourceScope) -> bool:
+    """Compare the extracts in ``scope`` with their sources; False on regressions."""
+
+    if os.environ.get("SKIP_EXTRACT_VERIFY") == "1":
+        _log("Skipping extract fidelity check (SKIP_EXTRACT_VERIFY=1).")
+        return True
+
+    import verify_extracts
+
+    summary, regressions = verify_extracts.verify_extracts(scope)
+    _log(summary)
+    for regression in regressions:
+        _log(f"Extract regressed: {regression}")
+    return not regressions
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     if not SUBJECTS_DIR.exists():
         _log("subjects/ directory not found; skipping automatic extraction.")
         return 0
 
+    # Resolve the scope once (``--paths-from -`` consumes stdin) and forward it
+    # to the text extractor in canonical form alongside the remaining options.
+    parser = argparse.ArgumentParser(add_help=False)
+    add_scope_arguments(parser)
+    args, extractor_argv = parser.parse_known_args(argv)
+    try:
+        scope = scope_from_args(args, SUBJECTS_DIR, load_manifest(MANIFEST_PATH))
+    except ValueError as error:
+        _log(f"Invalid scope: {error}")
+        return 2
+
     _log("Refreshing PDF imagery...")
-    _refresh_pdf_images()
+    _refresh_pdf_images(scope)
 
     _log("Generating text extracts...")
-    exit_code = _run_text_extraction(argv)
+    exit_code = _run_text_extraction(extractor_argv + scope.to_args())
+    if exit_code == 0:
+        _log("Verifying extract fidelity...")
+        if not _verify_extracts(scope):
+            exit_code = 1
+        _log("Updating related-content graph...")
+        _refresh_related_content()
+        _log("Precompiling seed bundle...")
+        _log(build_seed_bundle())
+        _log("Writing service-worker precache manifest...")
+        _log(build_precache_manifest())
+        _log("Precompressing text outputs...")
+        _log(precompress())
     if exit_code == 0:
         _log("Content pipeline finished successfully.")
     else:
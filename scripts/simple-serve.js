@@ -14,6 +14,7 @@ const extractionImagesDir = path.join(subjectsDir, 'tmp-extracted-images');
 const extractsOutputDir = path.join(rootDir, 'src', 'data', 'subjectExtracts');
 const publicDir = path.join(rootDir, 'public');
 const publicAssetsDir = path.join(publicDir, 'subject-assets');
+const precompressedManifestPath = path.join(rootDir, '.cache', 'precompressed-manifest.json');
 const DEFAULT_PORT = 5173;
 const PYTHON_BIN = process.env.PYTHON_PATH || process.env.PYTHON || 'python3';
 
@@ -86,6 +87,54 @@ const statWithUnicodeVariants = (filePath, callback) => {
   tryVariant(0);
 };
 
+// Written by scripts/precompress.py: for each text output, the source size and
+// mtime plus the byte size of its .br/.gz siblings. Re-read when it changes so a
+// pipeline run does not require restarting the server.
+let precompressedFiles = {};
+
+const loadPrecompressedManifest = () => {
+  try {
+    const manifest = JSON.parse(fs.readFileSync(precompressedManifestPath, 'utf8'));
+    precompressedFiles = manifest && typeof manifest.files === 'object' ? manifest.files : {};
+  } catch (error) {
+    precompressedFiles = {};
+  }
+};
+
+loadPrecompressedManifest();
+fs.watchFile(precompressedManifestPath, { interval: 2000 }, loadPrecompressedManifest).unref();
+
+const precompressedEncodings = [
+  { encoding: 'br', suffix: '.br' },
+  { encoding: 'gzip', suffix: '.gz' },
+];
+
+const acceptsEncoding = (header, encoding) =>
+  header.split(',').some((part) => {
+    const [name, ...params] = part.trim().split(';');
+    if (name.trim().toLowerCase() !== encoding) return false;
+    const quality = params.map((param) => param.trim()).find((param) => param.startsWith('q='));
+    return !quality || Number(quality.slice(2)) > 0;
+  });
+
+const findPrecompressed = (req, resolvedPath, stats) => {
+  const header = String(req.headers['accept-encoding'] || '');
+  if (!header) return null;
+
+  const relativePath = path.relative(rootDir, resolvedPath).split(path.sep).join('/');
+  const entry = precompressedFiles[relativePath];
+  if (!entry || entry.size !== stats.size || entry.mtime !== Math.floor(stats.mtimeMs)) {
+    return null;
+  }
+
+  for (const { encoding, suffix } of precompressedEncodings) {
+    if (typeof entry[encoding] === 'number' && acceptsEncoding(header, encoding)) {
+      return { encoding, path: `${resolvedPath}${suffix}`, size: entry[encoding] };
+    }
+  }
+  return null;
+};
+
 const safeJoin = (base, targetPath) => {
   const target = path.resolve(base, targetPath);
   if (!target.startsWith(base)) {
@@ -464,11 +513,22 @@ const manifestHandler = (res) => {
   res.end(body);
 };
 
-const serveFile = (res, filePath, method, stats) => {
+const serveFile = (req, res, filePath, method, stats) => {
   const handleFile = (resolvedPath, resolvedStats) => {
     const ext = path.extname(resolvedPath).toLowerCase();
     const contentType = mimeTypes[ext] || 'application/octet-stream';
     const headers = { 'Content-Type': contentType };
+    const precompressed = resolvedStats ? findPrecompressed(req, resolvedPath, resolvedStats) : null;
+    let bodyPath = resolvedPath;
+
+    if (precompressed) {
+      headers['Content-Encoding'] = precompressed.encoding;
+      headers['Content-Length'] = precompressed.size;
+      headers.Vary = 'Accept-Encoding';
+      bodyPath = precompressed.path;
+    } else if (resolvedStats) {
+      headers['Content-Length'] = resolvedStats.size;
+    }
 
     const isImmutableAsset =
       resolvedPath.includes(`${path.sep}assets${path.sep}`) &&
@@ -484,7 +544,7 @@ const serveFile = (res, filePath, method, stats) => {
       return;
     }
 
-    const stream = fs.createReadStream(resolvedPath);
+    const stream = fs.createReadStream(bodyPath);
     stream.on('error', (error) => {
       console.error('[simple-serve] Failed to read file:', error);
       if (!res.headersSent) {
@@ -559,7 +619,7 @@ const createCandidatePaths = (pathname) => {
   return Array.from(candidates);
 };
 
-const tryCandidates = (res, candidates, method) => {
+const tryCandidates = (req, res, candidates, method) => {
   if (candidates.length === 0) {
     res.statusCode = 404;
     res.end('Not Found');
@@ -570,7 +630,7 @@ const tryCandidates = (res, candidates, method) => {
   statWithUnicodeVariants(current, (statError, result) => {
     if (statError) {
       if (statError.code === 'ENOENT') {
-        tryCandidates(res, rest, method);
+        tryCandidates(req, res, rest, method);
         return;
       }
       console.error('[simple-serve] Failed to stat path:', current, statError);
@@ -585,24 +645,24 @@ const tryCandidates = (res, candidates, method) => {
       const indexPath = path.join(resolvedPath, 'index.html');
       statWithUnicodeVariants(indexPath, (indexError, indexResult) => {
         if (!indexError && indexResult?.stats?.isFile()) {
-          serveFile(res, indexResult.path, method, indexResult.stats);
+          serveFile(req, res, indexResult.path, method, indexResult.stats);
         } else if (indexError && indexError.code !== 'ENOENT') {
           console.error('[simple-serve] Failed to stat index path:', indexPath, indexError);
           res.statusCode = 500;
           res.end('Internal Server Error');
         } else {
-          tryCandidates(res, rest, method);
+          tryCandidates(req, res, rest, method);
         }
       });
       return;
     }
 
     if (stats.isFile()) {
-      serveFile(res, resolvedPath, method, stats);
+      serveFile(req, res, resolvedPath, method, stats);
       return;
     }
 
-    tryCandidates(res, rest, method);
+    tryCandidates(req, res, rest, method);
   });
 };
 
@@ -654,12 +714,12 @@ const server = http.createServer((req, res) => {
   }
 
   if (pathname === '/' || pathname === '') {
-    serveFile(res, defaultDocumentPath, method);
+    serveFile(req, res, defaultDocumentPath, method);
     return;
   }
 
   const candidates = createCandidatePaths(pathname);
-  tryCandidates(res, candidates, method);
+  tryCandidates(req, res, candidates, method);
 });
 
 const envPort = Number(process.env.PORT);
@@ -0,0 +1,72 @@
+"""Read-only, memory-mapped view of one source file.
+
+A PDF used to be read from disk separately by every consumer: pypdf copied the
+whole file into a ``BytesIO``, PyMuPDF opened it again for the figures and the
+cross-reference repair, and change detection hashed it in a third pass.  A
+:class:`SourceBuffer` maps the file once and hands the same pages to all of
+them:
+
+* :meth:`SourceBuffer.stream` is the mapping itself, a seekable binary file
+  object pypdf reads without copying the file;
+* :attr:`SourceBuffer.view` is a ``memoryview`` for ``fitz.open(stream=...)``;
+* :meth:`SourceBuffer.digest` hashes the mapping; the PDF extractor returns it
+  with its result, so the manifest digest costs no extra read.
+
+Only the standard library is used, so ``extract_manifest`` can rely on it too.
+Files that cannot be mapped (empty files, special files) are read into memory
+instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+from pathlib import Path
+from typing import BinaryIO
+
+DIGEST_SIZE = 20
+
+
+class SourceBuffer:
+    """Map ``path`` for reading; use as a context manager."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map: mmap.mmap | None = None
+        self._data = b""
+        with path.open("rb") as handle:
+            try:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self._data = handle.read()
+        self.view = memoryview(self._map if self._map is not None else self._data)
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def __enter__(self) -> SourceBuffer:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def stream(self) -> BinaryIO:
+        """A binary file object over the mapping, rewound; one reader at a time."""
+
+        if self._map is None:
+            return io.BytesIO(self._data)
+        self._map.seek(0)
+        return self._map  # type: ignore[return-value]
+
+    def digest(self) -> str:
+        return hashlib.blake2b(self.view, digest_size=DIGEST_SIZE).hexdigest()
+
+    def close(self) -> None:
+        try:
+            self.view.release()
+            if self._map is not None:
+                self._map.close()
+        except BufferError:
+            # A parser still holds a view; the mapping is unmapped once it is collected.
+            pass
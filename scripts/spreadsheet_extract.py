@@ -0,0 +1,194 @@
+"""Bounded, streaming text extraction for XLSX and XLS workbooks.
+
+Exported datasets can contain tens of thousands of rows, and dumping every
+cell into the extract inflates the app bundle without helping anyone study.
+The readers in this module stream rows one at a time (openpyxl in read-only
+mode, xlrd with on-demand sheet loading) and write them straight to an output
+stream.  Each sheet is capped at a configurable number of rows and columns;
+anything beyond the caps is replaced by an elided-range marker, and every sheet
+ends with a compact summary of its dimensions, header row and column types so
+the omitted data is still described.
+"""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    from openpyxl import load_workbook  # type: ignore
+except ImportError as openpyxl_import_error:  # pragma: no cover - fallback when dependency absent
+    load_workbook = None  # type: ignore[assignment]
+    OPENPYXL_IMPORT_ERROR = openpyxl_import_error
+else:
+    OPENPYXL_IMPORT_ERROR = None
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    import xlrd  # type: ignore
+except ImportError as xlrd_import_error:  # pragma: no cover - fallback when dependency absent
+    xlrd = None  # type: ignore[assignment]
+    XLRD_IMPORT_ERROR = xlrd_import_error
+else:
+    XLRD_IMPORT_ERROR = None
+
+
+# (raw value, kind) where kind is one of "", "text", "number", "date" or
+# "boolean"; an empty kind marks a blank cell.  Values are only converted to
+# text for rows that actually make it into the extract.
+Cell = tuple[Any, str]
+
+
+@dataclass(frozen=True)
+class SheetLimits:
+    """Per-sheet caps applied while writing a workbook extract.
+
+    ``None`` disables the corresponding cap.  Column types are inferred from the
+    first ``type_sample_rows`` rows below the header.
+    """
+
+    max_rows: int | None = 200
+    max_columns: int | None = 30
+    type_sample_rows: int = 50
+
+
+def _python_kind(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return "text" if value.strip() else ""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+        return "date"
+    return "text" if str(value).strip() else ""
+
+
+def _cell_text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _shorten(text: str, limit: int = 40) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _describe_types(kinds: list[set[str]]) -> list[str]:
+    described = []
+    for column_kinds in kinds:
+        if not column_kinds:
+            described.append("empty")
+        elif len(column_kinds) == 1:
+            described.append(next(iter(column_kinds)))
+        else:
+            described.append("mixed")
+    return described
+
+
+def write_sheet(out: TextIO, title: str, rows: Iterable[list[Cell]], limits: SheetLimits) -> None:
+    """Write one sheet block, honouring ``limits``, as rows arrive."""
+
+    out.write(f"### Sheet: {title}\n")
+    max_columns = limits.max_columns
+    written = 0
+    total = 0
+    width = 0
+    header: list[str] = []
+    kinds: list[set[str]] = []
+
+    for row in rows:
+        last_filled = 0
+        for column_index, (_, kind) in enumerate(row, start=1):
+            if kind:
+                last_filled = column_index
+        if not last_filled:
+            continue
+        total += 1
+        width = max(width, last_filled)
+
+        if limits.max_rows is not None and written >= limits.max_rows:
+            continue
+        visible = row if max_columns is None else row[:max_columns]
+        texts = [_cell_text(value) for value, _ in visible]
+        out.write("\t".join(texts))
+        out.write("\n")
+        written += 1
+
+        if written == 1:
+            header = [text.strip() for text in texts]
+        elif written <= limits.type_sample_rows + 1:
+            if len(kinds) < len(visible):
+                kinds.extend(set() for _ in range(len(visible) - len(kinds)))
+            for column_kinds, (_, kind) in zip(kinds, visible):
+                if kind:
+                    column_kinds.add(kind)
+
+    if total > written:
+        out.write(f"[… rows {written + 1}–{total} elided ({total - written} rows) …]\n")
+    if total:
+        shown = width if max_columns is None else min(width, max_columns)
+        names = (header + [""] * shown)[:shown]
+        types = _describe_types((kinds + [set() for _ in range(shown)])[:shown])
+        columns = ", ".join(
+            f"{_shorten(name) or f'column {index}'} ({kind})"
+            for index, (name, kind) in enumerate(zip(names, types), start=1)
+        )
+        summary = f"Sheet summary: {total} rows × {width} columns; columns: {columns}"
+        if width > shown:
+            summary += f"; columns {shown + 1}–{width} elided"
+        out.write(summary + "\n")
+    out.write("\n")
+
+
+def _xlsx_rows(sheet: Any) -> Iterator[list[Cell]]:
+    for row in sheet.iter_rows(values_only=True):
+        yield [(value, _python_kind(value)) for value in row]
+
+
+def write_xlsx(path: Path, out: TextIO, limits: SheetLimits) -> None:
+    if load_workbook is None:  # pragma: no cover - guarded by the caller
+        raise RuntimeError("openpyxl dependency is not available")
+
+    workbook = load_workbook(path, data_only=True, read_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            write_sheet(out, sheet.title, _xlsx_rows(sheet), limits)
+    finally:
+        workbook.close()
+
+
+# xlrd cell types: 0 empty, 1 text, 2 number, 3 date, 4 boolean, 5 error, 6 blank.
+_XLRD_KINDS = {1: "text", 2: "number", 3: "date", 4: "boolean", 5: "text"}
+
+
+def _xls_cell(cell: Any) -> Cell:
+    value = cell.value
+    if value in ("", None):
+        return None, ""
+    if isinstance(value, str) and not value.strip():
+        return value, ""
+    return value, _XLRD_KINDS.get(cell.ctype, "text")
+
+
+def _xls_rows(sheet: Any) -> Iterator[list[Cell]]:
+    for row_index in range(sheet.nrows):
+        yield [_xls_cell(cell) for cell in sheet.row(row_index)]
+
+
+def write_xls(path: Path, out: TextIO, limits: SheetLimits) -> None:
+    if xlrd is None:  # pragma: no cover - guarded by the caller
+        raise RuntimeError("xlrd dependency is not available")
+
+    # ``on_demand`` parses one sheet at a time so only the sheet being written
+    # is materialised; it is released again before moving on.
+    workbook = xlrd.open_workbook(path, on_demand=True)
+    try:
+        for sheet_index in range(workbook.nsheets):
+            sheet = workbook.sheet_by_index(sheet_index)
+            write_sheet(out, sheet.name, _xls_rows(sheet), limits)
+            workbook.unload_sheet(sheet_index)
+    finally:
+        workbook.release_resources()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""Check every extract under ``src/data/subjectExtracts`` against its source.
+
+For PDFs the verifier re-reads the source with an independent parser (PyMuPDF
+when installed, pypdf otherwise) and compares, page by page:
+
+* the page count with the ``### Page N`` sections of the extract (a page with
+  text in the PDF must have a section, and no section may point past the end);
+* the text, as the similarity of the character trigrams of both sides with
+  whitespace removed, so different line breaking or spacing between parsers
+  does not count as a difference, and their character counts;
+* the figures: every referenced image must exist on disk, and with PyMuPDF the
+  number of figures per page must match what ``pdf_image_extractor`` writes
+  (one per distinct embedded image, or a single page snapshot).
+
+PDFs longer than ``--sample-pages`` only have a deterministic sample of pages
+compared (first, last and a spread chosen from the file's path and size);
+their page count is always checked in full.  Other sources are checked for a
+present, non-empty extract that names them and did not record a failure.
+
+Sources are verified in parallel worker processes, and only when the source or
+its extract changed since the previous run (fingerprints are cached in
+``.cache/``).  The report is stable, sorted JSON, so two runs can be diffed.
+The exit status is 1 when a source regressed against the previous report
+(``--strict``: when any source fails).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Sequence
+
+from extract_manifest import extract_relative_path
+from extraction_scope import SourceScope, add_scope_arguments, iter_scoped_stats, scope_from_args
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    import fitz  # PyMuPDF
+except ImportError as fitz_import_error:  # pragma: no cover - fallback when dependency absent
+    fitz = None  # type: ignore[assignment]
+    FITZ_IMPORT_ERROR = fitz_import_error
+else:
+    FITZ_IMPORT_ERROR = None
+
+try:  # pragma: no cover - optional dependency may be missing in CI environments
+    from pypdf import PdfReader
+except ImportError as pypdf_import_error:  # pragma: no cover - fallback when dependency absent
+    PdfReader = None  # type: ignore[assignment]
+    PYPDF_IMPORT_ERROR = pypdf_import_error
+else:
+    PYPDF_IMPORT_ERROR = None
+
+ROOT = Path(__file__).resolve().parents[1]
+SUBJECTS_DIR = ROOT / "subjects"
+EXTRACTS_DIR = ROOT / "src" / "data" / "subjectExtracts"
+REPORT_PATH = ROOT / ".cache" / "extract-fidelity.json"
+CACHE_PATH = ROOT / ".cache" / "extract-fidelity-cache.json"
+
+REPORT_VERSION = 1
+DEFAULT_SAMPLE_PAGES = 40
+WARN_SIMILARITY = 0.9
+FAIL_SIMILARITY = 0.5
+# Pages with fewer non-space characters than this may legitimately be dropped.
+MIN_PAGE_CHARS = 20
+_MAX_LISTED_PAGES = 10
+_STATUS_RANK = {"ok": 0, "skipped": 0, "warn": 1, "fail": 2}
+
+_PAGE_HEADER = re.compile(r"^### Page (\d+)$", re.MULTILINE)
+_FIGURE_LINE = re.compile(r"!\[Page (\d+), Figure \d+\]\(([^)]+)\)")
+_FIGURE_PLACEHOLDER = re.compile(r"^\[Figures for page \d+ are still being extracted\]$", re.MULTILINE)
+# Placeholders written instead of content when an extractor failed or was unavailable.
+_FAILURE_MARKER = re.compile(
+    r"^\[(?:Failed to extract|Extraction (?:aborted|failed)|Unsupported file type|[^\]\n]* requires [^\]\n]* installed)"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _trigrams(text: str) -> Counter[str]:
+    compact = _WHITESPACE.sub("", text.casefold())
+    return Counter(compact[index : index + 3] for index in range(len(compact) - 2))
+
+
+def text_similarity(first: str, second: str) -> float:
+    """Dice coefficient of the character trigram multisets (1.0 when both are empty)."""
+
+    first_grams, second_grams = _trigrams(first), _trigrams(second)
+    total = sum(first_grams.values()) + sum(second_grams.values())
+    if not total:
+        return 1.0
+    return 2 * sum((first_grams & second_grams).values()) / total
+
+
+def _char_count(text: str) -> int:
+    return len(_WHITESPACE.sub("", text))
+
+
+def split_extract(content: str) -> tuple[str, str, dict[int, str]]:
+    """Return ``(source line, body, {page: section})`` of an extract file."""
+
+    header, _, body = content.partition("\n\n")
+    source = next((line[len("Source: ") :] for line in header.splitlines() if line.startswith("Source: ")), "")
+    pages: dict[int, str] = {}
+    matches = list(_PAGE_HEADER.finditer(body))
+    for match, following in zip(matches, [*matches[1:], None]):
+        end = following.start() if following else len(body)
+        pages[int(match.group(1))] = body[match.end() : end]
+    return source, body.strip(), pages
+
+
+def sample_pages(relative: str, size: int, page_count: int, limit: int) -> list[int]:
+    """Pages (1-based) to compare; all of them unless there are more than ``limit``."""
+
+    if page_count <= limit:
+        return list(range(1, page_count + 1))
+    chosen = {1, 2, page_count}
+    seed = int.from_bytes(hashlib.blake2b(f"{relative}\0{size}".encode("utf-8"), digest_size=8).digest(), "big")
+    remaining = [page for page in range(3, page_count) if page not in chosen]
+    chosen.update(random.Random(seed).sample(remaining, max(0, limit - len(chosen))))
+    return sorted(chosen)
+
+
+def _resolve_figure(root: Path, reference: str) -> Path:
+    # Extracts reference figures as ``../../public/...`` relative to the repository root.
+    return root / (reference[len("../../") :] if reference.startswith("../../") else reference)
+
+
+class _PdfPages:
+    """Page count, text and expected figure count of a PDF with whichever parser is available."""
+
+    def __init__(self, path: Path) -> None:
+        if fitz is not None:
+            self.document = fitz.open(path)
+            self.page_count = self.document.page_count
+        else:
+            self.document = PdfReader(path)
+            self.page_count = len(self.document.pages)
+
+    def text(self, page: int) -> str:
+        if fitz is not None:
+            return self.document[page - 1].get_text()
+        return self.document.pages[page - 1].extract_text() or ""
+
+    def expected_figures(self, page: int) -> int | None:
+        if fitz is None:
+            return None
+        xrefs = {image[0] for image in self.document[page - 1].get_images(full=True)}
+        # pdf_image_extractor renders a snapshot of pages without embedded images.
+        return max(len(xrefs), 1)
+
+    def close(self) -> None:
+        closer = getattr(self.document, "close", None)
+        if callable(closer):
+            closer()
+
+
+def _verify_pdf(source: Path, relative: str, pages: dict[int, str], root: Path, limit: int) -> dict[str, Any]:
+    problems: list[str] = []
+    status = "ok"
+
+    def flag(level: str, message: str) -> None:
+        nonlocal status
+        problems.append(message)
+        if _STATUS_RANK[level] > _STATUS_RANK[status]:
+            status = level
+
+    try:
+        pdf = _PdfPages(source)
+    except Exception as error:  # pragma: no cover - depends on the parser
+        return {"status": "fail", "problems": [f"PDF could not be opened: {error}"]}
+
+    try:
+        sampled = sample_pages(relative, source.stat().st_size, pdf.page_count, limit)
+        beyond = sorted(page for page in pages if page > pdf.page_count)
+        if beyond:
+            flag("fail", f"extract has page(s) {beyond[:_MAX_LISTED_PAGES]} beyond the PDF's {pdf.page_count}")
+
+        source_chars = extract_chars = 0
+        similarities: list[float] = []
+        low_pages: list[dict[str, Any]] = []
+        missing_pages: list[int] = []
+        figure_mismatches: list[int] = []
+        missing_figures = referenced = expected = 0
+        pending = False
+        for page in sampled:
+            section = pages.get(page, "")
+            figures = _FIGURE_LINE.findall(section)
+            pending = pending or bool(_FIGURE_PLACEHOLDER.search(section))
+            extract_text = _FIGURE_PLACEHOLDER.sub("", _FIGURE_LINE.sub("", section))
+            pdf_text = pdf.text(page)
+            page_source_chars, page_extract_chars = _char_count(pdf_text), _char_count(extract_text)
+            source_chars += page_source_chars
+            extract_chars += page_extract_chars
+            if page not in pages and page_source_chars >= MIN_PAGE_CHARS:
+                missing_pages.append(page)
+            similarity = text_similarity(pdf_text, extract_text)
+            similarities.append(similarity)
+            if similarity < WARN_SIMILARITY and page in pages:
+                low_pages.append(
+                    {
+                        "page": page,
+                        "similarity": round(similarity, 3),
+                        "sourceChars": page_source_chars,
+                        "extractChars": page_extract_chars,
+                    }
+                )
+
+            referenced += len(figures)
+            missing_figures += sum(not _resolve_figure(root, reference).is_file() for _, reference in figures)
+            page_expected = pdf.expected_figures(page)
+            if page_expected is not None:
+                expected += page_expected
+                if page in pages and len(figures) != page_expected and not pending:
+                    figure_mismatches.append(page)
+    finally:
+        pdf.close()
+
+    if missing_pages:
+        flag("fail", f"page(s) with text missing from the extract: {missing_pages[:_MAX_LISTED_PAGES]}")
+    if any(entry["similarity"] < FAIL_SIMILARITY for entry in low_pages):
+        flag("fail", f"page text differs from the PDF (similarity < {FAIL_SIMILARITY})")
+    elif low_pages:
+        flag("warn", f"page text partly differs from the PDF (similarity < {WARN_SIMILARITY})")
+    if missing_figures:
+        flag("fail", f"{missing_figures} referenced figure file(s) missing")
+    if pending:
+        flag("warn", "figures are still being backfilled")
+    elif figure_mismatches:
+        flag("warn", f"figure count differs on page(s) {figure_mismatches[:_MAX_LISTED_PAGES]}")
+
+    entry: dict[str, Any] = {
+        "status": status,
+        "pages": pdf.page_count,
+        "extractPages": len(pages),
+        "sampledPages": len(sampled),
+        "sourceChars": source_chars,
+        "extractChars": extract_chars,
+        "similarity": round(min(similarities), 3) if similarities else None,
+        "figures": {"referenced": referenced, "missing": missing_figures},
+        "problems": problems,
+    }
+    if fitz is not None:
+        entry["figures"]["expected"] = expected
+    if low_pages:
+        entry["lowPages"] = sorted(low_pages, key=lambda item: item["similarity"])[:_MAX_LISTED_PAGES]
+    return entry
+
+
+def verify_source(job: tuple[str, str, str, str, int]) -> tuple[str, dict[str, Any]]:
+    """Verify one source; ``job`` is picklable so it can run in a worker process."""
+
+    relative, subjects_dir, extracts_dir, root, limit = job
+    source = Path(subjects_dir) / relative
+    extract = Path(extracts_dir) / extract_relative_path(relative)
+    kind = source.suffix.lower().lstrip(".") or "file"
+    if not extract.is_file():
+        return relative, {"kind": kind, "status": "fail", "problems": ["extract is missing"]}
+
+    recorded_source, body, pages = split_extract(extract.read_text(encoding="utf-8", errors="replace"))
+    if recorded_source != f"subjects/{relative}":
+        # The source's own content never reached the app.
+        return relative, {"kind": kind, "status": "fail", "problems": [f"extract belongs to {recorded_source}"]}
+    if _FAILURE_MARKER.match(body):
+        return relative, {"kind": kind, "status": "fail", "problems": [body.splitlines()[0][:200]]}
+    if kind != "pdf":
+        status, problems = ("ok", []) if body else ("fail", ["extract is empty"])
+        return relative, {"kind": kind, "status": status, "extractChars": _char_count(body), "problems": problems}
+    if fitz is None and PdfReader is None:
+        return relative, {"kind": kind, "status": "skipped", "problems": ["no PDF parser installed"]}
+    return relative, {"kind": kind, **_verify_pdf(source, relative, pages, Path(root), limit)}
+
+
+def _load_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _fingerprint(relative: str, size: int, mtime_ns: int, extracts_dir: Path, limit: int) -> list:
+    try:
+        stat = (extracts_dir / extract_relative_path(relative)).stat()
+        extract = [stat.st_size, stat.st_mtime_ns]
+    except FileNotFoundError:
+        extract = [None, None]
+    return [size, mtime_ns, *extract, limit, "fitz" if fitz is not None else "pypdf"]
+
+
+def find_regressions(previous: dict[str, dict], current: dict[str, dict]) -> list[str]:
+    """Describe the sources whose status got worse since the previous report."""
+
+    regressions = []
+    for relative, entry in sorted(current.items()):
+        before = previous.get(relative)
+        before_status = before["status"] if before else "ok"
+        if entry["status"] == "fail" and _STATUS_RANK[before_status] < _STATUS_RANK["fail"]:
+            problems = "; ".join(entry.get("problems", [])) or "failed"
+            regressions.append(f"{relative}: {before_status} → fail ({problems})")
+    return regressions
+
+
+def verify_extracts(
+    scope: SourceScope = SourceScope(),
+    *,
+    root: Path = ROOT,
+    subjects_dir: Path = SUBJECTS_DIR,
+    extracts_dir: Path = EXTRACTS_DIR,
+    report_path: Path = REPORT_PATH,
+    cache_path: Path = CACHE_PATH,
+    sample_limit: int = DEFAULT_SAMPLE_PAGES,
+    jobs: int | None = None,
+) -> tuple[str, list[str]]:
+    """Refresh the report for the sources in ``scope``; returns ``(summary, regressions)``."""
+
+    previous_report = _load_json(report_path)
+    previous = previous_report.get("sources", {}) if previous_report.get("version") == REPORT_VERSION else {}
+    cache = _load_json(cache_path)
+
+    stats = {stat.relative: stat for stat in iter_scoped_stats(subjects_dir, scope)}
+    sources: dict[str, dict] = {}
+    fingerprints: dict[str, list] = {}
+    if not scope.is_full:
+        # Keep the entries of out-of-scope sources that still exist.
+        for relative, entry in previous.items():
+            if not scope.matches(relative) and (subjects_dir / relative).is_file():
+                sources[relative] = entry
+                if relative in cache:
+                    fingerprints[relative] = cache[relative]
+
+    pending = []
+    for relative, stat in stats.items():
+        fingerprint = _fingerprint(relative, stat.size, stat.mtime_ns, extracts_dir, sample_limit)
+        fingerprints[relative] = fingerprint
+        if cache.get(relative) == fingerprint and relative in previous:
+            sources[relative] = previous[relative]
+        else:
+            pending.append((relative, str(subjects_dir), str(extracts_dir), str(root), sample_limit))
+
+    if pending:
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+        if workers == 1:
+            results = map(verify_source, pending)
+        else:
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(verify_source, pending)
+        try:
+            for relative, entry in results:
+                sources[relative] = entry
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+
+    regressions = find_regressions(previous, sources) if previous_report else []
+    counts = Counter(entry["status"] for entry in sources.values())
+    report = {
+        "version": REPORT_VERSION,
+        "parser": "pymupdf" if fitz is not None else "pypdf",
+        "summary": {status: counts.get(status, 0) for status in ("ok", "warn", "fail", "skipped")},
+        "sources": dict(sorted(sources.items())),
+    }
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(fingerprints, separators=(",", ":")), encoding="utf-8")
+
+    summary = (
+        f"Verified {len(pending)} of {len(stats)} source(s): {counts.get('ok', 0)} ok, {counts.get('warn', 0)} warn, "
+        f"{counts.get('fail', 0)} fail, {counts.get('skipped', 0)} skipped; {len(regressions)} regression(s)."
+    )
+    return summary, regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare every extract with its source document.")
+    add_scope_arguments(parser)
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--sample-pages",
+        type=int,
+        default=DEFAULT_SAMPLE_PAGES,
+        help="Compare at most this many pages per PDF (default: %(default)s)",
+    )
+    parser.add_argument("--report", type=Path, default=REPORT_PATH, help="Where to write the JSON report")
+    parser.add_argument("--full", action="store_true", help="Ignore the fingerprint cache and verify every source")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 when any source fails")
+    args = parser.parse_args(argv)
+
+    try:
+        scope = scope_from_args(args, SUBJECTS_DIR)
+    except ValueError as error:
+        parser.error(str(error))
+    if fitz is None:
+        print("PyMuPDF is not installed; comparing PDFs with pypdf and skipping figure counts.", file=sys.stderr)
+    if args.full:
+        CACHE_PATH.unlink(missing_ok=True)
+
+    summary, regressions = verify_extracts(
+        scope, report_path=args.report, sample_limit=max(3, args.sample_pages), jobs=args.jobs
+    )
+    print(summary)
+    for regression in regressions:
+        print(f"  regressed: {regression}")
+    if args.strict:
+        failing = [relative for relative, entry in _load_json(args.report)["sources"].items() if entry["status"] == "fail"]
+        for relative in failing:
+            print(f"  failing: {relative}")
+        return 1 if failing or regressions else 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
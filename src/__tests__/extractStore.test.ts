@@ -0,0 +1,76 @@
+/** @jest-environment node */
+import fs from 'node:fs';
+import path from 'node:path';
+import os from 'node:os';
+import { execFile } from 'node:child_process';
+import { promisify } from 'node:util';
+import { searchExtracts } from '../server/extractStore';
+
+jest.setTimeout(30000);
+
+const execFileAsync = promisify(execFile);
+
+describe('SQLite extract store', () => {
+  const repoRoot = path.resolve(__dirname, '..', '..');
+  const scriptPath = path.resolve(repoRoot, 'scripts', 'extract_store.py');
+  let tempDir: string;
+  let dbPath: string;
+
+  beforeAll(async () => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'extract-store-test-'));
+    const extractsDir = path.join(tempDir, 'extracts');
+    fs.mkdirSync(path.join(extractsDir, 'Dbd'), { recursive: true });
+    fs.writeFileSync(
+      path.join(extractsDir, 'Dbd', 'tema5.txt'),
+      [
+        '# Extracted content',
+        'Source: subjects/Dbd/tema5.pdf',
+        '',
+        '### Page 1',
+        'Diseño lógico de bases de datos',
+        '',
+        '### Page 2',
+        'La normalización elimina redundancias.',
+        '![Page 2, Figure 1](../../public/subject-assets/Dbd/tema5/fig.png)',
+        '',
+      ].join('\n'),
+      'utf8'
+    );
+    dbPath = path.join(tempDir, 'extracts.sqlite');
+    await execFileAsync('python3', [scriptPath, '--db', dbPath, 'import', '--extracts-dir', extractsDir], {
+      encoding: 'utf8',
+    });
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  it('finds pages with accent-insensitive full-text queries', async () => {
+    const results = await searchExtracts('normalizacion', { dbPath, subject: 'Dbd' });
+
+    expect(results).toHaveLength(1);
+    expect(results[0]).toMatchObject({ source: 'Dbd/tema5.pdf', page: 2, label: 'Page 2' });
+    expect(results[0].snippet).toContain('[normalización]');
+  });
+
+  it('filters by subject', async () => {
+    await expect(searchExtracts('normalizacion', { dbPath, subject: 'Ggo' })).resolves.toEqual([]);
+  });
+
+  it('reports malformed queries as invalid-query errors', async () => {
+    await expect(searchExtracts('"normalizacion', { dbPath })).rejects.toMatchObject({
+      kind: 'invalid-query',
+      message: expect.stringContaining('Invalid search query'),
+    });
+  });
+
+  it('reports a missing database as store-not-built without creating it', async () => {
+    const missingPath = path.join(tempDir, 'missing.sqlite');
+
+    await expect(searchExtracts('normalizacion', { dbPath: missingPath })).rejects.toMatchObject({
+      kind: 'store-not-built',
+    });
+    expect(fs.existsSync(missingPath)).toBe(false);
+  });
+});
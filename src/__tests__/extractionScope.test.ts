@@ -0,0 +1,68 @@
+/** @jest-environment node */
+import fs from 'node:fs';
+import path from 'node:path';
+import os from 'node:os';
+import { execFile } from 'node:child_process';
+import { promisify } from 'node:util';
+
+jest.setTimeout(30000);
+
+const execFileAsync = promisify(execFile);
+
+describe('extraction scope', () => {
+  const repoRoot = path.resolve(__dirname, '..', '..');
+  const scriptPath = path.resolve(repoRoot, 'scripts', 'extraction_scope.py');
+  let tempDir: string;
+  let subjectsDir: string;
+  let manifestPath: string;
+
+  const listScope = (...scopeArgs: string[]) =>
+    execFileAsync(
+      'python3',
+      [scriptPath, '--subjects-dir', subjectsDir, '--manifest', manifestPath, ...scopeArgs],
+      { encoding: 'utf8' }
+    );
+
+  beforeAll(() => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'extraction-scope-test-'));
+    subjectsDir = path.join(tempDir, 'subjects');
+    // Folder names copied from macOS arrive decomposed (NFD).
+    const practicas = path.join(subjectsDir, 'Dbd', 'Prácticas'.normalize('NFD'));
+    fs.mkdirSync(practicas, { recursive: true });
+    fs.writeFileSync(path.join(practicas, 'p1.docx'), 'docx', 'utf8');
+    fs.writeFileSync(path.join(subjectsDir, 'Dbd', 'tema1.pdf'), 'pdf', 'utf8');
+    manifestPath = path.join(tempDir, 'manifest.json');
+    fs.writeFileSync(
+      manifestPath,
+      JSON.stringify({ version: 3, sources: { 'Dbd/borrado.pdf': { size: 3 } } }),
+      'utf8'
+    );
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  it('selects decomposed folders with composed --include and --path values', async () => {
+    const included = await listScope('--include', 'Dbd/Prácticas/*'.normalize('NFC'));
+    expect(included.stdout.trim().normalize('NFC')).toBe('Dbd/Prácticas/p1.docx');
+
+    const scoped = await listScope('--path', path.join(subjectsDir, 'Dbd', 'Prácticas'.normalize('NFC')));
+    expect(scoped.stdout.trim().normalize('NFC')).toBe('Dbd/Prácticas/p1.docx');
+  });
+
+  it('accepts a --path that only the manifest still records', async () => {
+    await expect(listScope('--path', 'Dbd/borrado.pdf')).resolves.toMatchObject({ stdout: '' });
+  });
+
+  it('rejects --path and --include values that match nothing', async () => {
+    await expect(listScope('--path', 'Dbd/Practicas')).rejects.toMatchObject({
+      code: 2,
+      stderr: expect.stringContaining('--path Dbd/Practicas matches no source'),
+    });
+    await expect(listScope('--include', 'Dbd/*.pptx')).rejects.toMatchObject({
+      code: 2,
+      stderr: expect.stringContaining('--include Dbd/*.pptx'),
+    });
+  });
+});
@@ -0,0 +1,95 @@
+/** @jest-environment node */
+import fs from 'node:fs';
+import path from 'node:path';
+import os from 'node:os';
+import { execFile } from 'node:child_process';
+import { promisify } from 'node:util';
+
+jest.setTimeout(30000);
+
+const execFileAsync = promisify(execFile);
+
+describe('precompiled seed bundle', () => {
+  const repoRoot = path.resolve(__dirname, '..', '..');
+  const scriptPath = path.resolve(repoRoot, 'scripts', 'build_seed_bundle.py');
+  let tempDir: string;
+  let seedDir: string;
+  let outputDir: string;
+
+  const build = () =>
+    execFileAsync('python3', [scriptPath, '--seed-dir', seedDir, '--output-dir', outputDir], { encoding: 'utf8' });
+
+  const readBundle = () => {
+    const manifest = JSON.parse(fs.readFileSync(path.join(outputDir, 'seed-manifest.json'), 'utf8'));
+    const bundle = JSON.parse(fs.readFileSync(path.join(outputDir, manifest.bundle), 'utf8'));
+    return { manifest, bundle };
+  };
+
+  beforeAll(() => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'seed-bundle-test-'));
+    seedDir = path.join(tempDir, 'seed');
+    outputDir = path.join(tempDir, 'public');
+    fs.mkdirSync(seedDir, { recursive: true });
+    fs.writeFileSync(
+      path.join(seedDir, 'a1-basics.json'),
+      JSON.stringify({
+        lessons: [
+          { id: 'l1', level: 'A1', title: 'Saludos', slug: 'saludos', tags: ['a1'], markdown: '# Hola', extra: true },
+        ],
+        exercises: [{ id: 'e1', lessonId: 'l1', type: 'short', promptMd: '¿Cómo estás?', answer: 'bien' }],
+        flashcards: [{ id: 'f1', front: 'hola', back: 'hello', tag: 'a1', deck: 'vocab' }],
+      }),
+      'utf8'
+    );
+    fs.writeFileSync(
+      path.join(seedDir, 'broken.json'),
+      JSON.stringify({ lessons: [{ id: 'l2', level: 'Z9', title: 'x', slug: 'x', tags: [], markdown: '' }] }),
+      'utf8'
+    );
+    fs.writeFileSync(
+      path.join(seedDir, 'extra-flashcards.csv'),
+      ['id,front,back,tag,deck', 'f2,adiós,goodbye,a1,vocab', 'f3,x,y,z,not-a-deck', ''].join('\n'),
+      'utf8'
+    );
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  it('keeps only valid records, strips unknown keys and hashes each record', async () => {
+    const { stderr } = await build();
+    const { manifest, bundle } = readBundle();
+
+    expect(manifest.counts).toEqual({ lessons: 1, exercises: 1, flashcards: 2 });
+    expect(bundle.version).toBe(manifest.version);
+    expect(bundle.lessons[0][1]).toEqual({
+      id: 'l1',
+      level: 'A1',
+      title: 'Saludos',
+      slug: 'saludos',
+      tags: ['a1'],
+      markdown: '# Hola',
+    });
+    expect(bundle.lessons[0][0]).toMatch(/^[0-9a-f]{16}$/);
+    expect(bundle.flashcards.map(([, card]: [string, { id: string }]) => card.id)).toEqual(['f1', 'f2']);
+    expect(stderr).toContain('broken.json');
+    expect(stderr).toContain('extra-flashcards.csv: line 3');
+  });
+
+  it('changes the version and only the edited record hash when a record changes', async () => {
+    const before = readBundle();
+    fs.writeFileSync(
+      path.join(seedDir, 'extra-flashcards.csv'),
+      ['id,front,back,tag,deck', 'f2,adiós,bye,a1,vocab', ''].join('\n'),
+      'utf8'
+    );
+    await build();
+    const after = readBundle();
+
+    expect(after.manifest.version).not.toBe(before.manifest.version);
+    expect(after.bundle.flashcards[0][0]).toBe(before.bundle.flashcards[0][0]);
+    expect(after.bundle.flashcards[1][0]).not.toBe(before.bundle.flashcards[1][0]);
+    expect(fs.readdirSync(outputDir).filter((name) => name.startsWith('seed-bundle.'))).toEqual([after.manifest.bundle]);
+  });
+});
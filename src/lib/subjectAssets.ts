@@ -101,3 +101,14 @@ export const isSubjectAssetUrl = (rawSrc: string): boolean => {
 };
 
 export { isExternalAsset };
+
+/**
+ * Asks the service worker to keep a subject's figures available offline. Only
+ * files whose digest changed since the last sync are downloaded, up to
+ * `byteBudget` bytes for the subject (the worker's default when omitted).
+ */
+export const requestSubjectPrefetch = async (subjectId: string, byteBudget?: number): Promise<void> => {
+  if (typeof navigator === 'undefined' || !('serviceWorker' in navigator)) return;
+  const registration = await navigator.serviceWorker.ready;
+  registration.active?.postMessage({ type: 'PREFETCH_SUBJECT', subject: subjectId, byteBudget });
+};
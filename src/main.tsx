@@ -44,6 +44,8 @@ const registerServiceWorker = async () => {
 
   try {
     await window.navigator.serviceWorker.register('/service-worker.js');
+    const registration = await window.navigator.serviceWorker.ready;
+    registration.active?.postMessage({ type: 'SYNC_PRECACHE' });
   } catch (error: unknown) {
     console.error('Service worker registration failed', error);
   }
@@ -2,6 +2,7 @@ import React, { useCallback, useMemo, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { subjectCatalog } from '../data/subjectCatalog';
 import { subjectResourceLibrary } from '../data/subjectResources';
+import { requestSubjectPrefetch } from '../lib/subjectAssets';
 import type { ResourceLink } from '../types/subject';
 import styles from './SubjectPdfBrowserPage.module.css';
 
@@ -166,6 +167,14 @@ const SubjectPdfBrowserPage: React.FC = () => {
               </option>
             ))}
           </select>
+          <button
+            type="button"
+            className={styles.runButton}
+            onClick={() => activeSubject && void requestSubjectPrefetch(activeSubject.id)}
+            disabled={!activeSubject}
+          >
+            Keep figures offline
+          </button>
         </div>
       </header>
 
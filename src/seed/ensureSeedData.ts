@@ -1,6 +1,7 @@
 import { db } from '../db';
 import { Exercise, Flashcard, Lesson } from './seedTypes';
 import { normalizeSeedInput } from './normalizeSeedBundle';
+import { applySeedBundle, fetchSeedManifest, isPrecompiledSeedVersion } from './seedBundle';
 
 export const SEED_VERSION_KEY = 'seed-version';
 export const DEFAULT_SEED_VERSION = '2024-05-07';
@@ -77,14 +78,31 @@ export async function ensureSeedData(): Promise<SeedResult> {
     };
   }
 
-  if (existingVersion?.value === DEFAULT_SEED_VERSION && hasData) {
+  if (!existingVersion && hasData) {
     return {
       seeded: false,
       counts: { lessons: lessonCount, exercises: exerciseCount, flashcards: flashcardCount },
     };
   }
 
-  if (!existingVersion && hasData) {
+  // Prefer the precompiled bundle: no parsing or validation, and only changed records are written.
+  const manifest = await fetchSeedManifest();
+  if (manifest) {
+    if (existingVersion?.value === manifest.version && hasData) {
+      return {
+        seeded: false,
+        counts: { lessons: lessonCount, exercises: exerciseCount, flashcards: flashcardCount },
+      };
+    }
+    try {
+      const { counts } = await applySeedBundle(manifest, SEED_VERSION_KEY);
+      return { seeded: true, counts };
+    } catch (error) {
+      console.warn('Failed to apply the precompiled seed bundle; loading seed files instead', error);
+    }
+  }
+
+  if ((existingVersion?.value === DEFAULT_SEED_VERSION || isPrecompiledSeedVersion(existingVersion?.value)) && hasData) {
     return {
       seeded: false,
       counts: { lessons: lessonCount, exercises: exerciseCount, flashcards: flashcardCount },
@@ -0,0 +1,104 @@
+import { db } from '../db';
+import type { Exercise, Flashcard, Lesson } from './seedTypes';
+
+/**
+ * Loader for the precompiled seed bundle written by scripts/build_seed_bundle.py.
+ * Records were validated at build time, so they are written to Dexie as-is and
+ * only when their content hash differs from the one stored at the last seed.
+ */
+
+export const SEED_HASHES_KEY = 'seed-hashes';
+
+type SeedTable = 'lessons' | 'exercises' | 'flashcards';
+type HashedRecords<T> = Array<[hash: string, record: T]>;
+type SeedHashes = Record<SeedTable, Record<string, string>>;
+
+export type SeedManifest = {
+  version: string;
+  bundle: string;
+  bytes: number;
+  counts: Record<SeedTable, number>;
+};
+
+type PrecompiledSeedBundle = {
+  version: string;
+  lessons: HashedRecords<Lesson>;
+  exercises: HashedRecords<Exercise>;
+  flashcards: HashedRecords<Flashcard>;
+};
+
+const PRECOMPILED_VERSION_PATTERN = /^\d+-[0-9a-f]{12}$/;
+
+const publicUrl = (name: string) => `${import.meta.env.BASE_URL ?? '/'}${name}`;
+
+export const isPrecompiledSeedVersion = (value: unknown): value is string =>
+  typeof value === 'string' && PRECOMPILED_VERSION_PATTERN.test(value);
+
+export async function fetchSeedManifest(): Promise<SeedManifest | null> {
+  try {
+    const response = await fetch(publicUrl('seed-manifest.json'), { cache: 'no-cache' });
+    if (!response.ok) return null;
+    const manifest = (await response.json()) as SeedManifest;
+    return isPrecompiledSeedVersion(manifest.version) && typeof manifest.bundle === 'string' ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+const changedRecords = <T extends { id: string }>(
+  records: HashedRecords<T>,
+  previous: Record<string, string> | undefined,
+  next: Record<string, string>
+) => {
+  const changed: T[] = [];
+  for (const [hash, record] of records) {
+    next[record.id] = hash;
+    if (previous?.[record.id] !== hash) changed.push(record);
+  }
+  return changed;
+};
+
+/**
+ * Writes the records of the bundle that changed since the last seed, stores the
+ * bundle version under `versionKey` and returns the bundle totals. Review state
+ * on existing flashcards is kept.
+ */
+export async function applySeedBundle(manifest: SeedManifest, versionKey: string) {
+  const response = await fetch(publicUrl(manifest.bundle));
+  if (!response.ok) {
+    throw new Error(`Seed bundle request failed with status ${response.status}`);
+  }
+  const bundle = (await response.json()) as PrecompiledSeedBundle;
+
+  const stored = await db.settings.get(SEED_HASHES_KEY);
+  const previous = (stored?.value ?? {}) as Partial<SeedHashes>;
+  const hashes: SeedHashes = { lessons: {}, exercises: {}, flashcards: {} };
+  const lessons = changedRecords(bundle.lessons, previous.lessons, hashes.lessons);
+  const exercises = changedRecords(bundle.exercises, previous.exercises, hashes.exercises);
+  const flashcards = changedRecords(bundle.flashcards, previous.flashcards, hashes.flashcards);
+
+  await db.transaction('rw', [db.lessons, db.exercises, db.flashcards, db.settings], async () => {
+    if (lessons.length) await db.lessons.bulkPut(lessons);
+    if (exercises.length) await db.exercises.bulkPut(exercises);
+    if (flashcards.length) {
+      const existing = await db.flashcards.bulkGet(flashcards.map((card) => card.id));
+      await db.flashcards.bulkPut(
+        flashcards.map((card, index) => {
+          const srs = existing[index]?.srs;
+          return srs ? { ...card, srs } : card;
+        })
+      );
+    }
+    await db.settings.put({ key: SEED_HASHES_KEY, value: hashes });
+    await db.settings.put({ key: versionKey, value: bundle.version });
+  });
+
+  return {
+    counts: {
+      lessons: bundle.lessons.length,
+      exercises: bundle.exercises.length,
+      flashcards: bundle.flashcards.length,
+    },
+    written: lessons.length + exercises.length + flashcards.length,
+  };
+}
@@ -4,6 +4,7 @@ import { copyFile, mkdir, writeFile } from "node:fs/promises";
 import path from "node:path";
 import { fileURLToPath } from "node:url";
 import { extractPdf } from "./extraction";
+import { ExtractSearchError, searchExtracts } from "./extractStore";
 
 export const app = express();
 
@@ -35,6 +36,36 @@ app.post("/api/extract", async (req: Request, res: Response) => {
   }
 });
 
+app.get("/api/extracts/search", async (req: Request, res: Response) => {
+  const query = typeof req.query.q === "string" ? req.query.q.trim() : "";
+  const subject = typeof req.query.subject === "string" ? req.query.subject.trim() : "";
+  const limit = typeof req.query.limit === "string" ? Number.parseInt(req.query.limit, 10) : NaN;
+
+  if (!query) {
+    res.status(400).json({ error: "A q query parameter must be provided" });
+    return;
+  }
+
+  try {
+    const results = await searchExtracts(query, {
+      subject: subject || undefined,
+      limit: Number.isFinite(limit) && limit > 0 ? limit : undefined,
+    });
+    res.json({ results });
+  } catch (error) {
+    if (error instanceof ExtractSearchError && error.kind === "invalid-query") {
+      res.status(400).json({ error: error.message });
+      return;
+    }
+    if (error instanceof ExtractSearchError && error.kind === "store-not-built") {
+      res.status(503).json({ error: error.message });
+      return;
+    }
+    console.error("Failed to search extracts", error);
+    res.status(500).json({ error: "Failed to search subject extracts" });
+  }
+});
+
 app.post("/api/save-extract", async (req: Request, res: Response) => {
   const filePath = typeof req.body?.filePath === "string" ? req.body.filePath.trim() : "";
   const markdown = typeof req.body?.markdown === "string" ? req.body.markdown : "";
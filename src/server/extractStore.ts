@@ -0,0 +1,142 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "node:child_process";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+export interface ExtractSearchResult {
+  source: string;
+  subject: string;
+  page: number;
+  label: string;
+  snippet: string;
+  rank: number;
+}
+
+export interface ExtractSearchOptions {
+  subject?: string;
+  limit?: number;
+  dbPath?: string;
+}
+
+/** Exit statuses of `extract_store.py search` that callers can act on. */
+const EXIT_INVALID_QUERY = 3;
+const EXIT_STORE_NOT_BUILT = 4;
+
+export type ExtractSearchErrorKind = "invalid-query" | "store-not-built" | "failed";
+
+/**
+ * Raised by {@link searchExtracts}. `kind` separates a malformed FTS5 query
+ * and a missing or empty store from other failures; `message` carries the
+ * script's explanation for the first two.
+ */
+export class ExtractSearchError extends Error {
+  readonly kind: ExtractSearchErrorKind;
+
+  constructor(message: string, kind: ExtractSearchErrorKind) {
+    super(message);
+    this.name = "ExtractSearchError";
+    this.kind = kind;
+  }
+}
+
+const PYTHON_BIN = process.env.PYTHON_PATH || process.env.PYTHON || "python3";
+const moduleDir =
+  typeof __dirname !== "undefined"
+    ? __dirname
+    : path.dirname(fileURLToPath(import.meta.url));
+const repoRoot = path.resolve(moduleDir, "..", "..");
+
+function resolveScriptPath(): string {
+  return path.resolve(repoRoot, "scripts", "extract_store.py");
+}
+
+export function resolveExtractStorePath(): string {
+  return process.env.SUBJECT_EXTRACTS_DB
+    ? path.resolve(process.env.SUBJECT_EXTRACTS_DB)
+    : path.resolve(repoRoot, ".cache", "subject-extracts.sqlite");
+}
+
+/**
+ * Full-text search over the SQLite extract store written by
+ * `extract_subject_texts.py --sqlite` (or `extract_store.py import`).
+ * `query` uses FTS5 syntax; accents are folded, so `normalizacion` also
+ * matches `normalización`.
+ */
+export async function searchExtracts(
+  query: string,
+  options: ExtractSearchOptions = {}
+): Promise<ExtractSearchResult[]> {
+  if (!query.trim()) {
+    throw new Error("A search query must be provided");
+  }
+
+  const args = [
+    resolveScriptPath(),
+    "--db",
+    options.dbPath ?? resolveExtractStorePath(),
+    "search",
+    query,
+    "--json",
+  ];
+  if (options.subject) {
+    args.push("--subject", options.subject);
+  }
+  if (options.limit !== undefined) {
+    args.push("--limit", String(options.limit));
+  }
+
+  return await new Promise<ExtractSearchResult[]>((resolve, reject) => {
+    const searcher = spawn(PYTHON_BIN, args, {
+      stdio: ["ignore", "pipe", "pipe"],
+      env: process.env,
+    }) as ChildProcessWithoutNullStreams;
+
+    let stdout = "";
+    let stderr = "";
+
+    searcher.stdout.setEncoding("utf8");
+    searcher.stdout.on("data", (chunk: string) => {
+      stdout += chunk;
+    });
+
+    searcher.stderr.setEncoding("utf8");
+    searcher.stderr.on("data", (chunk: string) => {
+      stderr += chunk;
+    });
+
+    searcher.on("error", (error) => {
+      const wrapped = new Error(`Failed to start extract search: ${error.message}`);
+      (wrapped as Error & { cause?: Error }).cause = error instanceof Error ? error : undefined;
+      reject(wrapped);
+    });
+
+    searcher.on("close", (code) => {
+      if (code !== 0) {
+        const details = stderr.trim();
+        if (code === EXIT_INVALID_QUERY) {
+          reject(new ExtractSearchError(details || "Invalid search query", "invalid-query"));
+          return;
+        }
+        if (code === EXIT_STORE_NOT_BUILT) {
+          reject(new ExtractSearchError(details || "Extract store not built", "store-not-built"));
+          return;
+        }
+        const message = details ? ` ${details}` : "";
+        reject(new ExtractSearchError(`Extract search failed with exit code ${code}.${message}`, "failed"));
+        return;
+      }
+
+      try {
+        const parsed = JSON.parse(stdout);
+        resolve(Array.isArray(parsed) ? (parsed as ExtractSearchResult[]) : []);
+      } catch (error) {
+        reject(
+          new Error(
+            error instanceof Error
+              ? `Failed to parse search output: ${error.message}`
+              : "Failed to parse search output"
+          )
+        );
+      }
+    });
+  });
+}